@@ -8,12 +8,14 @@ import matplotlib.pyplot as plt
 import os
 from glob import glob
 
+from scripts.nettoyage import nettoyer_livres
+
 def analyser_categorie(fichier_csv):
     """Analyse une catégorie de livres"""
     print(f"Analyse du fichier : {fichier_csv}")
     
     try:
-        df = pd.read_csv(fichier_csv)
+        df = nettoyer_livres(pd.read_csv(fichier_csv))
         
         print(f"Nombre de livres : {len(df)}")
         print(f"Prix moyen : £{df['price'].mean():.2f}")
@@ -26,16 +28,31 @@ def analyser_categorie(fichier_csv):
         print(f"Erreur lors de l'analyse : {e}")
         return None
 
-def comparer_categories(dossier_data="data"):
-    """Compare plusieurs catégories"""
+def comparer_categories_parquet(dossier_parquet="outputs/parquet"):
+    """Compare les catégories à partir du dataset Parquet (lecture des seules colonnes utiles)"""
+    df = pd.read_parquet(dossier_parquet, columns=['category', 'price', 'rating'])
+    
+    results_df = df.groupby('category', observed=True).agg(
+        Livres=('price', 'size'),
+        **{'Prix Moyen': ('price', 'mean'), 'Rating Moyen': ('rating', 'mean')}
+    ).reset_index().rename(columns={'category': 'Catégorie'})
+    print(results_df)
+    
+    return results_df
+
+def comparer_categories(dossier_data="data", dossier_parquet=None):
+    """Compare plusieurs catégories (depuis le dataset Parquet si dossier_parquet est fourni)"""
     print("Comparaison des catégories :")
     
+    if dossier_parquet:
+        return comparer_categories_parquet(dossier_parquet)
+    
     csv_files = glob(os.path.join(dossier_data, "*.csv"))
     results = []
     
     for fichier in csv_files:
         nom_categorie = os.path.basename(fichier).replace('.csv', '')
-        df = pd.read_csv(fichier)
+        df = nettoyer_livres(pd.read_csv(fichier))
         
         results.append({
             'Catégorie': nom_categorie,
@@ -0,0 +1,259 @@
+# benchmarks/bench_scraper.py
+"""
+Benchmark hors ligne du scraper contre le serveur local de local_site.py
+
+Chaque configuration (moteur, concurrence, backend de parsing) est executee
+sur scrape_category (une categorie) puis scrape_all_categories (tout le
+catalogue), chacune dans un processus neuf: le CPU et le pic de memoire
+mesures sont ceux du scraper seul, le serveur tourne dans son propre processus.
+
+Mesures: pages/s, latence des requetes (p50/p99, vue du scraper, reessais
+compris), erreurs, temps CPU et pic de RSS.
+
+Exemples:
+  python benchmarks/bench_scraper.py
+  python benchmarks/bench_scraper.py --configs sync:1:bs4 sync:8:lxml async:32:lxml --latency 0.02
+  python benchmarks/bench_scraper.py --categories 10 --pages 5 --error-rate 0.01 --json resultats.json
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import shutil
+import tempfile
+import multiprocessing
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from local_site import serve_forever
+
+# moteur:concurrence:parser (workers pour sync, connexions par hote pour async)
+DEFAULT_CONFIGS = ['sync:1:bs4', 'sync:8:bs4', 'sync:8:lxml', 'async:16:lxml']
+TARGETS = ['category', 'all']
+
+def parse_config(spec):
+    """
+    Decode 'moteur[:concurrence[:parser]]', par exemple 'sync:8:lxml' ou 'async:16'
+    """
+    parts = spec.split(':')
+    engine = parts[0]
+    if engine not in ('sync', 'async'):
+        raise ValueError(f"Moteur inconnu dans '{spec}' (choix: sync, async)")
+    concurrency = int(parts[1]) if len(parts) > 1 else 1
+    parser = parts[2] if len(parts) > 2 else 'bs4'
+    return {'name': spec, 'engine': engine, 'concurrency': concurrency, 'parser': parser}
+
+def percentile(values, fraction):
+    """
+    Percentile par rang le plus proche d'une liste de valeurs
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+def cpu_seconds():
+    """
+    Temps CPU utilisateur + systeme du processus et de ses enfants termines
+    """
+    if resource is None:
+        return time.process_time()
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+def peak_rss_mb():
+    """
+    Pic de memoire residente du processus en Mo
+    """
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux compte en Ko, macOS en octets
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def timed(function, samples):
+    """
+    Enveloppe une fonction de telechargement: duree et succes de chaque appel
+    """
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        samples.append((time.perf_counter() - start, result is not None))
+        return result
+    return wrapper
+
+def timed_async(function, samples):
+    """
+    Equivalent de timed() pour une coroutine
+    """
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = await function(*args, **kwargs)
+        samples.append((time.perf_counter() - start, result is not None))
+        return result
+    return wrapper
+
+def count_csv_rows(filepath):
+    """
+    Nombre de livres d'un CSV de sortie (en-tete exclu)
+    """
+    if not os.path.exists(filepath):
+        return 0
+    with open(filepath, newline='', encoding='utf-8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+def run_configuration(base_url, config, target, delay, results):
+    """
+    Execute une configuration dans le processus courant et publie ses mesures sur `results`.
+    Fonction de module: point d'entree des processus de mesure.
+    """
+    # La sortie console du scraper fait partie du cout mesure, pas du rapport
+    sys.stdout = open(os.devnull, 'w')
+
+    import parsers
+    import async_engine
+    from session import configure_session
+    from utils import set_output_directory
+    from dedup import reset_book_index
+    from scrape import scrape_category, scrape_all_categories
+    from settings import HTTP_POOL_SIZE
+    from log import configure_logging, close_logging
+
+    configure_logging()
+    samples = []
+    parsers.get_page = timed(parsers.get_page, samples)
+    async_engine.get_page_async = timed_async(async_engine.get_page_async, samples)
+
+    outdir = tempfile.mkdtemp(prefix='bench_scraper_')
+    set_output_directory(outdir)
+    parsers.set_base_url(base_url)
+    configure_session(max(HTTP_POOL_SIZE, config['concurrency']))
+    if config['parser'] != 'bs4':
+        parsers.set_parser_backend(config['parser'])
+    reset_book_index()
+
+    engine = config['engine']
+    concurrency = config['concurrency']
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+
+    if target == 'category':
+        category = parsers.get_category_links()[0]
+        if engine == 'async':
+            _, counts = async_engine.run_async_crawl([category['name']], delay, None, concurrency)
+            books_count = sum(counts)
+        else:
+            books_count = len(scrape_category(category['url'], category['name'], delay, None, concurrency))
+    else:
+        scrape_all_categories(delay, None, workers=concurrency if engine == 'sync' else 1,
+                              engine=engine, connections=concurrency)
+        books_count = count_csv_rows(os.path.join(outdir, 'data', 'all_books.csv'))
+
+    elapsed = time.perf_counter() - start
+    cpu = cpu_seconds() - cpu_start
+    latencies = [duration for duration, _ in samples]
+    shutil.rmtree(outdir, ignore_errors=True)
+    close_logging()
+
+    results.put({
+        'config': config['name'],
+        'target': target,
+        'books': books_count,
+        'pages': len(samples),
+        'errors': sum(1 for _, ok in samples if not ok),
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'cpu_seconds': round(cpu, 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    })
+
+def run_in_process(context, base_url, config, target, delay):
+    """
+    Lance une mesure dans un processus neuf et retourne ses resultats (None en cas d'echec)
+    """
+    results = context.Queue()
+    process = context.Process(target=run_configuration, args=(base_url, config, target, delay, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0 or results.empty():
+        print(f"Echec de la mesure {config['name']} / {target} (code {process.exitcode})")
+        return None
+    return results.get()
+
+def print_result(result):
+    print(f"{result['config']:<16} {result['target']:<9} {result['books']:>6} {result['pages']:>6} {result['errors']:>7} "
+          f"{result['seconds']:>8.2f} {result['pages_per_second']:>8.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+          f"{result['cpu_seconds']:>8.2f} {result['peak_rss_mb']:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark hors ligne du scraper contre un catalogue local genere',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split('Exemples:')[1]
+    )
+    parser.add_argument('--configs', nargs='+', default=DEFAULT_CONFIGS,
+                        help=f"Configurations moteur:concurrence:parser (defaut: {' '.join(DEFAULT_CONFIGS)})")
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=TARGETS,
+                        help='category: scrape_category sur une categorie, all: scrape_all_categories (defaut: les deux)')
+    parser.add_argument('--categories', type=int, default=5, help='Nombre de categories du catalogue (defaut: 5)')
+    parser.add_argument('--pages', type=int, default=3, help='Pages liste par categorie (defaut: 3)')
+    parser.add_argument('--books-per-page', type=int, default=20, help='Livres par page liste (defaut: 20)')
+    parser.add_argument('--latency', type=float, default=0.005, help='Latence du serveur par reponse en secondes (defaut: 0.005)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Part des reponses en 503 (defaut: 0)')
+    parser.add_argument('--delay', type=float, default=0.0, help='--delay du scraper en secondes (defaut: 0)')
+    parser.add_argument('--json', help='Ecrit aussi les resultats dans ce fichier JSON')
+    args = parser.parse_args()
+
+    configs = [parse_config(spec) for spec in args.configs]
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    options = {
+        'categories': args.categories,
+        'pages': args.pages,
+        'books_per_page': args.books_per_page,
+        'latency': args.latency,
+        'error_rate': args.error_rate,
+    }
+    server = context.Process(target=serve_forever, args=(options, ready), daemon=True)
+    server.start()
+    base_url = ready.get(timeout=30)
+
+    print(f"Catalogue local {base_url}: {args.categories} categories x {args.pages} pages x {args.books_per_page} livres, "
+          f"latence {args.latency * 1000:.0f} ms, erreurs {args.error_rate:.1%}")
+    print(f"{'config':<16} {'cible':<9} {'livres':>6} {'pages':>6} {'erreurs':>7} {'duree_s':>8} {'pages/s':>8} "
+          f"{'p50_ms':>8} {'p99_ms':>8} {'cpu_s':>8} {'rss_mo':>8}")
+
+    results = []
+    try:
+        for config in configs:
+            for target in args.targets:
+                result = run_in_process(context, base_url, config, target, args.delay)
+                if result:
+                    print_result(result)
+                    results.append(result)
+    finally:
+        server.terminate()
+        server.join()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'options': dict(options, delay=args.delay), 'results': results}, file, indent=2)
+        print(f"Resultats ecrits dans {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# benchmarks/local_site.py
+"""
+Serveur HTTP local imitant books.toscrape.com pour les benchmarks hors ligne
+
+Le catalogue est genere: nombre de categories, de pages par categorie et de
+livres par page configurables. Les pages reprennent la structure HTML que
+parsers.py et fast_parsers.py attendent (menu nav-list, article.product_pod,
+li.next, tableau "Product Information"). Une latence fixe et un taux d'erreur
+(reponses 503) simulent un serveur distant; une limite de debit optionnelle
+repond 429 avec Retry-After au-dela de `rate_limit` requetes par seconde.
+"""
+import re
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RATINGS = ['One', 'Two', 'Three', 'Four', 'Five']
+
+# Plus petit JPEG reconnu par utils.is_valid_image (signature seulement)
+COVER_BYTES = b'\xff\xd8\xff\xe0' + b'\x00' * 2048
+
+CATEGORY_PATH = re.compile(r'^/catalogue/category/books/category-(\d+)_\d+/(?:index|page-(\d+))\.html$')
+PRODUCT_PATH = re.compile(r'^/catalogue/book-(\d+)-(\d+)-(\d+)_\d+/index\.html$')
+
+class LocalCatalogue:
+    """
+    Catalogue genere et comportement du serveur (latence, erreurs)
+    """
+    def __init__(self, categories=5, pages=3, books_per_page=20, latency=0.0, error_rate=0.0, seed=0, rate_limit=0.0):
+        self.categories = categories
+        self.pages = pages
+        self.books_per_page = books_per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._window = (0, 0)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'pages': 0, 'errors': 0, 'bytes': 0, 'throttled': 0}
+
+    @property
+    def total_books(self):
+        return self.categories * self.pages * self.books_per_page
+
+    def category_name(self, category):
+        return f"Category {category}"
+
+    def category_href(self, category):
+        return f"catalogue/category/books/category-{category}_{category + 2}/index.html"
+
+    def product_slug(self, category, page, position):
+        book_id = (category * self.pages + page - 1) * self.books_per_page + position + 1
+        return f"book-{category}-{page}-{position}_{book_id}"
+
+    def should_fail(self):
+        """
+        Tire au sort une erreur 503 selon le taux configure
+        """
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def over_limit(self):
+        """
+        Vrai si la requete depasse la limite de debit (fenetre fixe d'une seconde)
+        """
+        if self.rate_limit <= 0:
+            return False
+        second = int(time.monotonic())
+        with self._lock:
+            window, requests = self._window
+            requests = requests + 1 if window == second else 1
+            self._window = (second, requests)
+            return requests > self.rate_limit
+
+    def count(self, status, size):
+        with self._lock:
+            self.stats['pages'] += 1
+            self.stats['bytes'] += size
+            if status >= 500:
+                self.stats['errors'] += 1
+            elif status == 429:
+                self.stats['throttled'] += 1
+
+    def home_page(self):
+        links = ''.join(
+            f'<li>\n<a href="{self.category_href(category)}">\n    {self.category_name(category)}\n</a>\n</li>'
+            for category in range(self.categories)
+        )
+        return (
+            '<html><head><title>All products | Books to Scrape - Sandbox</title></head><body>'
+            '<div class="side_categories"><ul class="nav nav-list"><li>'
+            '<a href="catalogue/category/books_1/index.html">\n    Books\n</a>'
+            f'<ul>{links}</ul></li></ul></div></body></html>'
+        )
+
+    def list_page(self, category, page):
+        if category >= self.categories or not 1 <= page <= self.pages:
+            return None
+        articles = ''.join(
+            '<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3"><article class="product_pod">'
+            f'<div class="image_container"><a href="../../../{self.product_slug(category, page, position)}/index.html">'
+            '<img src="../../../../media/cache/cover.jpg" alt="cover" class="thumbnail"></a></div>'
+            f'<h3><a href="../../../{self.product_slug(category, page, position)}/index.html" title="Book">Book</a></h3>'
+            '<div class="product_price"><p class="price_color">£10.00</p></div></article></li>'
+            for position in range(self.books_per_page)
+        )
+        next_link = f'<li class="next"><a href="page-{page + 1}.html">next</a></li>' if page < self.pages else ''
+        return (
+            f'<html><body><h1>{self.category_name(category)}</h1>'
+            f'<ol class="row">{articles}</ol><ul class="pager">{next_link}</ul></body></html>'
+        )
+
+    def product_page(self, category, page, position):
+        if category >= self.categories or not 1 <= page <= self.pages or position >= self.books_per_page:
+            return None
+        slug = self.product_slug(category, page, position)
+        digest = hashlib.md5(slug.encode()).hexdigest()
+        price = int(digest[:4], 16) % 5000 / 100 + 10
+        stock = int(digest[4:6], 16) % 30
+        return (
+            f'<html><head><title>{slug} | Books to Scrape - Sandbox</title></head><body>'
+            '<div class="content"><div class="row"><div class="col-sm-6">'
+            f'<div id="product_gallery" class="carousel"><div class="thumbnail"><div class="carousel-inner">'
+            f'<div class="item active"><img src="../../media/cache/{digest[:2]}/{digest[2:4]}/{digest}.jpg" alt="{slug}" /></div>'
+            '</div></div></div></div>'
+            f'<div class="col-sm-6 product_main"><h1>The Book {slug}</h1>'
+            f'<p class="price_color">£{price:.2f}</p>'
+            f'<p class="instock availability">\n    <i class="icon-ok"></i>\n    \n        In stock ({stock} available)\n    \n</p>'
+            f'<p class="star-rating {RATINGS[int(digest[6], 16) % 5]}">\n    <i class="icon-star"></i>\n</p></div></div>'
+            '<div id="product_description" class="sub-header"><h2>Product Description</h2></div>'
+            f'<p>Generated description of {slug}. ' + 'Lorem ipsum dolor sit amet. ' * 20 + '</p>'
+            '<div class="sub-header"><h2>Product Information</h2></div>'
+            '<table class="table table-striped">'
+            f'<tr><th>UPC</th><td>{digest[:16]}</td></tr>'
+            '<tr><th>Product Type</th><td>Books</td></tr>'
+            f'<tr><th>Price (excl. tax)</th><td>£{price:.2f}</td></tr>'
+            f'<tr><th>Price (incl. tax)</th><td>£{price:.2f}</td></tr>'
+            '<tr><th>Tax</th><td>£0.00</td></tr>'
+            f'<tr><th>Availability</th><td>In stock ({stock} available)</td></tr>'
+            f'<tr><th>Number of reviews</th><td>{int(digest[7], 16)}</td></tr>'
+            '</table></div></body></html>'
+        )
+
+    def render(self, path):
+        """
+        Contenu et type d'une URL du catalogue, ou None si elle n'existe pas
+        """
+        if path in ('/', '/index.html'):
+            return self.home_page(), 'text/html; charset=utf-8'
+        match = CATEGORY_PATH.match(path)
+        if match:
+            return self.list_page(int(match[1]), int(match[2] or 1)), 'text/html; charset=utf-8'
+        match = PRODUCT_PATH.match(path)
+        if match:
+            return self.product_page(int(match[1]), int(match[2]), int(match[3])), 'text/html; charset=utf-8'
+        if path.startswith('/media/'):
+            return COVER_BYTES, 'image/jpeg'
+        return None, None
+
+class CatalogueServer(ThreadingHTTPServer):
+    """
+    Serveur multi-thread avec une file d'attente de connexions assez longue
+    pour les rafales du moteur async (5 par defaut: connexions refusees puis reessayees)
+    """
+    daemon_threads = True
+    request_queue_size = 256
+
+def make_handler(catalogue):
+    """
+    Classe de handler HTTP servant un catalogue donne
+    """
+    class CatalogueHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # En-tetes et corps envoyes en un seul segment TCP (sinon ACK retarde de 40 ms par reponse)
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            catalogue.count(status, len(body))
+
+        def do_GET(self):
+            if catalogue.latency > 0:
+                time.sleep(catalogue.latency)
+            if catalogue.over_limit():
+                self.send_body(429, b'Too Many Requests', 'text/plain', {'Retry-After': '1'})
+                return
+            if catalogue.should_fail():
+                self.send_body(503, b'Service Unavailable', 'text/plain')
+                return
+            content, content_type = catalogue.render(self.path.split('?')[0])
+            if content is None:
+                self.send_body(404, b'Not Found', 'text/plain')
+                return
+            self.send_body(200, content.encode('utf-8') if isinstance(content, str) else content, content_type)
+
+    return CatalogueHandler
+
+def start_server(catalogue, host='127.0.0.1', port=0):
+    """
+    Demarre le serveur dans un thread; port=0 choisit un port libre.
+    Retourne le serveur (URL de base: server_url(server)).
+    """
+    server = CatalogueServer((host, port), make_handler(catalogue))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/"
+
+def serve_forever(options, ready=None):
+    """
+    Point d'entree d'un processus serveur: publie l'URL sur `ready` puis sert jusqu'a l'arret du processus.
+    Un processus separe garde le CPU et la memoire du serveur hors des mesures du scraper.
+    """
+    server = start_server(LocalCatalogue(**options))
+    if ready is not None:
+        ready.put(server_url(server))
+    threading.Event().wait()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serveur local imitant books.toscrape.com')
+    parser.add_argument('--port', type=int, default=8000, help='Port d\'ecoute (defaut: 8000)')
+    parser.add_argument('--categories', type=int, default=5, help='Nombre de categories (defaut: 5)')
+    parser.add_argument('--pages', type=int, default=3, help='Pages liste par categorie (defaut: 3)')
+    parser.add_argument('--books-per-page', type=int, default=20, help='Livres par page liste (defaut: 20)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latence ajoutee a chaque reponse en secondes (defaut: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Part des requetes repondues en 503 (defaut: 0)')
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help='Requetes par seconde au-dela desquelles le serveur repond 429 + Retry-After (defaut: 0, pas de limite)')
+    args = parser.parse_args()
+
+    catalogue = LocalCatalogue(args.categories, args.pages, args.books_per_page, args.latency, args.error_rate,
+                               rate_limit=args.rate_limit)
+    server = start_server(catalogue, port=args.port)
+    print(f"Catalogue local: {catalogue.total_books} livres sur {server_url(server)} (Ctrl+C pour arreter)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Arret: {catalogue.stats['pages']} reponses, {catalogue.stats['errors']} erreurs, "
+              f"{catalogue.stats['throttled']} refusees (429)")
+
+if __name__ == "__main__":
+    main()
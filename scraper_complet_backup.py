@@ -3,6 +3,7 @@ import requests
 import csv
 import os
 import time
+from urllib.parse import urljoin
 
 def get_book_details(book_url):
     """Recupere les details d'un livre depuis sa page"""
@@ -79,27 +80,8 @@ def get_book_details(book_url):
     return book_data
 
 def fix_book_url(book_link, current_page_url):
-    """Corrige l'URL du livre"""
-    if book_link.startswith('http'):
-        return book_link
-    
-    # Si le lien commence par ../../
-    if book_link.startswith('../../../'):
-        # Enlever les ../
-        clean_link = book_link.replace('../../../', '')
-        return 'https://books.toscrape.com/catalogue/' + clean_link
-    
-    # Si c'est un lien relatif simple
-    if book_link.startswith('../'):
-        clean_link = book_link.replace('../', '')
-        return 'https://books.toscrape.com/catalogue/' + clean_link
-    
-    # Pour les autres cas
-    base_url = 'https://books.toscrape.com/catalogue/'
-    if not book_link.startswith('catalogue/'):
-        return base_url + book_link
-    else:
-        return 'https://books.toscrape.com/' + book_link
+    """Corrige l'URL du livre en la resolvant depuis la page ou se trouve le lien"""
+    return urljoin(current_page_url, book_link)
 
 def scrape_category(category_url, category_name):
     """Scrape tous les livres d'une categorie"""
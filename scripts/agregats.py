@@ -0,0 +1,200 @@
+# agregats.py - Moteur d'agregation des livres: un passage groupe, ou des blocs fusionnables en mode flux
+import numpy as np
+import pandas as pd
+
+TAILLE_TOP = 5
+
+def mediane_depuis_comptes(comptes):
+    """Mediane exacte a partir d'un comptage de valeurs (index = valeur, valeurs = nombre)"""
+    comptes = comptes[comptes > 0].sort_index()
+    if comptes.empty:
+        return np.nan
+    valeurs = comptes.index.to_numpy(dtype='float64')
+    cumul = comptes.to_numpy().cumsum()
+    total = cumul[-1]
+    bas = valeurs[np.searchsorted(cumul, (total - 1) // 2, side='right')]
+    haut = valeurs[np.searchsorted(cumul, total // 2, side='right')]
+    return (bas + haut) / 2
+
+def stats_depuis_comptes(comptes):
+    """count, sum, mean, median, min, max d'une serie decrite par son comptage de valeurs"""
+    comptes = comptes[comptes > 0]
+    valeurs = comptes.index.to_numpy(dtype='float64')
+    total = comptes.sum()
+    somme = (valeurs * comptes.to_numpy()).sum()
+    return pd.Series({
+        'count': total,
+        'sum': somme,
+        'mean': somme / total if total else np.nan,
+        'median': mediane_depuis_comptes(comptes),
+        'min': valeurs.min() if total else np.nan,
+        'max': valeurs.max() if total else np.nan,
+    })
+
+class ResumeLivres:
+    """Resultat de l'agregation, lu par les sections du rapport et les graphiques.
+
+    categories: une ligne par categorie (ordre alphabetique) avec count, prix_mean,
+    prix_median, prix_min, prix_max, note_mean, stock_mean, stock_total, part_stock
+    et note_<n> (nombre de livres par note).
+    repartition: livres par categorie, du plus grand au plus petit.
+    prix, stock: statistiques globales (count, mean, median, min, max).
+    distribution_notes: livres par note. comptes_prix: livres par prix (histogramme).
+    top_prix: les livres les plus chers (titre, prix_numerique, categorie)."""
+
+    def __init__(self, categories, repartition, prix, stock, distribution_notes, comptes_prix, top_prix):
+        self.categories = categories
+        self.repartition = repartition
+        self.prix = prix
+        self.stock = stock
+        self.distribution_notes = distribution_notes
+        self.comptes_prix = comptes_prix
+        self.top_prix = top_prix
+
+    @property
+    def total(self):
+        return int(self.repartition.sum())
+
+def _completer(categories):
+    if 'stock_total' in categories.columns:
+        total_stock = categories['stock_total'].sum()
+        categories['part_stock'] = categories['stock_total'] / total_stock if total_stock else 0.0
+    return categories.sort_index()
+
+def _stats_globales(serie):
+    return pd.Series({'count': serie.size, 'mean': serie.mean(), 'median': serie.median(),
+                      'min': serie.min(), 'max': serie.max()})
+
+def resumer_dataframe(df):
+    """Toutes les statistiques par categorie en un seul passage groupe sur le DataFrame complet"""
+    colonnes = [colonne for colonne in ('prix_numerique', 'note', 'disponibilite_clean') if colonne in df.columns]
+    travail = df[['categorie'] + colonnes]
+    aggregations = {'count': ('categorie', 'size')}
+
+    if 'prix_numerique' in colonnes:
+        for statistique in ('mean', 'median', 'min', 'max'):
+            aggregations['prix_' + statistique] = ('prix_numerique', statistique)
+    if 'note' in colonnes:
+        aggregations['note_mean'] = ('note', 'mean')
+        # Indicatrices de note: la distribution par categorie sort du meme groupby
+        indicatrices = pd.get_dummies(df['note'], prefix='note', prefix_sep='_', dtype='int64')
+        travail = pd.concat([travail, indicatrices], axis=1)
+        for colonne in indicatrices.columns:
+            aggregations[colonne] = (colonne, 'sum')
+    if 'disponibilite_clean' in colonnes:
+        aggregations['stock_mean'] = ('disponibilite_clean', 'mean')
+        aggregations['stock_total'] = ('disponibilite_clean', 'sum')
+
+    categories = travail.groupby('categorie', observed=True).agg(**aggregations)
+    categories.index = categories.index.astype(str)
+    categories = _completer(categories)
+
+    ordre = [str(categorie) for categorie in pd.unique(df['categorie'])]
+    repartition = categories['count'].reindex(ordre).sort_values(ascending=False, kind='stable')
+
+    prix = stock = distribution_notes = comptes_prix = top_prix = None
+    if 'prix_numerique' in colonnes:
+        prix = _stats_globales(df['prix_numerique'])
+        comptes_prix = df['prix_numerique'].value_counts().sort_index()
+        top_prix = df.nlargest(TAILLE_TOP, 'prix_numerique')[['titre', 'prix_numerique', 'categorie']].astype({'categorie': str})
+    if 'disponibilite_clean' in colonnes:
+        stock = _stats_globales(df['disponibilite_clean'])
+    if 'note' in colonnes:
+        distribution_notes = df['note'].value_counts().sort_index()
+
+    return ResumeLivres(categories, repartition, prix, stock, distribution_notes, comptes_prix, top_prix)
+
+class AgregatsLivres:
+    """Comptages (categorie, valeur) des prix, notes et stocks: les moyennes, extremes
+    et medianes exactes s'en deduisent sans garder les lignes en memoire.
+    La memoire depend du nombre de valeurs distinctes, pas du nombre de livres."""
+
+    def __init__(self):
+        self.prix = None
+        self.notes = None
+        self.stock = None
+        self.top_prix = None
+        self.ordre_categories = {}
+
+    def _compter(self, bloc, colonne):
+        comptes = bloc.groupby(['categorie', colonne], observed=True, sort=False).size()
+        # Categories en texte simple, quel que soit le type de la colonne, pour fusionner les blocs
+        return comptes.set_axis(comptes.index.set_levels(comptes.index.levels[0].astype(str), level=0))
+
+    def _cumuler(self, actuel, nouveau):
+        if actuel is None:
+            return nouveau
+        return actuel.add(nouveau, fill_value=0).astype('int64')
+
+    def ajouter(self, bloc):
+        """Ajoute un bloc de livres nettoyes (colonnes categorie, titre, prix_numerique, note, disponibilite_clean)"""
+        if bloc.empty:
+            return self
+
+        for categorie in pd.unique(bloc['categorie']):
+            self.ordre_categories.setdefault(str(categorie), len(self.ordre_categories))
+
+        if 'prix_numerique' in bloc.columns:
+            self.prix = self._cumuler(self.prix, self._compter(bloc, 'prix_numerique'))
+            top = bloc.nlargest(TAILLE_TOP, 'prix_numerique')[['titre', 'prix_numerique', 'categorie']]
+            top = top.astype({'categorie': str})
+            candidats = top if self.top_prix is None else pd.concat([self.top_prix, top], ignore_index=True)
+            self.top_prix = candidats.nlargest(TAILLE_TOP, 'prix_numerique').reset_index(drop=True)
+        if 'note' in bloc.columns:
+            self.notes = self._cumuler(self.notes, self._compter(bloc, 'note'))
+        if 'disponibilite_clean' in bloc.columns:
+            self.stock = self._cumuler(self.stock, self._compter(bloc, 'disponibilite_clean'))
+        return self
+
+    def fusionner(self, autre):
+        """Fusionne les agregats partiels d'un autre lot de fichiers"""
+        for categorie in autre.ordre_categories:
+            self.ordre_categories.setdefault(categorie, len(self.ordre_categories))
+        for attribut in ('prix', 'notes', 'stock'):
+            if getattr(autre, attribut) is not None:
+                setattr(self, attribut, self._cumuler(getattr(self, attribut), getattr(autre, attribut)))
+        if autre.top_prix is not None:
+            candidats = autre.top_prix if self.top_prix is None else pd.concat([self.top_prix, autre.top_prix], ignore_index=True)
+            self.top_prix = candidats.nlargest(TAILLE_TOP, 'prix_numerique').reset_index(drop=True)
+        return self
+
+    def _stats_par_categorie(self, comptes, prefixe):
+        stats = {}
+        for categorie, groupe in comptes.groupby(level=0):
+            stats[categorie] = stats_depuis_comptes(groupe.droplevel(0))
+        return pd.DataFrame(stats).T.add_prefix(prefixe)
+
+    def resume(self):
+        """Resume equivalent a resumer_dataframe, deduit des comptages cumules (None si aucune donnee)"""
+        parties = []
+        prix = stock = distribution_notes = comptes_prix = None
+        if self.prix is not None:
+            stats = self._stats_par_categorie(self.prix, 'prix_')
+            parties.append(stats['prix_count'].rename('count'))
+            parties.append(stats[['prix_mean', 'prix_median', 'prix_min', 'prix_max']])
+            comptes_prix = self.prix.groupby(level=1).sum().sort_index()
+            prix = stats_depuis_comptes(comptes_prix)
+        if self.notes is not None:
+            stats = self._stats_par_categorie(self.notes, 'note_')
+            if not parties:
+                parties.append(stats['note_count'].rename('count'))
+            parties.append(stats[['note_mean']])
+            repartition_notes = self.notes.unstack(fill_value=0).astype('int64')
+            parties.append(repartition_notes.rename(columns=lambda note: 'note_' + str(note)))
+            distribution_notes = self.notes.groupby(level=1).sum().sort_index().astype('int64')
+        if self.stock is not None:
+            stats = self._stats_par_categorie(self.stock, 'stock_')
+            if not parties:
+                parties.append(stats['stock_count'].rename('count'))
+            parties.append(stats[['stock_mean']])
+            parties.append(stats['stock_sum'].rename('stock_total'))
+            stock = stats_depuis_comptes(self.stock.groupby(level=1).sum())
+
+        if not parties:
+            return None
+
+        categories = _completer(pd.concat(parties, axis=1))
+        categories['count'] = categories['count'].astype('int64')
+        ordre = sorted(categories.index, key=self.ordre_categories.get)
+        repartition = categories['count'].reindex(ordre).sort_values(ascending=False, kind='stable')
+        return ResumeLivres(categories, repartition, prix, stock, distribution_notes, comptes_prix, self.top_prix)
@@ -1,38 +1,40 @@
 # analyser_donnees.py - Version simplifiee sans emojis
 import pandas as pd
 import os
-import re
 
-def nettoyer_prix(prix_str):
-    """Nettoie le prix qui contient des caracteres d'encodage"""
-    if pd.isna(prix_str):
-        return 0.0
+try:
+    from nettoyage import nettoyer_livres
+    from ingestion import charger_fichiers
+    import rapport
+except ImportError:
+    from .nettoyage import nettoyer_livres
+    from .ingestion import charger_fichiers
+    from . import rapport
+
+def rapport_categorie(df, nom_categorie):
+    """Tables du rapport d'une categorie, exportables en JSON/CSV"""
+    rapport_cat = {'categorie': nom_categorie, 'total_livres': len(df)}
     
-    # Plusieurs methodes pour nettoyer le prix
-    prix_str = str(prix_str)
+    if 'prix' in df.columns:
+        rapport_cat['prix'] = rapport.statistiques(df['prix_numerique'].agg(['mean', 'median', 'min', 'max']), 2)
+        rapport_cat['top_prix'] = rapport.table_top_prix(df.nlargest(5, 'prix_numerique')[['titre', 'prix_numerique']])
     
-    # Methode 1: Supprimer tous les caracteres non numeriques sauf le point
-    prix_nettoye = re.sub(r'[^\d.]', '', prix_str)
+    if 'note' in df.columns:
+        rapport_cat['notes'] = rapport.table_notes(df['note'].value_counts().sort_index())
+        rapport_cat['note_moyenne'] = float(round(df['note'].mean(), 1))
     
-    # Methode 2: Si ca ne marche pas, chercher le pattern numerique
-    if not prix_nettoye:
-        match = re.search(r'(\d+\.\d+)', prix_str)
-        if match:
-            prix_nettoye = match.group(1)
-        else:
-            return 0.0
+    if 'disponibilite' in df.columns:
+        rapport_cat['disponibilite'] = rapport.table_disponibilite(df['disponibilite'])
     
-    try:
-        return float(prix_nettoye)
-    except:
-        return 0.0
+    return rapport_cat
 
-def analyser_categorie(fichier_csv):
-    """Analyse les donnees d'une categorie"""
+def analyser_categorie(fichier_csv, df=None):
+    """Analyse les donnees d'une categorie (df: donnees deja chargees et nettoyees)"""
     
     try:
-        # Lire le fichier CSV avec encodage UTF-8
-        df = pd.read_csv(fichier_csv, encoding='utf-8')
+        if df is None:
+            # Lire le fichier CSV avec encodage UTF-8
+            df = nettoyer_livres(pd.read_csv(fichier_csv, encoding='utf-8'))
         
         nom_categorie = os.path.basename(fichier_csv).replace('category_', '').replace('.csv', '')
         
@@ -47,50 +49,38 @@ def analyser_categorie(fichier_csv):
         print("\nAPERÇU DES DONNEES :")
         print(df[['titre', 'prix', 'note']].head(3))
         
+        rapport_cat = rapport_categorie(df, nom_categorie)
+        
         # Nettoyer les prix
         if 'prix' in df.columns:
             print("\nEXEMPLE DE PRIX AVANT NETTOYAGE :")
             print("   " + str(df['prix'].iloc[0]))
             
-            # Appliquer le nettoyage
-            df['prix_numerique'] = df['prix'].apply(nettoyer_prix)
-            
             # Statistiques sur les prix
+            prix = rapport_cat['prix']
             print("\nSTATISTIQUES DES PRIX :")
-            print("   Prix moyen : £" + str(round(df['prix_numerique'].mean(), 2)))
-            print("   Prix minimum : £" + str(round(df['prix_numerique'].min(), 2)))
-            print("   Prix maximum : £" + str(round(df['prix_numerique'].max(), 2)))
-            print("   Prix median : £" + str(round(df['prix_numerique'].median(), 2)))
+            print("   Prix moyen : £" + str(prix['mean']))
+            print("   Prix minimum : £" + str(prix['min']))
+            print("   Prix maximum : £" + str(prix['max']))
+            print("   Prix median : £" + str(prix['median']))
             
             # Top 5 des livres les plus chers
             print("\nTOP 5 DES LIVRES LES PLUS CHERS :")
-            livres_chers = df.nlargest(5, 'prix_numerique')[['titre', 'prix_numerique']]
-            for i, (index, ligne) in enumerate(livres_chers.iterrows(), 1):
-                titre_court = ligne['titre'][:30] + "..." if len(ligne['titre']) > 30 else ligne['titre']
-                print("   " + str(i) + ". £" + str(round(ligne['prix_numerique'], 2)) + " - " + titre_court)
+            rapport.afficher(rapport.lignes_top_prix(rapport_cat['top_prix'], longueur=30))
         
         # Analyse des notes
         if 'note' in df.columns:
             print("\nDISTRIBUTION DES NOTES :")
-            if df['note'].dtype == 'object':
-                # Si les notes sont encore des strings, les convertir
-                df['note'] = pd.to_numeric(df['note'], errors='coerce').fillna(0)
-            
-            comptage_notes = df['note'].value_counts().sort_index()
-            for note, compte in comptage_notes.items():
-                etoiles = '*' * int(note) + '.' * (5 - int(note))
-                print("   " + etoiles + " (" + str(int(note)) + "/5) : " + str(compte) + " livre(s)")
+            rapport.afficher(rapport.lignes_notes(rapport_cat['notes'], unite=" livre(s)", pourcentage=False))
             
-            print("   Note moyenne : " + str(round(df['note'].mean(), 1)) + "/5")
+            print("   Note moyenne : " + str(rapport_cat['note_moyenne']) + "/5")
         
         # Analyse de la disponibilite
         if 'disponibilite' in df.columns:
             print("\nDISPONIBILITE :")
-            disponibilite_counts = df['disponibilite'].value_counts()
-            for dispo, compte in disponibilite_counts.items():
-                # Nettoyer le texte de disponibilite
-                dispo_nettoye = dispo.replace('\n', ' ').strip()
-                print("   " + dispo_nettoye + " : " + str(compte) + " livre(s)")
+            rapport.afficher(rapport.lignes_disponibilite(rapport_cat['disponibilite']))
+        
+        rapport.exporter_rapport(rapport_cat, nom=nom_categorie, dossier=os.path.join(rapport.DOSSIER_RAPPORT, "categories"))
         
         return df
         
@@ -113,10 +103,14 @@ def analyser_toutes_categories():
             print("=" * 60)
             print("Fichiers trouves : " + str(fichiers))
             
-            for fichier in fichiers:
-                chemin_complet = os.path.join(dossier_csv, fichier)
+            # Chargement parallele (et cache) de tous les fichiers, puis analyses dans l'ordre
+            chemins = [os.path.join(dossier_csv, fichier) for fichier in fichiers]
+            for chemin_complet, df in charger_fichiers(chemins).items():
                 print("\n" + "="*40)
-                analyser_categorie(chemin_complet)
+                if df is None:
+                    print("ERREUR avec " + chemin_complet)
+                    continue
+                analyser_categorie(chemin_complet, df)
                 
         else:
             print("Aucun fichier CSV trouve dans outputs/csv/")
@@ -2,19 +2,48 @@
 import pandas as pd
 import os
 import matplotlib.pyplot as plt
-from collections import Counter
-import re
+import argparse
+
+try:
+    from nettoyage import nettoyer_livres
+    from agregats import AgregatsLivres, resumer_dataframe
+    from ingestion import charger_fichiers
+    import rapport
+except ImportError:
+    from .nettoyage import nettoyer_livres
+    from .agregats import AgregatsLivres, resumer_dataframe
+    from .ingestion import charger_fichiers
+    from . import rapport
+
+TAILLE_BLOC = 100000
+
+# Mode flux: seules les colonnes utiles aux agregats, texte repetitif en categories
+COLONNES_FLUX = ['titre', 'prix', 'disponibilite', 'note']
+TYPES_FLUX = {'titre': 'string', 'prix': 'category', 'disponibilite': 'category', 'note': 'category'}
 
 class AnalyseurLivres:
-    def __init__(self):
+    def __init__(self, mode_flux=False, taille_bloc=TAILLE_BLOC, processus=None, parquet=False):
         self.dossier_csv = "outputs/csv"
+        self.dossier_parquet = "outputs/parquet"
+        self.parquet = parquet
+        self.mode_flux = mode_flux
+        self.taille_bloc = taille_bloc
+        self.processus = processus
         self.df_complet = None
+        self.agregats = None
+        self.resume = None
+        # Tables du rapport, remplies par chaque section et exportees en JSON/CSV
+        self.rapport = {}
         self.charger_donnees()
     
     def charger_donnees(self):
-        """Charge tous les fichiers CSV en un seul DataFrame"""
+        """Charge tous les fichiers CSV en un seul DataFrame (ou en agregats par blocs en mode flux, ou le dataset Parquet si demande)"""
         print("CHARGEMENT DES DONNEES...")
         
+        if self.parquet:
+            self.charger_parquet()
+            return
+        
         if not os.path.exists(self.dossier_csv):
             print("Dossier outputs/csv/ non trouve")
             return
@@ -25,25 +54,78 @@ class AnalyseurLivres:
             print("Aucun fichier CSV trouve")
             return
         
+        if self.mode_flux:
+            self.charger_par_blocs(fichiers)
+            return
+        
         dataframes = []
         
+        # Lecture et nettoyage de chaque fichier dans un pool de processus, avec cache par fichier
+        chemins = [os.path.join(self.dossier_csv, fichier) for fichier in fichiers]
+        for fichier, df in zip(fichiers, charger_fichiers(chemins, self.processus).values()):
+            if df is None:
+                continue
+            nom_categorie = fichier.replace('category_', '').replace('.csv', '')
+            df['categorie'] = nom_categorie
+            dataframes.append(df)
+            print(nom_categorie + ": " + str(len(df)) + " livres")
+        
+        if dataframes:
+            self.df_complet = pd.concat(dataframes, ignore_index=True)
+            self.df_complet['categorie'] = self.df_complet['categorie'].astype('category')
+            print("Donnees nettoyees et pretes pour l'analyse")
+            self.resume = resumer_dataframe(self.df_complet)
+            print("\nDATASET COMPLET: " + str(len(self.df_complet)) + " livres")
+            print("Categories: " + str(self.df_complet['categorie'].nunique()))
+        else:
+            print("Aucune donnee chargee")
+    
+    def charger_parquet(self):
+        """Charge le dataset Parquet du scraper (--format parquet): colonnes deja typees, pas de nettoyage"""
+        colonnes = {
+            'title': 'titre',
+            'price': 'prix_numerique',
+            'rating': 'note',
+            'stock': 'disponibilite_clean',
+            'category': 'categorie',
+        }
+        try:
+            self.df_complet = pd.read_parquet(self.dossier_parquet, columns=list(colonnes)).rename(columns=colonnes)
+        except Exception as e:
+            print("Erreur avec " + self.dossier_parquet + ": " + str(e))
+            return
+        
+        self.df_complet['categorie'] = self.df_complet['categorie'].astype(str)
+        self.resume = resumer_dataframe(self.df_complet)
+        for categorie, count in self.df_complet['categorie'].value_counts(sort=False).items():
+            print(categorie + ": " + str(count) + " livres")
+        print("\nDATASET COMPLET: " + str(len(self.df_complet)) + " livres")
+        print("Categories: " + str(self.df_complet['categorie'].nunique()))
+    
+    def charger_par_blocs(self, fichiers):
+        """Lit les CSV par blocs et cumule les agregats: la memoire depend de la taille des blocs, pas du dataset"""
+        self.agregats = AgregatsLivres()
+        
         for fichier in fichiers:
             chemin = os.path.join(self.dossier_csv, fichier)
             nom_categorie = fichier.replace('category_', '').replace('.csv', '')
+            nombre = 0
             
             try:
-                df = pd.read_csv(chemin, encoding='utf-8')
-                df['categorie'] = nom_categorie
-                dataframes.append(df)
-                print(nom_categorie + ": " + str(len(df)) + " livres")
+                lecteur = pd.read_csv(chemin, encoding='utf-8', usecols=lambda colonne: colonne in COLONNES_FLUX,
+                                      dtype=TYPES_FLUX, chunksize=self.taille_bloc)
+                for bloc in lecteur:
+                    bloc['categorie'] = pd.Categorical([nom_categorie] * len(bloc))
+                    self.agregats.ajouter(nettoyer_livres(bloc))
+                    nombre += len(bloc)
+                print(nom_categorie + ": " + str(nombre) + " livres")
             except Exception as e:
                 print("Erreur avec " + fichier + ": " + str(e))
         
-        if dataframes:
-            self.df_complet = pd.concat(dataframes, ignore_index=True)
-            self.nettoyer_donnees()
-            print("\nDATASET COMPLET: " + str(len(self.df_complet)) + " livres")
-            print("Categories: " + str(self.df_complet['categorie'].nunique()))
+        self.resume = self.agregats.resume()
+        if self.resume is not None:
+            print("\nDATASET COMPLET (mode flux): " + str(self.resume.total) + " livres")
+            print("Categories: " + str(len(self.resume.repartition)))
         else:
             print("Aucune donnee chargee")
     
@@ -51,28 +133,14 @@ class AnalyseurLivres:
         """Nettoie et prepare les donnees pour l'analyse"""
         print("\nNETTOYAGE DES DONNEES...")
         
-        # Nettoyer les prix
-        if 'prix' in self.df_complet.columns:
-            self.df_complet['prix_numerique'] = self.df_complet['prix'].apply(
-                lambda x: float(re.sub(r'[^\d.]', '', str(x))) if pd.notna(x) else 0.0
-            )
-        
-        # Nettoyer les notes
-        if 'note' in self.df_complet.columns:
-            self.df_complet['note'] = pd.to_numeric(self.df_complet['note'], errors='coerce').fillna(0)
-        
-        # Nettoyer la disponibilite
-        if 'disponibilite' in self.df_complet.columns:
-            self.df_complet['disponibilite_clean'] = self.df_complet['disponibilite'].str.extract(r'(\d+)')[0]
-            self.df_complet['disponibilite_clean'] = pd.to_numeric(
-                self.df_complet['disponibilite_clean'], errors='coerce'
-            ).fillna(0)
+        # Prix, notes, disponibilite et encodage en operations vectorisees
+        nettoyer_livres(self.df_complet)
         
         print("Donnees nettoyees et pretes pour l'analyse")
     
     def statistiques_generales(self):
         """Affiche les statistiques generales du dataset"""
-        if self.df_complet is None:
+        if self.resume is None:
             print("Aucune donnee a analyser")
             return
         
@@ -81,19 +149,18 @@ class AnalyseurLivres:
         print("="*60)
         
         # Informations de base
-        print("Nombre total de livres: " + str(len(self.df_complet)))
-        print("Nombre de categories: " + str(self.df_complet['categorie'].nunique()))
+        self.rapport['total_livres'] = self.resume.total
+        self.rapport['repartition'] = rapport.table_repartition(self.resume)
+        print("Nombre total de livres: " + str(self.resume.total))
+        print("Nombre de categories: " + str(len(self.rapport['repartition'])))
         
         # Statistiques par categorie
         print("\nREPARTITION PAR CATEGORIE:")
-        stats_categories = self.df_complet['categorie'].value_counts()
-        for categorie, count in stats_categories.items():
-            pourcentage = (count / len(self.df_complet)) * 100
-            print("   " + categorie.ljust(20) + " : " + str(count).rjust(3) + " livres (" + str(round(pourcentage, 1)) + "%)")
+        rapport.afficher(rapport.lignes_repartition(self.rapport['repartition']))
     
     def analyse_prix(self):
         """Analyse detaillee des prix"""
-        if self.df_complet is None or 'prix_numerique' not in self.df_complet.columns:
+        if self.resume is None or self.resume.prix is None:
             print("Donnees de prix non disponibles")
             return
         
@@ -102,34 +169,26 @@ class AnalyseurLivres:
         print("="*60)
         
         # Statistiques globales
-        prix = self.df_complet['prix_numerique']
+        prix = self.rapport['prix'] = rapport.statistiques(self.resume.prix, 2)
         print("Prix global:")
-        print("   Moyenne: £" + str(round(prix.mean(), 2)))
-        print("   Mediane: £" + str(round(prix.median(), 2)))
-        print("   Minimum: £" + str(round(prix.min(), 2)))
-        print("   Maximum: £" + str(round(prix.max(), 2)))
+        print("   Moyenne: £" + str(prix['mean']))
+        print("   Mediane: £" + str(prix['median']))
+        print("   Minimum: £" + str(prix['min']))
+        print("   Maximum: £" + str(prix['max']))
         
         # Prix par categorie
         print("\nPRIX MOYEN PAR CATEGORIE:")
-        prix_par_categorie = self.df_complet.groupby('categorie')['prix_numerique'].agg([
-            'count', 'mean', 'median'
-        ]).round(2)
-        
-        prix_par_categorie_sorted = prix_par_categorie.sort_values('mean', ascending=False)
-        
-        for categorie, row in prix_par_categorie_sorted.iterrows():
-            print("   " + categorie.ljust(20) + " : £" + str(row['mean']).rjust(6) + " (mediane: £" + str(row['median']) + ") - " + str(int(row['count'])) + " livres")
+        self.rapport['prix_categories'] = rapport.table_prix_categories(self.resume)
+        rapport.afficher(rapport.lignes_prix_categories(self.rapport['prix_categories']))
         
         # Top 5 livres les plus chers
         print("\nTOP 5 LIVRES LES PLUS CHERS:")
-        livres_chers = self.df_complet.nlargest(5, 'prix_numerique')[['titre', 'prix_numerique', 'categorie']]
-        for i, (_, livre) in enumerate(livres_chers.iterrows(), 1):
-            titre_court = livre['titre'][:35] + "..." if len(livre['titre']) > 35 else livre['titre']
-            print("   " + str(i) + ". £" + str(round(livre['prix_numerique'], 2)) + " - " + titre_court + " [" + livre['categorie'] + "]")
+        self.rapport['top_prix'] = rapport.table_top_prix(self.resume.top_prix)
+        rapport.afficher(rapport.lignes_top_prix(self.rapport['top_prix']))
     
     def analyse_notes(self):
         """Analyse detaillee des notes"""
-        if self.df_complet is None or 'note' not in self.df_complet.columns:
+        if self.resume is None or self.resume.distribution_notes is None:
             print("Donnees de notes non disponibles")
             return
         
@@ -139,27 +198,17 @@ class AnalyseurLivres:
         
         # Distribution des notes
         print("DISTRIBUTION DES NOTES:")
-        distribution_notes = self.df_complet['note'].value_counts().sort_index()
-        
-        for note, count in distribution_notes.items():
-            etoiles = '*' * int(note) + '.' * (5 - int(note))
-            pourcentage = (count / len(self.df_complet)) * 100
-            print("   " + etoiles + " (" + str(note) + "/5) : " + str(count).rjust(3) + " livres (" + str(round(pourcentage, 1)) + "%)")
+        self.rapport['notes'] = rapport.table_notes(self.resume.distribution_notes)
+        rapport.afficher(rapport.lignes_notes(self.rapport['notes']))
         
         # Note moyenne par categorie
         print("\nNOTE MOYENNE PAR CATEGORIE:")
-        notes_par_categorie = self.df_complet.groupby('categorie')['note'].agg([
-            'count', 'mean'
-        ]).round(2)
-        
-        notes_par_categorie_sorted = notes_par_categorie.sort_values('mean', ascending=False)
-        
-        for categorie, row in notes_par_categorie_sorted.iterrows():
-            print("   " + categorie.ljust(20) + " : " + str(row['mean']) + "/5 - " + str(int(row['count'])) + " livres")
+        self.rapport['notes_categories'] = rapport.table_notes_categories(self.resume)
+        rapport.afficher(rapport.lignes_notes_categories(self.rapport['notes_categories']))
     
     def analyse_disponibilite(self):
         """Analyse de la disponibilite des livres"""
-        if self.df_complet is None or 'disponibilite_clean' not in self.df_complet.columns:
+        if self.resume is None or self.resume.stock is None:
             print("Donnees de disponibilite non disponibles")
             return
         
@@ -168,15 +217,14 @@ class AnalyseurLivres:
         print("="*60)
         
         # Statistiques de disponibilite
-        dispo = self.df_complet['disponibilite_clean']
-        print("Stock moyen par livre: " + str(round(dispo.mean(), 1)) + " unites")
-        print("Stock median: " + str(round(dispo.median(), 1)) + " unites")
+        dispo = self.rapport['stock'] = rapport.statistiques(self.resume.stock, 1)
+        print("Stock moyen par livre: " + str(dispo['mean']) + " unites")
+        print("Stock median: " + str(dispo['median']) + " unites")
         
         # Categories avec le plus de stock
         print("\nCATEGORIES AVEC LE PLUS DE STOCK:")
-        stock_par_categorie = self.df_complet.groupby('categorie')['disponibilite_clean'].mean().nlargest(5)
-        for categorie, stock in stock_par_categorie.items():
-            print("   " + categorie.ljust(20) + " : " + str(round(stock, 1)) + " unites en moyenne")
+        self.rapport['stock_categories'] = rapport.table_stock_categories(self.resume)
+        rapport.afficher(rapport.lignes_stock_categories(self.rapport['stock_categories']))
     
     def analyse_titres(self):
         """Analyse des mots les plus frequents dans les titres"""
@@ -188,15 +236,10 @@ class AnalyseurLivres:
         print("="*60)
         
         # Mots les plus frequents
-        tous_les_titres = ' '.join(self.df_complet['titre'].astype(str)).lower()
-        mots = re.findall(r'\b[a-z]{4,}\b', tous_les_titres)
-        
-        compteur_mots = Counter(mots)
-        mots_frequents = compteur_mots.most_common(10)
+        self.rapport['mots_frequents'] = rapport.table_mots_frequents(self.df_complet['titre'])
         
         print("MOTS LES PLUS FREQUENTS DANS LES TITRES:")
-        for mot, count in mots_frequents:
-            print("   " + mot.ljust(15) + " : " + str(count).rjust(3) + " occurrences")
+        rapport.afficher(rapport.lignes_mots_frequents(self.rapport['mots_frequents']))
     
     def top_livres(self):
         """Affiche les meilleurs livres selon differents criteres"""
@@ -209,21 +252,15 @@ class AnalyseurLivres:
         
         # Meilleur rapport qualite-prix (note/prix)
         if all(col in self.df_complet.columns for col in ['note', 'prix_numerique']):
-            self.df_complet['rapport_qualite_prix'] = self.df_complet['note'] / self.df_complet['prix_numerique']
-            
             print("\nMEILLEUR RAPPORT QUALITE-PRIX:")
-            top_rapport = self.df_complet.nlargest(5, 'rapport_qualite_prix')[['titre', 'note', 'prix_numerique']]
-            for i, (_, livre) in enumerate(top_rapport.iterrows(), 1):
-                print("   " + str(i) + ". " + livre['titre'][:35] + "...")
-                print("      Note: " + str(livre['note']) + "/5 - Prix: £" + str(round(livre['prix_numerique'], 2)))
+            self.rapport['qualite_prix'] = rapport.table_rapport_qualite_prix(self.df_complet)
+            rapport.afficher(rapport.lignes_rapport_qualite_prix(self.rapport['qualite_prix']))
         
         # Livres les mieux notes
         if 'note' in self.df_complet.columns:
             print("\nLIVRES LES MIEUX NOTES (5 etoiles):")
-            livres_5_etoiles = self.df_complet[self.df_complet['note'] == 5][['titre', 'categorie', 'prix_numerique']]
-            for i, (_, livre) in enumerate(livres_5_etoiles.head(5).iterrows(), 1):
-                print("   " + str(i) + ". " + livre['titre'][:35] + "...")
-                print("      Categorie: " + livre['categorie'] + " - Prix: £" + str(round(livre['prix_numerique'], 2)))
+            self.rapport['mieux_notes'] = rapport.table_mieux_notes(self.df_complet)
+            rapport.afficher(rapport.lignes_mieux_notes(self.rapport['mieux_notes']))
     
     def creer_visualisations_simple(self):
         """Cree des visualisations basiques sans seaborn"""
@@ -239,7 +276,9 @@ class AnalyseurLivres:
             
             # 1. Distribution des prix
             plt.figure(figsize=(10, 6))
-            plt.hist(self.df_complet['prix_numerique'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+            # Histogramme pondere par le comptage des prix: meme graphique sans relire les lignes
+            comptes_prix = self.resume.comptes_prix
+            plt.hist(comptes_prix.index, bins=20, weights=comptes_prix.values, alpha=0.7, color='skyblue', edgecolor='black')
             plt.title('Distribution des Prix des Livres')
             plt.xlabel('Prix (£)')
             plt.ylabel('Nombre de Livres')
@@ -251,7 +290,7 @@ class AnalyseurLivres:
             
             # 2. Notes par categorie (top 10 seulement)
             plt.figure(figsize=(12, 6))
-            notes_par_cat = self.df_complet.groupby('categorie')['note'].mean().nlargest(10)
+            notes_par_cat = self.resume.categories['note_mean'].nlargest(10)
             notes_par_cat.plot(kind='bar', color='lightcoral')
             plt.title('Top 10 - Note Moyenne par Categorie')
             plt.xlabel('Categorie')
@@ -264,7 +303,7 @@ class AnalyseurLivres:
             
             # 3. Prix par categorie (top 10 seulement)
             plt.figure(figsize=(12, 6))
-            prix_par_cat = self.df_complet.groupby('categorie')['prix_numerique'].mean().nlargest(10)
+            prix_par_cat = self.resume.categories['prix_mean'].nlargest(10)
             prix_par_cat.plot(kind='bar', color='lightgreen')
             plt.title('Top 10 - Prix Moyen par Categorie')
             plt.xlabel('Categorie')
@@ -284,23 +323,43 @@ class AnalyseurLivres:
         print("DEMARRAGE DE L'ANALYSE COMPLETE")
         print("="*70)
         
-        if self.df_complet is None:
+        if self.resume is None:
             print("Aucune donnee a analyser")
             return
         
+        # Toutes les sections et les graphiques lisent le meme resume, calcule une seule fois au chargement
         self.statistiques_generales()
         self.analyse_prix()
         self.analyse_notes()
         self.analyse_disponibilite()
-        self.analyse_titres()
-        self.top_livres()
+        if self.df_complet is None:
+            print("\nMode flux: analyse des titres et top des livres necessitent le dataset complet")
+        else:
+            self.analyse_titres()
+            self.top_livres()
         self.creer_visualisations_simple()
         
+        chemin_rapport = rapport.exporter_rapport(self.rapport)
+        
         print("\n" + "="*70)
         print("ANALYSE TERMINEE AVEC SUCCES!")
         print("Les graphiques sont dans: outputs/graphiques/")
+        print("Le rapport (JSON et CSV) est dans: " + chemin_rapport)
 
 # Execution principale
 if __name__ == "__main__":
-    analyseur = AnalyseurLivres()
+    parser = argparse.ArgumentParser(description="Analyse complete des livres scrapes")
+    parser.add_argument('--flux', action='store_true',
+                        help="Lecture par blocs et agregats incrementaux, pour les historiques trop gros pour la memoire")
+    parser.add_argument('--processus', type=int, default=None,
+                        help="Nombre de processus pour lire les CSV (defaut: un par coeur)")
+    parser.add_argument('--taille-bloc', type=int, default=TAILLE_BLOC,
+                        help="Nombre de lignes par bloc en mode flux (defaut: " + str(TAILLE_BLOC) + ")")
+    parser.add_argument('--parquet', action='store_true',
+                        help="Analyse le dataset Parquet du scraper (outputs/parquet) au lieu des CSV de outputs/csv")
+    args = parser.parse_args()
+    if args.parquet and args.flux:
+        parser.error("--parquet et --flux sont incompatibles")
+    
+    analyseur = AnalyseurLivres(mode_flux=args.flux, taille_bloc=args.taille_bloc, processus=args.processus, parquet=args.parquet)
     analyseur.rapport_complet()
\ No newline at end of file
@@ -0,0 +1,68 @@
+# ingestion.py - Chargement parallele des CSV avec cache des DataFrames nettoyes
+import os
+import glob
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from nettoyage import nettoyer_livres
+except ImportError:
+    from .nettoyage import nettoyer_livres
+
+# Le cache est range a cote des CSV, une entree par fichier et par version (mtime + taille)
+DOSSIER_CACHE = ".cache_analyse"
+
+def chemin_cache(chemin_csv):
+    """Chemin du cache d'un CSV pour sa version actuelle sur disque"""
+    infos = os.stat(chemin_csv)
+    dossier = os.path.join(os.path.dirname(chemin_csv), DOSSIER_CACHE)
+    nom = os.path.basename(chemin_csv) + "." + str(infos.st_mtime_ns) + "." + str(infos.st_size) + ".pkl"
+    return os.path.join(dossier, nom)
+
+def lire_cache(chemin_csv):
+    """DataFrame nettoye en cache pour la version actuelle du CSV, ou None"""
+    try:
+        return pd.read_pickle(chemin_cache(chemin_csv))
+    except (OSError, ValueError, EOFError):
+        return None
+
+def charger_fichier(chemin_csv):
+    """Lit et nettoie un CSV puis ecrit son cache. Fonction de module: executee dans les processus du pool."""
+    df = nettoyer_livres(pd.read_csv(chemin_csv, encoding='utf-8'))
+
+    cache = chemin_cache(chemin_csv)
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    # Les versions precedentes du meme fichier ne serviront plus
+    prefixe = os.path.join(os.path.dirname(cache), glob.escape(os.path.basename(chemin_csv)))
+    for ancien in glob.glob(prefixe + ".*.pkl"):
+        os.remove(ancien)
+    df.to_pickle(cache + ".tmp")
+    os.replace(cache + ".tmp", cache)
+    return df
+
+def _charger_ou_signaler(chemin, charger):
+    try:
+        return charger()
+    except Exception as e:
+        print("Erreur avec " + os.path.basename(chemin) + ": " + str(e))
+        return None
+
+def charger_fichiers(chemins, processus=None):
+    """Charge des CSV nettoyes: depuis le cache s'ils n'ont pas change, sinon dans un pool de processus.
+    Retourne un dictionnaire chemin -> DataFrame (None si le fichier est illisible) dans l'ordre des chemins."""
+    resultats = {chemin: lire_cache(chemin) for chemin in chemins}
+    a_lire = [chemin for chemin, df in resultats.items() if df is None]
+    print("Fichiers en cache: " + str(len(chemins) - len(a_lire)) + ", a lire: " + str(len(a_lire)))
+
+    processus = min(processus or os.cpu_count() or 1, len(a_lire))
+    if processus <= 1:
+        # Un seul fichier ou un seul coeur: pas de pool, son cout depasserait le gain
+        for chemin in a_lire:
+            resultats[chemin] = _charger_ou_signaler(chemin, lambda: charger_fichier(chemin))
+    else:
+        with ProcessPoolExecutor(max_workers=processus) as executor:
+            futures = {chemin: executor.submit(charger_fichier, chemin) for chemin in a_lire}
+            for chemin, future in futures.items():
+                resultats[chemin] = _charger_ou_signaler(chemin, future.result)
+
+    return resultats
@@ -0,0 +1,83 @@
+# nettoyage.py - Nettoyage vectorise des donnees de livres, partage par les scripts d'analyse
+import numpy as np
+import pandas as pd
+
+# Caractere UTF-8 lu en latin-1: 'Â£' au lieu de '£', 'â\x80\x99' au lieu de '’'
+MOJIBAKE = '[ÂÃâ][\x80-\xbf]'
+NOTES_EN_LETTRES = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
+
+def par_valeurs_distinctes(serie, nettoyage, defaut):
+    """Applique un nettoyage vectorise aux seules valeurs distinctes puis le redistribue.
+    Les exports historiques repetent les memes prix et disponibilites sur des millions de lignes."""
+    codes, uniques = pd.factorize(serie)
+    propres = nettoyage(pd.Series(uniques)).to_numpy()
+    # Le code -1 des valeurs manquantes pointe sur la valeur par defaut ajoutee en fin
+    valeurs = np.append(propres, np.array([defaut], dtype=propres.dtype))[codes]
+    return pd.Series(valeurs, index=serie.index, name=serie.name)
+
+def _reparer(uniques):
+    uniques = uniques.astype('string')
+    masque = uniques.str.contains(MOJIBAKE, regex=True, na=False)
+    if masque.any():
+        uniques[masque] = uniques[masque].str.encode('latin-1', errors='replace').str.decode('utf-8', errors='replace')
+    return uniques.astype(object)
+
+def reparer_encodage(serie):
+    """Repare le texte UTF-8 decode en latin-1 ('Â£' -> '£')"""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie
+    return par_valeurs_distinctes(serie, _reparer, None).astype('string')
+
+def _extraire_nombre(uniques, motif):
+    nombres = uniques.astype('string').str.extract(motif, expand=False)
+    return pd.to_numeric(nombres, errors='coerce').astype('float64')
+
+def nettoyer_prix(serie):
+    """Prix numeriques a partir de textes comme 'Â£45.17' ou '£45.17' (0.0 si illisible)"""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('float64').fillna(0.0)
+
+    prix = par_valeurs_distinctes(serie, lambda uniques: _extraire_nombre(uniques, r'(\d+(?:\.\d+)?)'), np.nan)
+    return prix.fillna(0.0)
+
+def nettoyer_stock(serie):
+    """Nombre d'exemplaires a partir de 'In stock (N available)' (0 si absent)"""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.fillna(0).astype('int64')
+
+    stock = par_valeurs_distinctes(serie, lambda uniques: _extraire_nombre(uniques, r'(\d+)'), np.nan)
+    return stock.fillna(0).astype('int64')
+
+def _note(uniques):
+    notes = pd.to_numeric(uniques, errors='coerce').astype('float64')
+    lettres = uniques.astype('string').str.extract('(' + '|'.join(NOTES_EN_LETTRES) + ')', expand=False)
+    return notes.fillna(lettres.map(NOTES_EN_LETTRES).astype('float64'))
+
+def nettoyer_note(serie):
+    """Notes de 0 a 5, en chiffres ou en lettres ('Three', 'star-rating Three')"""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.fillna(0).astype('int64')
+
+    return par_valeurs_distinctes(serie, _note, np.nan).fillna(0).astype('int64')
+
+def nettoyer_livres(df):
+    """Nettoie un DataFrame de livres (colonnes francaises ou anglaises du scraper) en place"""
+    for colonne in ('titre', 'title', 'categorie', 'category'):
+        if colonne in df.columns:
+            df[colonne] = reparer_encodage(df[colonne])
+
+    if 'prix' in df.columns:
+        df['prix_numerique'] = nettoyer_prix(df['prix'])
+    if 'price' in df.columns:
+        df['price'] = nettoyer_prix(df['price'])
+
+    for colonne in ('note', 'rating'):
+        if colonne in df.columns:
+            df[colonne] = nettoyer_note(df[colonne])
+
+    if 'disponibilite' in df.columns:
+        df['disponibilite_clean'] = nettoyer_stock(df['disponibilite'])
+    if 'availability' in df.columns:
+        df['stock'] = nettoyer_stock(df['availability'])
+
+    return df
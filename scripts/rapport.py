@@ -0,0 +1,192 @@
+# rapport.py - Rapport d'analyse en tables (JSON/CSV) construites par operations vectorisees, vue console rendue depuis ces tables
+import os
+import json
+from datetime import datetime
+import pandas as pd
+
+DOSSIER_RAPPORT = "outputs/rapport"
+TAILLE_TOP = 5
+
+# ---------------------------------------------------------------------------
+# Construction des tables
+# ---------------------------------------------------------------------------
+
+def table_repartition(resume):
+    """Livres par categorie, du plus grand au plus petit, avec leur part du total"""
+    repartition = resume.repartition
+    return pd.DataFrame({
+        'categorie': repartition.index,
+        'livres': repartition.to_numpy(),
+        'pourcentage': repartition.to_numpy() / resume.total * 100,
+    })
+
+def table_prix_categories(resume):
+    """Prix moyen et median par categorie, arrondis au centime, du plus cher au moins cher"""
+    prix = resume.categories[['prix_mean', 'prix_median', 'count']].round(2)
+    prix = prix.sort_values('prix_mean', ascending=False)
+    return pd.DataFrame({
+        'categorie': prix.index,
+        'prix_moyen': prix['prix_mean'].to_numpy(),
+        'prix_median': prix['prix_median'].to_numpy(),
+        'livres': prix['count'].to_numpy('int64'),
+    })
+
+def table_top_prix(top_prix):
+    """Les livres les plus chers (colonnes titre, prix_numerique et eventuellement categorie)"""
+    table = pd.DataFrame({'rang': range(1, len(top_prix) + 1), 'titre': top_prix['titre'].to_numpy(),
+                          'prix': top_prix['prix_numerique'].round(2).to_numpy()})
+    if 'categorie' in top_prix.columns:
+        table['categorie'] = top_prix['categorie'].astype(str).to_numpy()
+    return table
+
+def table_notes(distribution_notes):
+    """Nombre de livres par note et part du total"""
+    return pd.DataFrame({
+        'note': distribution_notes.index.astype('int64'),
+        'livres': distribution_notes.to_numpy(),
+        'pourcentage': distribution_notes.to_numpy() / distribution_notes.sum() * 100,
+    })
+
+def table_notes_categories(resume):
+    """Note moyenne par categorie, de la mieux notee a la moins bien notee"""
+    notes = resume.categories[['note_mean', 'count']].round(2).sort_values('note_mean', ascending=False)
+    return pd.DataFrame({
+        'categorie': notes.index,
+        'note_moyenne': notes['note_mean'].to_numpy(),
+        'livres': notes['count'].to_numpy('int64'),
+    })
+
+def table_stock_categories(resume):
+    """Categories avec le plus de stock moyen par livre"""
+    stock = resume.categories['stock_mean'].nlargest(TAILLE_TOP)
+    return pd.DataFrame({'categorie': stock.index, 'stock_moyen': stock.to_numpy()})
+
+def table_mots_frequents(titres, nombre=10):
+    """Mots de quatre lettres ou plus les plus frequents dans les titres (ex aequo dans l'ordre d'apparition)"""
+    # Les titres se repetent d'un export a l'autre: decoupage en mots une seule fois par titre distinct
+    titres = titres.astype('string').value_counts(sort=False)
+    mots = pd.DataFrame({'mot': pd.Series(titres.index).str.lower().str.findall(r'\b[a-z]{4,}\b'),
+                         'titres': titres.to_numpy()}).explode('mot').dropna()
+    comptes = mots.groupby('mot', sort=False)['titres'].sum().sort_values(ascending=False, kind='stable').head(nombre)
+    return pd.DataFrame({'mot': comptes.index.astype(str), 'occurrences': comptes.to_numpy()})
+
+def table_rapport_qualite_prix(df):
+    """Livres avec la meilleure note par livre sterling"""
+    rapport = df['note'] / df['prix_numerique']
+    top = df.loc[rapport.nlargest(TAILLE_TOP).index]
+    return pd.DataFrame({'rang': range(1, len(top) + 1), 'titre': top['titre'].to_numpy(),
+                         'note': top['note'].to_numpy(), 'prix': top['prix_numerique'].round(2).to_numpy(),
+                         'rapport_qualite_prix': rapport.loc[top.index].to_numpy()})
+
+def table_mieux_notes(df):
+    """Premiers livres notes 5 etoiles"""
+    top = df[df['note'] == 5].head(TAILLE_TOP)
+    return pd.DataFrame({'rang': range(1, len(top) + 1), 'titre': top['titre'].to_numpy(),
+                         'categorie': top['categorie'].astype(str).to_numpy(),
+                         'prix': top['prix_numerique'].round(2).to_numpy()})
+
+def table_disponibilite(disponibilites):
+    """Nombre de livres par texte de disponibilite (retours a la ligne retires)"""
+    comptes = disponibilites.value_counts()
+    return pd.DataFrame({'disponibilite': comptes.index.astype(str).str.replace('\n', ' ').str.strip(),
+                         'livres': comptes.to_numpy()})
+
+def statistiques(serie, arrondi):
+    """Moyenne, mediane, minimum et maximum d'une serie de statistiques, arrondis"""
+    return {cle: float(round(serie[cle], arrondi)) for cle in ('mean', 'median', 'min', 'max') if cle in serie}
+
+# ---------------------------------------------------------------------------
+# Rendu console: une colonne de texte par table, assemblee sans boucle sur les lignes
+# ---------------------------------------------------------------------------
+
+def _texte(serie):
+    return pd.Series(serie).astype(str)
+
+def _titre_court(titres, longueur):
+    titres = _texte(titres)
+    return titres.where(titres.str.len() <= longueur, titres.str.slice(0, longueur) + "...")
+
+def _etoiles(notes):
+    notes = pd.Series(notes).astype('int64')
+    pleines = pd.Series('*', index=notes.index).str.repeat(notes.tolist())
+    return pleines + pd.Series('.', index=notes.index).str.repeat((5 - notes).tolist())
+
+def afficher(lignes):
+    """Affiche des lignes rendues (rien si la table est vide)"""
+    if len(lignes):
+        print('\n'.join(lignes))
+
+def lignes_repartition(table):
+    return ("   " + _texte(table['categorie']).str.ljust(20) + " : " + _texte(table['livres']).str.rjust(3)
+            + " livres (" + _texte(table['pourcentage'].round(1)) + "%)")
+
+def lignes_prix_categories(table):
+    return ("   " + _texte(table['categorie']).str.ljust(20) + " : £" + _texte(table['prix_moyen']).str.rjust(6)
+            + " (mediane: £" + _texte(table['prix_median']) + ") - " + _texte(table['livres']) + " livres")
+
+def lignes_top_prix(table, longueur=35):
+    lignes = "   " + _texte(table['rang']) + ". £" + _texte(table['prix']) + " - " + _titre_court(table['titre'], longueur)
+    if 'categorie' in table.columns:
+        lignes = lignes + " [" + _texte(table['categorie']) + "]"
+    return lignes
+
+def lignes_notes(table, unite=" livres", pourcentage=True):
+    lignes = ("   " + _etoiles(table['note']) + " (" + _texte(table['note']) + "/5) : ")
+    if not pourcentage:
+        return lignes + _texte(table['livres']) + unite
+    return lignes + _texte(table['livres']).str.rjust(3) + unite + " (" + _texte(table['pourcentage'].round(1)) + "%)"
+
+def lignes_notes_categories(table):
+    return ("   " + _texte(table['categorie']).str.ljust(20) + " : " + _texte(table['note_moyenne']) + "/5 - "
+            + _texte(table['livres']) + " livres")
+
+def lignes_stock_categories(table):
+    return ("   " + _texte(table['categorie']).str.ljust(20) + " : " + _texte(table['stock_moyen'].round(1))
+            + " unites en moyenne")
+
+def lignes_mots_frequents(table):
+    return "   " + _texte(table['mot']).str.ljust(15) + " : " + _texte(table['occurrences']).str.rjust(3) + " occurrences"
+
+def lignes_rapport_qualite_prix(table):
+    return ("   " + _texte(table['rang']) + ". " + _texte(table['titre']).str.slice(0, 35) + "...\n"
+            + "      Note: " + _texte(table['note']) + "/5 - Prix: £" + _texte(table['prix']))
+
+def lignes_mieux_notes(table):
+    return ("   " + _texte(table['rang']) + ". " + _texte(table['titre']).str.slice(0, 35) + "...\n"
+            + "      Categorie: " + _texte(table['categorie']) + " - Prix: £" + _texte(table['prix']))
+
+def lignes_disponibilite(table):
+    return "   " + _texte(table['disponibilite']) + " : " + _texte(table['livres']) + " livre(s)"
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def _en_json(valeur):
+    if isinstance(valeur, pd.DataFrame):
+        return json.loads(valeur.to_json(orient='records', force_ascii=False))
+    if isinstance(valeur, dict):
+        return {cle: _en_json(sous_valeur) for cle, sous_valeur in valeur.items()}
+    return valeur
+
+def _ecrire(chemin, ecriture):
+    ecriture(chemin + ".tmp")
+    os.replace(chemin + ".tmp", chemin)
+
+def exporter_rapport(rapport, nom="rapport", dossier=DOSSIER_RAPPORT):
+    """Ecrit le rapport en JSON (un document) et chaque table en CSV (nom_section.csv).
+    Retourne le chemin du JSON."""
+    os.makedirs(dossier, exist_ok=True)
+    document = {'genere_le': datetime.now().isoformat(timespec='seconds'), 'sections': _en_json(rapport)}
+
+    def ecrire_json(chemin):
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            json.dump(document, fichier, ensure_ascii=False, indent=2)
+
+    chemin_json = os.path.join(dossier, nom + ".json")
+    _ecrire(chemin_json, ecrire_json)
+    for section, valeur in rapport.items():
+        if isinstance(valeur, pd.DataFrame):
+            _ecrire(os.path.join(dossier, nom + "_" + section + ".csv"),
+                    lambda chemin: valeur.to_csv(chemin, index=False, encoding='utf-8'))
+    return chemin_json
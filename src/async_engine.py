@@ -0,0 +1,255 @@
+"""
+Moteur de crawl asyncio, alternative a requests/get_soup
+
+Une seule boucle d'evenements pilote toutes les requetes: decouverte des
+categories, pagination des listes et pages livres. Le parsing reutilise les
+fonctions de parsers.py (backend et pool de processus choisis), les deux
+moteurs produisent donc les memes enregistrements; il tourne hors de la
+boucle (run_in_executor) pour ne pas bloquer les requetes en vol.
+"""
+import asyncio
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    from settings import (HEADERS, TIMEOUT, DEFAULT_DELAY, DEFAULT_MAX_PAGES, ASYNC_LIMIT_PER_HOST, MAX_RETRIES,
+                          RETRY_BACKOFF_FACTOR, RETRY_STATUSES)
+    from parsers import get_base_url, make_soup, extract_category_links, extract_list_content, parse_product_content
+    from dedup import get_book_index
+    from frontier import Frontier, LIST_PAGE
+    from metrics import observe, increment
+    from throttle import get_throttle, parse_retry_after
+    from log import get_logger, progress
+except ImportError:
+    from .settings import (HEADERS, TIMEOUT, DEFAULT_DELAY, DEFAULT_MAX_PAGES, ASYNC_LIMIT_PER_HOST, MAX_RETRIES,
+                           RETRY_BACKOFF_FACTOR, RETRY_STATUSES)
+    from .parsers import get_base_url, make_soup, extract_category_links, extract_list_content, parse_product_content
+    from .dedup import get_book_index
+    from .frontier import Frontier, LIST_PAGE
+    from .metrics import observe, increment
+    from .throttle import get_throttle, parse_retry_after
+    from .log import get_logger, progress
+
+logger = get_logger('async_engine')
+
+class AsyncRateLimiter:
+    """
+    Equivalent asyncio de utils.RateLimiter: une requete toutes les `delay` secondes
+    """
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = asyncio.Lock()
+        self._next_slot = time.monotonic()
+
+    async def wait(self):
+        """
+        Attend le prochain creneau libre sans bloquer la boucle d'evenements
+        """
+        if not self.delay or self.delay <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+            increment('sleep_seconds', slot - now)
+
+async def wait_before_retry(throttle, attempt, retry_after):
+    """
+    Attente avant un reessai: prochain creneau du debit adaptatif s'il est actif,
+    sinon Retry-After ou backoff exponentiel comme la politique de session.py
+    """
+    if throttle is not None:
+        await throttle.acquire_async()
+        return
+    delay = parse_retry_after(retry_after) or RETRY_BACKOFF_FACTOR * 2 ** attempt
+    await asyncio.sleep(delay)
+    increment('sleep_seconds', delay)
+
+async def get_page_async(session, url, limiter):
+    """
+    Recupere le contenu brut d'une page de facon asynchrone.
+    Les statuts de RETRY_STATUSES (429, 503...), les erreurs de connexion et
+    les delais depasses sont reessayes jusqu'a MAX_RETRIES fois, comme avec
+    la politique de reessai de session.py.
+    """
+    await limiter.wait()
+    throttle = get_throttle()
+    if throttle is not None:
+        await throttle.acquire_async()
+    started = time.perf_counter()
+    try:
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with session.get(url) as response:
+                    retry_after = response.headers.get('Retry-After')
+                    if throttle is not None:
+                        # Apres un reessai la duree inclut les attentes: pas un echantillon de latence
+                        throttle.record(response.status, None if attempt else time.perf_counter() - started, retry_after)
+                    if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                        response.raise_for_status()
+                        content = await response.read()
+                        break
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == MAX_RETRIES:
+                    raise
+                if throttle is not None:
+                    throttle.record(None)
+                retry_after = None
+            increment('retries')
+            await wait_before_retry(throttle, attempt, retry_after)
+        observe('fetch', started)
+        increment('http_bytes', len(content))
+        return content
+    except Exception as e:
+        observe('fetch', started)
+        increment('fetch_errors')
+        if throttle is not None and isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+            throttle.record(None)
+        progress('errors')
+        logger.error("Erreur lors du chargement de %s: %s", url, e)
+        return None
+
+async def get_category_links_async(session, limiter, main_url=None):
+    """
+    Recupere tous les liens de categories depuis la page d'accueil (defaut: celle du site cible)
+    """
+    logger.info("Extraction des liens de categories...")
+    main_url = main_url or get_base_url()
+    content = await get_page_async(session, main_url, limiter)
+    category_links = extract_category_links(make_soup(content), main_url) if content else []
+
+    logger.info("%s categories trouvees", len(category_links))
+    return category_links
+
+async def parse_list_page_async(session, list_url, category_name, limiter):
+    """
+    Parse une page liste de livres et extrait les URLs des livres
+    """
+    logger.debug("  Parsing page liste: %s", list_url)
+    content = await get_page_async(session, list_url, limiter)
+    if content:
+        # Parsing hors de la boucle: les requetes en vol continuent pendant ce temps
+        book_urls, next_page_url = await asyncio.get_running_loop().run_in_executor(None, extract_list_content, content, list_url)
+    else:
+        book_urls, next_page_url = [], None
+
+    progress('pages')
+    logger.debug("  %s livres trouves sur cette page", len(book_urls))
+    return book_urls, next_page_url
+
+async def parse_product_page_async(session, product_url, category_name, limiter):
+    """
+    Parse une page detail d'un livre et extrait les informations
+    """
+    logger.debug("    Parsing livre: %s", product_url)
+    content = await get_page_async(session, product_url, limiter)
+
+    if not content:
+        return None
+
+    # Parsing dans un thread (qui le confie au pool de processus s'il est demarre), pas dans la boucle
+    book_data = await asyncio.get_running_loop().run_in_executor(None, parse_product_content, content, product_url, category_name)
+    if book_data:
+        progress('books')
+    return book_data
+
+async def scrape_category_async(session, category_url, category_name, limiter, max_pages=DEFAULT_MAX_PAGES, output=None):
+    """
+    Scrape une categorie en vidant sa frontiere par lots: chaque lot (page
+    liste suivante et au plus PIPELINE_QUEUE_SIZE livres deja decouverts)
+    part en parallele. Les livres
+    d'un lot sont passes a `output` (write, puis close ou abort) des que le
+    lot est termine, sans etre gardes en memoire. Retourne le nombre de livres.
+    """
+    logger.info("Scraping de la categorie: %s", category_name)
+
+    index = get_book_index()
+    frontier = Frontier(category_url, max_pages)
+    count = 0
+
+    async def run(kind, url):
+        try:
+            if kind == LIST_PAGE:
+                book_urls, next_page_url = await parse_list_page_async(session, url, category_name, limiter)
+                frontier.push_products(book_urls)
+                if next_page_url:
+                    frontier.push_list(next_page_url)
+                return None
+            return await parse_product_page_async(session, url, category_name, limiter)
+        finally:
+            frontier.task_done()
+
+    try:
+        while True:
+            batch = frontier.pop_batch()
+            if not batch:
+                break
+            # gather conserve l'ordre de la frontiere: meme sortie que le moteur synchrone
+            books = await asyncio.gather(*[run(kind, url) for kind, url in batch])
+            for book in books:
+                if book and (index is None or index.claim_upc(book.get('upc'))):
+                    count += 1
+                    if output is not None:
+                        output.write(book)
+    except BaseException:
+        # Erreur, interruption ou annulation: les sorties precedentes restent en place
+        if output is not None:
+            output.abort()
+        raise
+    if output is not None:
+        output.close()
+
+    logger.info("Categorie '%s' terminee: %s livres scrapes", category_name, count)
+    return count
+
+async def crawl_async(category_names=None, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES,
+                      limit_per_host=ASYNC_LIMIT_PER_HOST, main_url=None, open_output=None):
+    """
+    Crawl complet dans une seule session: toutes les categories si
+    category_names vaut None, sinon seulement celles demandees.
+    `open_output(category)` fournit les sorties de chaque categorie
+    (sans lui, les livres sont seulement comptes). Les categories avancent
+    ensemble: au plus un lot borne par categorie est en vol, et le connecteur
+    limite les connexions ouvertes a limit_per_host.
+    """
+    connector = aiohttp.TCPConnector(limit_per_host=limit_per_host)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    limiter = AsyncRateLimiter(delay)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+        categories = await get_category_links_async(session, limiter, main_url)
+
+        if category_names is not None:
+            by_name = {category['name'].lower(): category for category in categories}
+            selected_categories = []
+            for category_name in category_names:
+                if category_name.lower() in by_name:
+                    selected_categories.append(by_name[category_name.lower()])
+                else:
+                    logger.warning("Attention: Categorie '%s' non trouvee", category_name)
+            categories = selected_categories
+
+        counts = await asyncio.gather(*[
+            scrape_category_async(session, category['url'], category['name'], limiter, max_pages,
+                                  open_output(category) if open_output else None)
+            for category in categories
+        ])
+
+    return categories, counts
+
+def run_async_crawl(category_names=None, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES,
+                    limit_per_host=ASYNC_LIMIT_PER_HOST, main_url=None, open_output=None):
+    """
+    Point d'entree synchrone du moteur asyncio
+    Retourne la liste des categories et le nombre de livres de chacune
+    """
+    if aiohttp is None:
+        raise RuntimeError("Le moteur async necessite aiohttp: pip install aiohttp")
+
+    return asyncio.run(crawl_async(category_names, delay, max_pages, limit_per_host, main_url, open_output))
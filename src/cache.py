@@ -0,0 +1,172 @@
+"""
+Cache HTTP persistant pour les recrawls incrementaux
+
+Chaque URL garde sur disque son corps, son ETag/Last-Modified et le resultat
+deja parse de la page. Au passage suivant, une requete conditionnelle qui
+renvoie 304 permet de reutiliser le corps et d'eviter le parsing.
+La taille totale des corps est plafonnee, les entrees les moins recemment
+utilisees sont evincees en premier.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+INDEX_FILENAME = "index.json"
+SAVE_EVERY = 50
+
+class HttpCache:
+    """
+    Cache disque des pages HTML indexe par URL, avec eviction LRU
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = 0
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()
+        self._total_bytes = sum(entry['size'] for entry in self._index.values())
+        self._evict()
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_FILENAME)
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _body_path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.html')
+
+    def conditional_headers(self, url):
+        """
+        En-tetes If-None-Match / If-Modified-Since pour une URL deja en cache
+        """
+        with self._lock:
+            entry = self._index.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get_body(self, url):
+        """
+        Corps en cache apres un 304, None si l'entree a disparu du disque
+        """
+        try:
+            with open(self._body_path(url), 'rb') as file:
+                content = file.read()
+        except OSError:
+            with self._lock:
+                self._forget(url)
+            return None
+        with self._lock:
+            if url in self._index:
+                self._index[url]['last_used'] = time.time()
+                self._mark_dirty()
+            self.hits += 1
+        return content
+
+    def store(self, url, response):
+        """
+        Enregistre une reponse 200 si le serveur fournit un validateur
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        content = response.content
+        tmp_path = self._body_path(url) + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(content)
+        os.replace(tmp_path, self._body_path(url))
+
+        with self._lock:
+            self.misses += 1
+            old_entry = self._index.get(url)
+            if old_entry:
+                self._total_bytes -= old_entry['size']
+            self._index[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'size': len(content),
+                'last_used': time.time(),
+                'record': None,
+            }
+            self._total_bytes += len(content)
+            self._evict()
+            self._mark_dirty()
+
+    def get_record(self, url):
+        """
+        Resultat de parsing memorise pour une URL, ou None
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            return entry.get('record') if entry else None
+
+    def store_record(self, url, record):
+        """
+        Memorise le resultat de parsing d'une page en cache
+        """
+        with self._lock:
+            if url in self._index:
+                self._index[url]['record'] = record
+                self._mark_dirty()
+
+    def _forget(self, url):
+        entry = self._index.pop(url, None)
+        if entry:
+            self._total_bytes -= entry['size']
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for url, _ in sorted(self._index.items(), key=lambda item: item[1]['last_used']):
+            self._forget(url)
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    def _mark_dirty(self):
+        self._dirty += 1
+        if self._dirty >= SAVE_EVERY:
+            self._save_locked()
+
+    def _save_locked(self):
+        path = os.path.join(self.directory, INDEX_FILENAME)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(self._index, file)
+        os.replace(path + '.tmp', path)
+        self._dirty = 0
+
+    def save(self):
+        """
+        Ecrit l'index sur disque (ecriture atomique)
+        """
+        with self._lock:
+            self._save_locked()
+
+    def stats(self):
+        """
+        Resume de l'utilisation du cache
+        """
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
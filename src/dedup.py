@@ -0,0 +1,58 @@
+"""
+Index de deduplication des livres pendant un crawl
+
+Consulte avant chaque requete de page livre (par URL) et apres chaque parsing
+(par UPC): aucune page livre n'est demandee deux fois dans un meme run et
+aucun livre n'apparait deux fois dans les sorties.
+"""
+import threading
+
+_index = None
+
+class BookIndex:
+    """
+    Ensembles thread-safe des URLs et UPC deja vus
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._urls = set()
+        self._upcs = set()
+        self.duplicates = 0
+
+    def claim_url(self, product_url):
+        """
+        Reserve une URL de livre; False si elle a deja ete vue dans ce run
+        """
+        with self._lock:
+            if product_url in self._urls:
+                self.duplicates += 1
+                return False
+            self._urls.add(product_url)
+            return True
+
+    def claim_upc(self, upc):
+        """
+        Reserve un UPC; False si le livre a deja ete produit (un UPC vide est toujours accepte)
+        """
+        if not upc:
+            return True
+        with self._lock:
+            if upc in self._upcs:
+                self.duplicates += 1
+                return False
+            self._upcs.add(upc)
+            return True
+
+def reset_book_index():
+    """
+    Demarre un nouvel index vide pour le run courant
+    """
+    global _index
+    _index = BookIndex()
+    return _index
+
+def get_book_index():
+    """
+    Index actif, ou None si la deduplication n'est pas active
+    """
+    return _index
@@ -0,0 +1,147 @@
+"""
+Backend de parsing rapide base sur lxml et des XPath compiles
+
+Meme extraction que les fonctions extract_* de parsers.py (BeautifulSoup),
+mais en une seule passe sur l'arbre lxml, sans construire d'arbre Python
+complet. Les enregistrements produits doivent etre identiques a ceux du
+backend bs4 (voir l'option --verify-parser).
+"""
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+from bs4.dammit import EncodingDetector
+
+try:
+    from settings import PRODUCT_INFO_FIELDS
+    from utils import format_price, rating_to_stars, product_info_value
+    import parsers
+    from log import get_logger
+except ImportError:
+    from .settings import PRODUCT_INFO_FIELDS
+    from .utils import format_price, rating_to_stars, product_info_value
+    from . import parsers
+    from .log import get_logger
+
+logger = get_logger('fast_parsers')
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_html_parsers = {}
+
+if lxml is not None:
+
+    # Equivalents XPath des soup.find(...) du backend bs4: premier element du document
+    XPATH_TITLE = etree.XPath("(//h1)[1]")
+    XPATH_PRICE = etree.XPath(f"(//p[{_has_class('price_color')}])[1]")
+    XPATH_AVAILABILITY = etree.XPath(f"(//p[{_has_class('instock')}])[1]")
+    XPATH_RATING = etree.XPath(f"(//p[{_has_class('star-rating')}])[1]/@class")
+    XPATH_DESCRIPTION_DIV = etree.XPath("(//div[@id='product_description'])[1]")
+    XPATH_DESCRIPTION = etree.XPath("(//div[@id='product_description'])[1]/following-sibling::p[1]")
+    XPATH_IMAGE_DIV = etree.XPath(f"(//div[{_has_class('item')}])[1]")
+    XPATH_IMAGE_SRC = etree.XPath(f"((//div[{_has_class('item')}])[1]//img)[1]/@src")
+    XPATH_INFO_ROWS = etree.XPath("(//table)[1]//tr")
+    XPATH_ROW_HEADER = etree.XPath("(.//th)[1]")
+    XPATH_ROW_VALUE = etree.XPath("(.//td)[1]")
+
+    XPATH_BOOK_LINKS = etree.XPath(f"//article[{_has_class('product_pod')}]/descendant::h3[1]/descendant::a[1]/@href")
+    XPATH_NEXT_PAGE = etree.XPath(f"(//li[{_has_class('next')}]//a)[1]/@href")
+
+def page_encoding(content):
+    """
+    Encodage d'une page comme le detecte bs4 sur le meme contenu brut: BOM,
+    puis declaration du document (meta charset, declaration XML), sinon utf-8
+    """
+    _, encoding = EncodingDetector.strip_byte_order_mark(content)
+    return encoding or EncodingDetector.find_declared_encoding(content, is_html=True) or 'utf-8'
+
+def _html_parser(encoding):
+    parser = _html_parsers.get(encoding)
+    if parser is None:
+        try:
+            parser = lxml.html.HTMLParser(encoding=encoding)
+        except LookupError:
+            # Encodage declare inconnu de libxml2: utf-8
+            parser = _html_parser('utf-8')
+        _html_parsers[encoding] = parser
+    return parser
+
+def parse_html(content):
+    """
+    Construit l'arbre lxml d'une page a partir de son contenu brut, dans son encodage
+    """
+    return lxml.html.document_fromstring(content, parser=_html_parser(page_encoding(content)))
+
+def _first_text(xpath, tree):
+    elements = xpath(tree)
+    return elements[0].text_content().strip() if elements else None
+
+def extract_list_page_lxml(content, list_url):
+    """
+    Extrait les URLs des livres et de la page suivante d'une page liste
+    """
+    book_urls = []
+    next_page_url = None
+
+    try:
+        tree = parse_html(content)
+        book_urls = [parsers.build_book_url(list_url, href) for href in XPATH_BOOK_LINKS(tree) if href]
+
+        next_hrefs = XPATH_NEXT_PAGE(tree)
+        if next_hrefs and next_hrefs[0]:
+            next_page_url = parsers.build_next_page_url(list_url, next_hrefs[0])
+
+    except Exception as e:
+        logger.error("Erreur lors du parsing de la page liste: %s", e)
+
+    return book_urls, next_page_url
+
+def extract_product_lxml(content, product_url, category_name):
+    """
+    Extrait les informations d'un livre en une passe d'XPath compiles
+    """
+    book_data = {}
+
+    try:
+        tree = parse_html(content)
+
+        title = _first_text(XPATH_TITLE, tree)
+        book_data['title'] = title if title is not None else 'Titre non trouve'
+
+        price = XPATH_PRICE(tree)
+        book_data['price'] = format_price(price[0].text_content()) if price else 0.0
+
+        availability = _first_text(XPATH_AVAILABILITY, tree)
+        book_data['availability'] = availability if availability is not None else 'Non disponible'
+
+        rating_class = XPATH_RATING(tree)
+        book_data['rating'] = rating_to_stars(' '.join(rating_class[0].split()) if rating_class else '')
+
+        description = None
+        if XPATH_DESCRIPTION_DIV(tree):
+            description = _first_text(XPATH_DESCRIPTION, tree)
+        book_data['description'] = description if description is not None else 'Pas de description'
+
+        if XPATH_IMAGE_DIV(tree):
+            image_src = XPATH_IMAGE_SRC(tree)
+            if image_src and image_src[0]:
+                book_data['image_url'] = parsers.build_image_url(product_url, image_src[0])
+
+        for row in XPATH_INFO_ROWS(tree):
+            header = XPATH_ROW_HEADER(row)
+            value = XPATH_ROW_VALUE(row)
+            field = PRODUCT_INFO_FIELDS.get(header[0].text_content().strip()) if header else None
+            if field and value:
+                book_data[field] = product_info_value(field, value[0].text_content())
+
+        book_data['category'] = category_name
+        book_data['product_url'] = product_url
+
+    except Exception as e:
+        logger.error("Erreur lors du parsing du livre %s: %s", product_url, e)
+        return None
+
+    return book_data
@@ -0,0 +1,222 @@
+"""
+Frontiere du crawl: normalisation des URLs, livres visites et ordonnancement
+
+Chaque lien decouvert (livres, page suivante, categories, couvertures) est
+resolu par urljoin contre l'URL de la page qui le contient puis mis sous forme
+canonique: une page n'a qu'une ecriture, quel que soit le lien relatif qui y
+mene, et l'index de deduplication ne la voit qu'une fois.
+
+La frontiere d'une categorie ordonne le travail: pages liste d'abord (elles
+decouvrent les livres), puis pages livres dans l'ordre du site. Le mode serie
+la depile dans un seul thread, le mode concurrent la partage entre les workers
+du pool, le moteur asyncio la vide par lots.
+
+Les livres enregistres sont marques dans un ensemble compact (empreinte de
+8 octets par URL) ajoute au fil de l'eau dans le dossier de sortie: apres une
+interruption, --resume le recharge et un livre deja enregistre n'est ni
+redemande ni reattribue a une autre categorie.
+"""
+import os
+import hashlib
+import threading
+from collections import deque
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+try:
+    from settings import PIPELINE_QUEUE_SIZE
+    from dedup import get_book_index
+    from log import get_logger
+except ImportError:
+    from .settings import PIPELINE_QUEUE_SIZE
+    from .dedup import get_book_index
+    from .log import get_logger
+
+LIST_PAGE = 0
+PRODUCT_PAGE = 1
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+DIGEST_SIZE = 8
+
+_visited = None
+
+logger = get_logger('frontier')
+
+def normalize_url(href, page_url):
+    """
+    URL absolue et canonique d'un lien: resolue contre la page qui le contient,
+    schema et hote en minuscules, port par defaut et fragment retires
+    """
+    parts = urlsplit(urljoin(page_url, href.strip()))
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ''
+    if ':' in host:
+        host = f"[{host}]"
+    netloc = host if parts.port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{parts.port}"
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+def url_digest(url):
+    """
+    Empreinte de 8 octets d'une URL normalisee
+    """
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=DIGEST_SIZE).digest(), 'big')
+
+class VisitedSet:
+    """
+    Ensemble d'URLs conservees par empreinte, en memoire et en fin de fichier
+    binaire (8 octets par URL). Sans reprise, le fichier est remis a zero.
+    """
+    def __init__(self, path, resume=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._digests = set()
+        if resume:
+            self._load()
+        self._file = open(path, 'ab' if resume else 'wb')
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return
+        # Une empreinte tronquee par une interruption est ignoree
+        usable = len(data) - len(data) % DIGEST_SIZE
+        self._digests.update(int.from_bytes(data[i:i + DIGEST_SIZE], 'big') for i in range(0, usable, DIGEST_SIZE))
+
+    def __contains__(self, url):
+        return url_digest(url) in self._digests
+
+    def __len__(self):
+        return len(self._digests)
+
+    def add(self, url):
+        """
+        Marque une URL; False si elle l'etait deja
+        """
+        digest = url_digest(url)
+        with self._lock:
+            if digest in self._digests:
+                return False
+            self._digests.add(digest)
+            self._file.write(digest.to_bytes(DIGEST_SIZE, 'big'))
+            self._file.flush()
+            return True
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+class Frontier:
+    """
+    File de travail d'une categorie, partagee entre threads: pages liste en
+    priorite, puis pages livres dans leur ordre de decouverte. Des que
+    `max_pending` livres attendent, les pages liste patientent: la file reste
+    bornee sans qu'un producteur bloque (le mode serie produit et consomme
+    dans le meme thread). pop() attend tant qu'une tache en cours peut encore
+    en ajouter et rend None a la fin; pop_batch() applique la meme borne aux
+    lots du moteur asyncio.
+    """
+    def __init__(self, category_url, max_pages=None, max_pending=PIPELINE_QUEUE_SIZE):
+        self.max_pages = max_pages
+        self.max_pending = max_pending
+        self.pages = 0
+        self._cond = threading.Condition()
+        self._list_queue = deque()
+        self._product_queue = deque()
+        self._in_flight = 0
+        self._lists = set()
+        self.push_list(category_url)
+
+    def push_list(self, list_url):
+        """
+        Ajoute une page liste (ignoree au-dela de max_pages ou si elle revient dans la pagination)
+        """
+        with self._cond:
+            if list_url in self._lists:
+                return False
+            if self.max_pages and self.pages >= self.max_pages:
+                logger.info("  Limite de %s pages atteinte", self.max_pages)
+                return False
+            self._lists.add(list_url)
+            self.pages += 1
+            self._list_queue.append(list_url)
+            self._cond.notify()
+            return True
+
+    def push_products(self, book_urls):
+        """
+        Ajoute les livres d'une page liste; l'index de deduplication est consulte
+        avant toute requete, un livre deja reserve par une autre page n'entre pas
+        """
+        index = get_book_index()
+        with self._cond:
+            for book_url in book_urls:
+                if index is None or index.claim_url(book_url):
+                    self._product_queue.append(book_url)
+            self._cond.notify_all()
+
+    def pop(self):
+        """
+        Prochaine tache (type, url), en attendant si besoin; None quand tout est traite
+        """
+        with self._cond:
+            while not (self._list_queue or self._product_queue):
+                if not self._in_flight:
+                    return None
+                self._cond.wait()
+            if self._list_queue and len(self._product_queue) < self.max_pending:
+                task = LIST_PAGE, self._list_queue.popleft()
+            else:
+                task = PRODUCT_PAGE, self._product_queue.popleft()
+            self._in_flight += 1
+            return task
+
+    def pop_batch(self):
+        """
+        Lot de taches en attente, sans attendre (moteur asyncio): pages liste
+        d'abord, puis au plus `max_pending` livres. Comme pop(), les pages liste
+        patientent tant que `max_pending` livres attendent.
+        """
+        with self._cond:
+            batch = []
+            if len(self._product_queue) < self.max_pending:
+                batch.extend((LIST_PAGE, url) for url in self._list_queue)
+                self._list_queue.clear()
+            for _ in range(min(len(self._product_queue), self.max_pending)):
+                batch.append((PRODUCT_PAGE, self._product_queue.popleft()))
+            self._in_flight += len(batch)
+            return batch
+
+    def task_done(self):
+        """
+        Signale la fin d'une tache obtenue par pop() ou pop_batch()
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+def open_visited(path, resume=False):
+    """
+    Ouvre l'ensemble persistant des livres visites (recharge avec resume)
+    """
+    global _visited
+    close_visited()
+    _visited = VisitedSet(path, resume)
+    if resume:
+        logger.info("Livres deja visites: %d (%s)", len(_visited), os.path.basename(path))
+    return _visited
+
+def get_visited():
+    """
+    Ensemble des livres visites actif, ou None
+    """
+    return _visited
+
+def close_visited():
+    """
+    Ferme l'ensemble des livres visites s'il est ouvert
+    """
+    global _visited
+    if _visited is not None:
+        _visited.close()
+        _visited = None
@@ -0,0 +1,115 @@
+"""
+Journal de reprise (checkpoint) pour les crawls longs
+
+Chaque livre parse est ajoute en fin de fichier sous forme d'une ligne JSON,
+ainsi que la fin de chaque categorie avec l'ordre de ses livres. Apres une
+interruption, --resume relit le journal: les livres deja presents ne sont pas
+rescrapes et les CSV sont reconstruits a partir des enregistrements journalises.
+"""
+import json
+import threading
+
+try:
+    from log import get_logger
+except ImportError:
+    from .log import get_logger
+
+_journal = None
+
+logger = get_logger('journal')
+
+class CrawlJournal:
+    """
+    Journal append-only des livres et categories termines
+    """
+    def __init__(self, path, resume=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._books = {}
+        self._categories = {}
+        if resume:
+            self._load()
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Derniere ligne tronquee par une interruption
+                        continue
+                    if entry.get('type') == 'book':
+                        record = entry['record']
+                        self._books[(record['category'], record['product_url'])] = record
+                    elif entry.get('type') == 'category':
+                        self._categories[entry['name']] = entry['urls']
+        except OSError:
+            pass
+        logger.info("Reprise: %d livres et %d categories deja dans le journal", len(self._books), len(self._categories))
+
+    def _write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def get_book(self, category_name, product_url):
+        """
+        Enregistrement journalise d'un livre, ou None s'il reste a scraper
+        """
+        return self._books.get((category_name, product_url))
+
+    def add_book(self, record):
+        """
+        Ajoute un livre parse au journal
+        """
+        self._books[(record['category'], record['product_url'])] = record
+        self._write({'type': 'book', 'record': record})
+
+    def category_books(self, category_name):
+        """
+        Livres d'une categorie terminee, dans l'ordre d'origine, ou None
+        """
+        urls = self._categories.get(category_name)
+        if urls is None:
+            return None
+        books = [self._books.get((category_name, url)) for url in urls]
+        if any(book is None for book in books):
+            return None
+        return books
+
+    def complete_category(self, category_name, urls):
+        """
+        Marque une categorie comme terminee en memorisant l'ordre de ses livres
+        """
+        self._categories[category_name] = urls
+        self._write({'type': 'category', 'name': category_name, 'urls': urls})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def open_journal(path, resume=False):
+    """
+    Ouvre le journal de reprise actif (le recree si resume vaut False)
+    """
+    global _journal
+    _journal = CrawlJournal(path, resume)
+    return _journal
+
+def get_journal():
+    """
+    Journal actif, ou None si aucun journal n'est ouvert
+    """
+    return _journal
+
+def close_journal():
+    """
+    Ferme le journal actif
+    """
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
@@ -0,0 +1,147 @@
+"""
+Journalisation du scraper: niveaux, mode silencieux et ecriture non bloquante
+
+Les modules journalisent via get_logger(); les messages par livre et par page
+sont au niveau DEBUG, et leurs arguments ne sont formates que si ce niveau
+est actif. configure_logging() place une file devant les sorties: les threads
+du crawl deposent leurs enregistrements (QueueHandler) et un seul thread
+(QueueListener) ecrit sur la console et, en option, dans un fichier JSON lines.
+Un resume periodique de la progression remplace le detail par livre.
+"""
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    from settings import PROGRESS_INTERVAL
+except ImportError:
+    from .settings import PROGRESS_INTERVAL
+
+LOGGER_NAME = 'scraper'
+PROGRESS_KINDS = ['books', 'pages', 'images', 'errors']
+
+_listener = None
+_progress = None
+
+def get_logger(name):
+    """
+    Logger d'un module du scraper (enfant du logger 'scraper')
+    """
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+logger = get_logger('progress')
+
+class JsonFormatter(logging.Formatter):
+    """
+    Un objet JSON par ligne: horodatage, niveau, module, thread et message
+    """
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class ProgressReporter:
+    """
+    Compteurs de progression partages par tous les threads, resumes au
+    niveau INFO au plus toutes les `interval` secondes
+    """
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self._next_report = self.started + interval
+        self.counts = dict.fromkeys(PROGRESS_KINDS, 0)
+
+    def add(self, kind, value=1):
+        with self._lock:
+            self.counts[kind] += value
+            now = time.monotonic()
+            if now < self._next_report:
+                return
+            self._next_report = now + self.interval
+            counts = dict(self.counts)
+        logger.info(self.line("Progression", counts, now - self.started))
+
+    def line(self, label, counts, elapsed):
+        rate = counts['books'] / elapsed if elapsed > 0 else 0.0
+        return (f"{label}: {counts['books']} livres, {counts['pages']} pages liste, {counts['images']} images, "
+                f"{counts['errors']} erreurs en {elapsed:.0f} s ({rate:.1f} livres/s)")
+
+    def summary(self):
+        with self._lock:
+            counts = dict(self.counts)
+        return self.line("Progression finale", counts, time.monotonic() - self.started)
+
+def configure_logging(level=logging.INFO, log_file=None, progress_interval=PROGRESS_INTERVAL):
+    """
+    Installe la file de journalisation: console (messages bruts) et fichier
+    JSON lines optionnel, tous deux ecrits par le thread du QueueListener.
+    La progression periodique n'est active qu'au niveau INFO ou plus bavard.
+    """
+    global _listener, _progress
+    close_logging()
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    handlers = [console]
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(LOGGER_NAME)
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(level)
+    root.propagate = False
+    _listener = QueueListener(log_queue, *handlers)
+    _listener.start()
+    _progress = ProgressReporter(progress_interval) if progress_interval and level <= logging.INFO else None
+
+def configure_worker_logging(level):
+    """
+    Journalisation d'un processus de parsing: ecriture directe sur la console au meme niveau
+    """
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    root = logging.getLogger(LOGGER_NAME)
+    root.handlers = [console]
+    root.setLevel(level)
+    root.propagate = False
+
+def log_level():
+    """
+    Niveau effectif du logger du scraper
+    """
+    return logging.getLogger(LOGGER_NAME).getEffectiveLevel()
+
+def progress(kind, value=1):
+    """
+    Compte un livre, une page liste, une image ou une erreur
+    """
+    if _progress is not None:
+        _progress.add(kind, value)
+
+def close_logging():
+    """
+    Journalise la progression finale puis vide la file et arrete le thread d'ecriture
+    """
+    global _listener, _progress
+    if _progress is not None:
+        logger.info(_progress.summary())
+        _progress = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger(LOGGER_NAME).handlers = []
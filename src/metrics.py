@@ -0,0 +1,259 @@
+"""
+Metriques du crawl: compteurs et histogrammes de latence par etape
+
+Les etapes fetch (pages HTML), parse, write (CSV/Parquet) et image
+(telechargement des couvertures) alimentent chacune un histogramme a seaux
+fixes; les compteurs suivent les octets recus, les reessais, les erreurs et
+le temps passe a attendre la limite de debit, les jauges le debit adaptatif
+courant. Tant que les metriques ne sont pas activees, observe(), increment()
+et set_gauge() se limitent a un test sur None.
+
+Exposition: une ligne JSON periodique (metrics.jsonl du dossier de sortie),
+un bilan en fin de run et, en option, un fichier texte au format Prometheus
+(collecteur textfile de node_exporter).
+"""
+import os
+import json
+import time
+import bisect
+import threading
+from datetime import datetime
+
+try:
+    from settings import METRICS_INTERVAL, METRICS_STAGES, METRICS_COUNTERS, METRICS_GAUGES, LATENCY_BUCKETS
+    from log import get_logger
+except ImportError:
+    from .settings import METRICS_INTERVAL, METRICS_STAGES, METRICS_COUNTERS, METRICS_GAUGES, LATENCY_BUCKETS
+    from .log import get_logger
+
+_metrics = None
+_reporter = None
+
+logger = get_logger('metrics')
+
+class Histogram:
+    """
+    Histogramme de durees a seaux fixes (bornes superieures en secondes)
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, fraction):
+        """
+        Quantile estime par interpolation lineaire dans le seau qui le contient,
+        borne par la plus grande duree observee
+        """
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= target:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                # Le dernier seau n'a pas de borne: on s'arrete a la plus grande
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return min(lower + (upper - lower) * (target - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'seconds': round(self.sum, 4),
+            'mean_ms': round(self.sum / self.count * 1000, 2) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.50) * 1000, 2),
+            'p99_ms': round(self.quantile(0.99) * 1000, 2),
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+class CrawlMetrics:
+    """
+    Compteurs et histogrammes partages par tous les threads du crawl
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counters = dict.fromkeys(METRICS_COUNTERS, 0)
+        self.gauges = dict.fromkeys(METRICS_GAUGES)
+        self.histograms = {stage: Histogram() for stage in METRICS_STAGES}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self.histograms[stage].observe(seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        """
+        Etat courant, pret pour json.dumps
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            fetches = self.histograms['fetch'].count
+            return {
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'elapsed_seconds': round(elapsed, 3),
+                'pages_per_second': round(fetches / elapsed, 2) if elapsed else 0.0,
+                'counters': {name: round(value, 4) if isinstance(value, float) else value
+                             for name, value in self.counters.items()},
+                'gauges': {name: round(value, 4) for name, value in self.gauges.items() if value is not None},
+                'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+            }
+
+    def prometheus_text(self):
+        """
+        Metriques au format texte d'exposition Prometheus
+        """
+        lines = [
+            '# HELP scraper_stage_seconds Duree des etapes du crawl (fetch, parse, write, image)',
+            '# TYPE scraper_stage_seconds histogram',
+        ]
+        with self._lock:
+            for stage, histogram in self.histograms.items():
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            for name, value in self.counters.items():
+                lines.append(f'# TYPE scraper_{name}_total counter')
+                lines.append(f'scraper_{name}_total {value}')
+            for name, value in self.gauges.items():
+                if value is not None:
+                    lines.append(f'# TYPE scraper_{name} gauge')
+                    lines.append(f'scraper_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+class MetricsReporter:
+    """
+    Thread qui publie les metriques a intervalle regulier: ligne JSON et fichier Prometheus
+    """
+    def __init__(self, metrics, jsonl_path=None, prometheus_path=None, interval=METRICS_INTERVAL):
+        self.metrics = metrics
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-reporter', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.publish()
+
+    def publish(self):
+        """
+        Ajoute une ligne au fichier JSON et reecrit le fichier Prometheus
+        """
+        try:
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(self.metrics.snapshot()) + '\n')
+            if self.prometheus_path:
+                # Renommage atomique: le collecteur ne lit jamais un fichier a moitie ecrit
+                with open(self.prometheus_path + '.tmp', 'w', encoding='utf-8') as file:
+                    file.write(self.metrics.prometheus_text())
+                os.replace(self.prometheus_path + '.tmp', self.prometheus_path)
+        except OSError as e:
+            logger.error("Erreur d'ecriture des metriques: %s", e)
+
+    def close(self):
+        """
+        Arrete le thread et publie l'etat final
+        """
+        self._stop.set()
+        self._thread.join()
+        self.publish()
+
+def enable_metrics(jsonl_path=None, prometheus_path=None, interval=METRICS_INTERVAL):
+    """
+    Active la collecte des metriques et leur publication periodique
+    """
+    global _metrics, _reporter
+    _metrics = CrawlMetrics()
+    _reporter = MetricsReporter(_metrics, jsonl_path, prometheus_path, interval)
+    outputs = ', '.join(path for path in (jsonl_path, prometheus_path) if path)
+    logger.info("Metriques actives (toutes les %s s%s)", interval, f" dans {outputs}" if outputs else "")
+    return _metrics
+
+def get_metrics():
+    """
+    Metriques actives, ou None
+    """
+    return _metrics
+
+def observe(stage, started):
+    """
+    Enregistre la duree d'une etape commencee a `started` (time.perf_counter())
+    """
+    if _metrics is not None:
+        _metrics.observe(stage, time.perf_counter() - started)
+
+def increment(name, value=1):
+    """
+    Incremente un compteur (octets, reessais, erreurs, attente...)
+    """
+    if _metrics is not None:
+        _metrics.increment(name, value)
+
+def set_gauge(name, value):
+    """
+    Met a jour une jauge (debit adaptatif courant...)
+    """
+    if _metrics is not None:
+        _metrics.set_gauge(name, value)
+
+def pause(seconds):
+    """
+    time.sleep() compte dans le temps d'attente de la limite de debit
+    """
+    if seconds > 0:
+        time.sleep(seconds)
+        increment('sleep_seconds', seconds)
+
+def print_metrics_summary():
+    """
+    Affiche le bilan des metriques du run
+    """
+    if _metrics is None:
+        return
+    snapshot = _metrics.snapshot()
+    counters = snapshot['counters']
+    logger.info("Metriques du crawl (%.1f s, %s pages/s):", snapshot['elapsed_seconds'], snapshot['pages_per_second'])
+    for stage, summary in snapshot['stages'].items():
+        if summary['count']:
+            logger.info("  %-6s: %6d appels, %.2f s au total, moyenne %s ms, p50 %s ms, p99 %s ms", stage, summary['count'],
+                        summary['seconds'], summary['mean_ms'], summary['p50_ms'], summary['p99_ms'])
+    logger.info("  Octets recus: %.2f Mo, reessais: %d, erreurs: %d, attente limite de debit: %.2f s",
+                counters['http_bytes'] / 1024 / 1024, counters['retries'], counters['fetch_errors'], counters['sleep_seconds'])
+
+def close_metrics():
+    """
+    Publie l'etat final des metriques et affiche le bilan
+    """
+    global _metrics, _reporter
+    if _metrics is None:
+        return
+    _reporter.close()
+    print_metrics_summary()
+    _metrics = None
+    _reporter = None
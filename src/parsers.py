@@ -2,109 +2,353 @@
 """
 Fonctions de parsing HTML pour le scraper
 """
-import requests
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
 import time
+import threading
 
 try:
-    from settings import BASE_URL, HEADERS, TIMEOUT, SELECTORS, DEFAULT_MAX_PAGES
-    from utils import clean_filename, format_price, rating_to_stars
+    from settings import BASE_URL, HEADERS, TIMEOUT, SELECTORS, DEFAULT_MAX_PAGES, DEFAULT_PARSER, PARSER_BACKENDS, PRODUCT_INFO_FIELDS
+    from utils import clean_filename, format_price, rating_to_stars, product_info_value
+    from session import fetch_page, cached_record, remember_record
+    from metrics import observe, increment
+    from throttle import acquire
+    from log import get_logger, configure_worker_logging, log_level, progress
+    from frontier import normalize_url
+    import fast_parsers
 except ImportError:
-    from .settings import BASE_URL, HEADERS, TIMEOUT, SELECTORS, DEFAULT_MAX_PAGES
-    from .utils import clean_filename, format_price, rating_to_stars
+    from .settings import BASE_URL, HEADERS, TIMEOUT, SELECTORS, DEFAULT_MAX_PAGES, DEFAULT_PARSER, PARSER_BACKENDS, PRODUCT_INFO_FIELDS
+    from .utils import clean_filename, format_price, rating_to_stars, product_info_value
+    from .session import fetch_page, cached_record, remember_record
+    from .metrics import observe, increment
+    from .throttle import acquire
+    from .log import get_logger, configure_worker_logging, log_level, progress
+    from .frontier import normalize_url
+    from . import fast_parsers
 
-def get_soup(url):
+_parser_backend = DEFAULT_PARSER
+_verify_backends = False
+_backend_mismatches = 0
+# Les ecarts sont comptes depuis les threads --workers quand il n'y a pas de pool
+_mismatch_lock = threading.Lock()
+_parse_pool = None
+
+logger = get_logger('parsers')
+
+def set_parser_backend(backend, verify=False):
     """
-    Recupere et parse une page HTML
+    Choisit le backend de parsing des pages liste et livre: 'bs4' ou 'lxml'.
+    Avec verify=True, chaque page livre est aussi parsee par BeautifulSoup
+    et les ecarts entre les deux enregistrements sont signales.
+    """
+    global _parser_backend, _verify_backends
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Backend de parsing inconnu: {backend} (choix: {', '.join(PARSER_BACKENDS)})")
+    if (backend == 'lxml' or verify) and fast_parsers.lxml is None:
+        raise RuntimeError("Le backend lxml necessite lxml: pip install lxml")
+    _parser_backend = backend
+    _verify_backends = verify
+    logger.info("Backend de parsing: %s%s", backend, " (verification contre bs4)" if verify else "")
+
+def set_base_url(base_url):
+    """
+    Change le site cible (miroir, serveur local de benchmark): page d'accueil,
+    URLs des categories, des livres et des couvertures
+    """
+    global BASE_URL
+    BASE_URL = base_url if base_url.endswith('/') else base_url + '/'
+    logger.info("Site cible: %s", BASE_URL)
+
+def get_base_url():
+    """
+    URL du site cible
+    """
+    return BASE_URL
+
+def backend_mismatches():
+    """
+    Nombre de pages livres ou les backends ont donne des resultats differents
+    """
+    return _backend_mismatches
+
+def build_book_url(list_url, book_href):
+    """
+    Construit l'URL absolue d'un livre depuis le lien relatif d'une page liste
+    """
+    return normalize_url(book_href, list_url)
+
+def build_next_page_url(list_url, next_href):
+    """
+    Construit l'URL de la page liste suivante
+    """
+    return normalize_url(next_href, list_url)
+
+def build_image_url(product_url, image_src):
+    """
+    Construit l'URL absolue de la couverture d'un livre depuis sa page
+    """
+    return normalize_url(image_src, product_url)
+
+def make_soup(content):
     """
+    Construit l'arbre BeautifulSoup a partir du contenu brut d'une page
+    """
+    return BeautifulSoup(content, 'html.parser')
+
+def get_page(url):
+    """
+    Recupere le contenu brut d'une page
+    Retourne (contenu, resultat deja parse si la page n'a pas change) ou None en cas d'erreur
+    """
+    acquire()
+    started = time.perf_counter()
     try:
-        response = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        response.raise_for_status()
-        return BeautifulSoup(response.content, 'html.parser')
+        content, not_modified = fetch_page(url)
+        observe('fetch', started)
+        return content, cached_record(url) if not_modified else None
     except Exception as e:
-        print(f"Erreur lors du chargement de {url}: {e}")
+        observe('fetch', started)
+        increment('fetch_errors')
+        progress('errors')
+        logger.error("Erreur lors du chargement de %s: %s", url, e)
         return None
 
-def get_category_links(main_url=BASE_URL):
+def get_soup(url):
+    """
+    Recupere et parse une page HTML
+    """
+    page = get_page(url)
+    return make_soup(page[0]) if page else None
+
+def get_category_links(main_url=None):
     """
-    Recupere tous les liens de categories depuis la page d'accueil
+    Recupere tous les liens de categories depuis la page d'accueil (defaut: celle du site cible)
+    """
+    logger.info("Extraction des liens de categories...")
+    soup = get_soup(main_url or BASE_URL)
+    category_links = extract_category_links(soup, main_url or BASE_URL) if soup else []
+    
+    logger.info("%d categories trouvees", len(category_links))
+    return category_links
+
+def extract_category_links(soup, page_url=None):
+    """
+    Extrait les liens de categories d'une page d'accueil deja parsee
+    (liens resolus contre `page_url`, par defaut l'accueil du site cible)
     """
-    print("Extraction des liens de categories...")
-    soup = get_soup(main_url)
     category_links = []
     
-    if soup:
-        try:
-            categories_section = soup.find('ul', class_='nav nav-list')
-            if categories_section:
-                links = categories_section.find_all('a')
-                for link in links[1:]:
-                    href = link['href']
-                    full_url = BASE_URL + href
-                    category_name = link.text.strip()
-                    category_links.append({
-                        'url': full_url,
-                        'name': category_name
-                    })
-                    print(f"  {category_name}")
-        except Exception as e:
-            print(f"Erreur lors de l'extraction des categories: {e}")
+    try:
+        categories_section = soup.find('ul', class_='nav nav-list')
+        if categories_section:
+            links = categories_section.find_all('a')
+            for link in links[1:]:
+                href = link['href']
+                full_url = normalize_url(href, page_url or BASE_URL)
+                category_name = link.text.strip()
+                category_links.append({
+                    'url': full_url,
+                    'name': category_name
+                })
+                logger.debug("  %s", category_name)
+    except Exception as e:
+        logger.error("Erreur lors de l'extraction des categories: %s", e)
     
-    print(f"{len(category_links)} categories trouvees")
     return category_links
 
 def parse_list_page(list_url, category_name):
     """
     Parse une page liste de livres et extrait les URLs des livres
     """
-    print(f"  Parsing page liste: {list_url}")
-    soup = get_soup(list_url)
+    logger.debug("  Parsing page liste: %s", list_url)
+    page = get_page(list_url)
+    
+    if not page:
+        book_urls, next_page_url = [], None
+    elif page[1] is not None:
+        book_urls, next_page_url = page[1]
+    else:
+        book_urls, next_page_url = extract_list_content(page[0], list_url)
+        remember_record(list_url, [book_urls, next_page_url])
+    
+    progress('pages')
+    logger.debug("  %d livres trouves sur cette page", len(book_urls))
+    return book_urls, next_page_url
+
+def extract_list_page(soup, list_url):
+    """
+    Extrait les URLs des livres et l'URL de la page suivante d'une page liste deja parsee
+    """
     book_urls = []
     next_page_url = None
     
-    if soup:
-        try:
-            book_containers = soup.select(SELECTORS['book_containers'])
-            
-            for container in book_containers:
-                link = container.find('h3').find('a') if container.find('h3') else None
-                if link and link.get('href'):
-                    book_href = link['href']
-                    if book_href.startswith('../../../'):
-                        book_url = book_href.replace('../../../', BASE_URL + 'catalogue/')
-                    elif book_href.startswith('../../..'):
-                        book_url = book_href.replace('../../..', BASE_URL)
-                    else:
-                        book_url = BASE_URL + 'catalogue/' + book_href.replace('../', '')
-                    
-                    book_urls.append(book_url)
-            
-            next_link = soup.select_one(SELECTORS['next_page'])
-            if next_link and next_link.get('href'):
-                next_href = next_link['href']
-                if list_url.endswith('index.html'):
-                    next_page_url = list_url.replace('index.html', next_href)
-                else:
-                    base_url = '/'.join(list_url.split('/')[:-1]) + '/'
-                    next_page_url = base_url + next_href
-            
-        except Exception as e:
-            print(f"Erreur lors du parsing de la page liste: {e}")
+    try:
+        book_containers = soup.select(SELECTORS['book_containers'])
+        
+        for container in book_containers:
+            link = container.find('h3').find('a') if container.find('h3') else None
+            if link and link.get('href'):
+                book_urls.append(build_book_url(list_url, link['href']))
+        
+        next_link = soup.select_one(SELECTORS['next_page'])
+        if next_link and next_link.get('href'):
+            next_page_url = build_next_page_url(list_url, next_link['href'])
+        
+    except Exception as e:
+        logger.error("Erreur lors du parsing de la page liste: %s", e)
     
-    print(f"  {len(book_urls)} livres trouves sur cette page")
     return book_urls, next_page_url
 
 def parse_product_page(product_url, category_name):
     """
     Parse une page detail d'un livre et extrait les informations
     """
-    print(f"    Parsing livre: {product_url}")
-    soup = get_soup(product_url)
-    book_data = {}
+    page = fetch_product_page(product_url)
     
-    if not soup:
+    if not page:
         return None
     
+    if page[1] is not None:
+        return dict(page[1], category=category_name, product_url=product_url)
+    
+    book_data = parse_product_content(page[0], product_url, category_name)
+    if book_data:
+        progress('books')
+    remember_record(product_url, book_data)
+    return book_data
+
+def parse_product_content(content, product_url, category_name):
+    """
+    Parse le contenu brut d'une page livre: dans le pool de processus s'il
+    est demarre, sinon dans le thread appelant
+    """
+    if _parse_pool is None:
+        return extract_product_content(content, product_url, category_name)
+    
+    # Seul le contenu brut part vers le processus, seul le dictionnaire revient
+    started = time.perf_counter()
+    if _verify_backends:
+        book_data, fields = _parse_pool.submit(parse_product_verified, content, product_url, category_name,
+                                               _parser_backend).result()
+        record_mismatch(product_url, fields)
+    else:
+        book_data = _parse_pool.submit(parse_product_bytes, content, product_url, category_name, _parser_backend).result()
+    observe('parse', started)
+    if book_data:
+        logger.debug("    '%s' - £%s", book_data['title'], book_data['price'])
+    return book_data
+
+def fetch_product_page(product_url):
+    """
+    Recupere la page d'un livre sans la parser
+    Retourne (contenu, resultat deja parse si la page n'a pas change) ou None
+    """
+    logger.debug("    Parsing livre: %s", product_url)
+    return get_page(product_url)
+
+def parse_product_bytes(content, product_url, category_name, backend=DEFAULT_PARSER):
+    """
+    Parse le contenu brut d'une page livre avec le backend demande.
+    Fonction de module sans etat partage: executable dans un processus de parsing.
+    """
+    if backend == 'lxml':
+        return fast_parsers.extract_product_lxml(content, product_url, category_name)
+    return extract_product(make_soup(content), product_url, category_name)
+
+def parse_product_verified(content, product_url, category_name, backend=DEFAULT_PARSER):
+    """
+    parse_product_bytes avec comparaison bs4/lxml (--verify-parser dans un
+    processus de parsing): retourne (livre, champs en ecart)
+    """
+    reference = extract_product(make_soup(content), product_url, category_name)
+    candidate = fast_parsers.extract_product_lxml(content, product_url, category_name)
+    book_data = candidate if backend == 'lxml' else reference
+    return book_data, mismatched_fields(reference, candidate)
+
+def mismatched_fields(reference, candidate):
+    """
+    Champs dont la valeur differe entre les enregistrements bs4 et lxml
+    """
+    if reference == candidate:
+        return []
+    return sorted(key for key in set(reference or {}) | set(candidate or {})
+                  if (reference or {}).get(key) != (candidate or {}).get(key))
+
+def record_mismatch(product_url, fields):
+    """
+    Compte et signale une page livre ou les backends different
+    """
+    global _backend_mismatches
+    if fields:
+        with _mismatch_lock:
+            _backend_mismatches += 1
+        logger.warning("    Ecart bs4/lxml sur %s: %s", product_url, ', '.join(fields))
+
+def start_parse_pool(processes):
+    """
+    Demarre un pool de processus pour parser les pages livres hors du GIL
+    """
+    global _parse_pool
+    close_parse_pool()
+    _parse_pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_parse_worker,
+                                      initargs=(BASE_URL, log_level()))
+    logger.info("Parsing des pages livres dans %d processus", processes)
+    return _parse_pool
+
+def _init_parse_worker(base_url, level):
+    # Les processus de parsing visent le meme site (liens des categories resolus par defaut
+    # contre son accueil) et journalisent au meme niveau que le processus principal
+    global BASE_URL
+    BASE_URL = base_url
+    configure_worker_logging(level)
+
+def close_parse_pool():
+    """
+    Arrete le pool de processus de parsing s'il existe
+    """
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown()
+        _parse_pool = None
+
+def extract_list_content(content, list_url):
+    """
+    Extrait les URLs d'une page liste depuis son contenu brut avec le backend actif
+    """
+    started = time.perf_counter()
+    if _parser_backend == 'lxml':
+        result = fast_parsers.extract_list_page_lxml(content, list_url)
+    else:
+        result = extract_list_page(make_soup(content), list_url)
+    observe('parse', started)
+    return result
+
+def extract_product_content(content, product_url, category_name):
+    """
+    Extrait un livre depuis le contenu brut de sa page avec le backend actif
+    """
+    started = time.perf_counter()
+    if _parser_backend == 'lxml':
+        book_data = fast_parsers.extract_product_lxml(content, product_url, category_name)
+    else:
+        book_data = extract_product(make_soup(content), product_url, category_name)
+    observe('parse', started)
+    
+    if _verify_backends:
+        reference = extract_product(make_soup(content), product_url, category_name)
+        candidate = fast_parsers.extract_product_lxml(content, product_url, category_name)
+        record_mismatch(product_url, mismatched_fields(reference, candidate))
+    
+    if book_data:
+        logger.debug("    '%s' - £%s", book_data['title'], book_data['price'])
+    return book_data
+
+def extract_product(soup, product_url, category_name):
+    """
+    Extrait les informations d'un livre depuis sa page detail deja parsee
+    """
+    book_data = {}
+    
     try:
         title_elem = soup.find('h1')
         book_data['title'] = title_elem.text.strip() if title_elem else 'Titre non trouve'
@@ -128,19 +372,22 @@ def parse_product_page(product_url, category_name):
         
         image_elem = soup.find('div', class_='item').find('img') if soup.find('div', class_='item') else None
         if image_elem and image_elem.get('src'):
-            image_src = image_elem['src']
-            if image_src.startswith('../../'):
-                book_data['image_url'] = BASE_URL + image_src.replace('../../', '')
-            else:
-                book_data['image_url'] = BASE_URL + image_src
+            book_data['image_url'] = build_image_url(product_url, image_elem['src'])
+        
+        table = soup.find('table')
+        if table:
+            for row in table.find_all('tr'):
+                header = row.find('th')
+                value = row.find('td')
+                field = PRODUCT_INFO_FIELDS.get(header.text.strip()) if header else None
+                if field and value:
+                    book_data[field] = product_info_value(field, value.text)
         
         book_data['category'] = category_name
         book_data['product_url'] = product_url
         
-        print(f"    '{book_data['title']}' - £{book_data['price']}")
-        
     except Exception as e:
-        print(f"Erreur lors du parsing du livre {product_url}: {e}")
+        logger.error("Erreur lors du parsing du livre %s: %s", product_url, e)
         return None
     
     return book_data
\ No newline at end of file
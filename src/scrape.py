@@ -3,61 +3,355 @@
 Script principal du scraper de livres avec CLI avancee
 """
 import argparse
-import time
+import logging
 import os
 import sys
+from functools import partial
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
-    from settings import BASE_URL, DEFAULT_DELAY, TIMEOUT, DEFAULT_MAX_PAGES, DEFAULT_OUTDIR
-    from parsers import get_category_links, parse_list_page, parse_product_page
-    from utils import write_csv, download_image, clean_filename, set_output_directory
+    from settings import (BASE_URL, DEFAULT_DELAY, TIMEOUT, DEFAULT_MAX_PAGES, DEFAULT_OUTDIR, DEFAULT_ENGINE, DEFAULT_PARSER,
+                          ASYNC_LIMIT_PER_HOST, HTTP_POOL_SIZE, HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB,
+                          CHECKPOINT_FILE, VISITED_FILE, PARSER_BACKENDS, IMAGE_WORKERS, OUTPUT_FORMATS, DEFAULT_FORMAT, SQLITE_FILE,
+                          METRICS_INTERVAL, METRICS_FILE, THROTTLE_MIN_RATE, THROTTLE_MAX_RATE)
+    from parsers import (get_category_links, parse_list_page, parse_product_page, set_parser_backend, backend_mismatches, set_base_url,
+                         start_parse_pool, close_parse_pool)
+    from utils import (open_csv_sink, open_parquet_sink, concat_csv, download_images, clean_filename,
+                        set_output_directory, set_output_format, RateLimiter)
+    from async_engine import run_async_crawl
+    from session import configure_session, enable_cache, print_connection_stats
+    from journal import open_journal, get_journal, close_journal
+    from thumbnails import enable_thumbnails, thumbnails_enabled, generate_derivatives, close_thumbnails
+    from dedup import reset_book_index, get_book_index
+    from frontier import Frontier, LIST_PAGE, open_visited, get_visited, close_visited
+    from store import open_store, get_store, close_store
+    from metrics import enable_metrics, close_metrics, pause
+    from throttle import enable_throttle, close_throttle
+    from log import get_logger, configure_logging, close_logging
 except ImportError:
-    from .settings import BASE_URL, DEFAULT_DELAY, TIMEOUT, DEFAULT_MAX_PAGES, DEFAULT_OUTDIR
-    from .parsers import get_category_links, parse_list_page, parse_product_page
-    from .utils import write_csv, download_image, clean_filename, set_output_directory
+    from .settings import (BASE_URL, DEFAULT_DELAY, TIMEOUT, DEFAULT_MAX_PAGES, DEFAULT_OUTDIR, DEFAULT_ENGINE, DEFAULT_PARSER,
+                           ASYNC_LIMIT_PER_HOST, HTTP_POOL_SIZE, HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB,
+                           CHECKPOINT_FILE, VISITED_FILE, PARSER_BACKENDS, IMAGE_WORKERS, OUTPUT_FORMATS, DEFAULT_FORMAT, SQLITE_FILE,
+                           METRICS_INTERVAL, METRICS_FILE, THROTTLE_MIN_RATE, THROTTLE_MAX_RATE)
+    from .parsers import (get_category_links, parse_list_page, parse_product_page, set_parser_backend, backend_mismatches, set_base_url,
+                          start_parse_pool, close_parse_pool)
+    from .utils import (open_csv_sink, open_parquet_sink, concat_csv, download_images, clean_filename,
+                         set_output_directory, set_output_format, RateLimiter)
+    from .async_engine import run_async_crawl
+    from .session import configure_session, enable_cache, print_connection_stats
+    from .journal import open_journal, get_journal, close_journal
+    from .thumbnails import enable_thumbnails, thumbnails_enabled, generate_derivatives, close_thumbnails
+    from .dedup import reset_book_index, get_book_index
+    from .frontier import Frontier, LIST_PAGE, open_visited, get_visited, close_visited
+    from .store import open_store, get_store, close_store
+    from .metrics import enable_metrics, close_metrics, pause
+    from .throttle import enable_throttle, close_throttle
+    from .log import get_logger, configure_logging, close_logging
 
-def scrape_category(category_url, category_name, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES):
+logger = get_logger('scrape')
+
+def scrape_category(category_url, category_name, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, workers=1, rate_limiter=None):
     """
     Scrape tous les livres d'une categorie avec limite de pages
     """
-    print(f"Scraping de la categorie: {category_name}")
-    print(f"URL: {category_url}")
+    logger.info("Scraping de la categorie: %s", category_name)
+    logger.info("URL: %s", category_url)
     if max_pages:
-        print(f"Limite: {max_pages} pages maximum")
+        logger.info("Limite: %s pages maximum", max_pages)
     
-    all_books = []
-    current_page_url = category_url
-    page_count = 1
+    all_books = list(iter_category_books(category_url, category_name, delay, max_pages, workers, rate_limiter))
     
-    while current_page_url:
-        print(f"  Page {page_count}")
-        
-        book_urls, next_page_url = parse_list_page(current_page_url, category_name)
+    logger.info("Categorie '%s' terminee: %s livres scrapes", category_name, len(all_books))
+    return all_books
+
+def iter_category_books(category_url, category_name, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, workers=1, rate_limiter=None):
+    """
+    Generateur des livres d'une categorie, dans l'ordre du site, des qu'ils sont parses.
+    Utilise le pipeline concurrent avec plusieurs workers ou un limiteur partage.
+    """
+    index = get_book_index()
+    resumed_books = resume_category(category_name)
+    if resumed_books is not None:
+        books = (book for book in resumed_books if index is None or index.claim_url(book['product_url']))
+    elif workers > 1 or rate_limiter is not None:
+        books = iter_category_concurrent(category_url, category_name, delay, max_pages, workers, rate_limiter)
+    else:
+        books = iter_category_serial(category_url, category_name, delay, max_pages)
+    
+    book_urls = []
+    for book_data in books:
+        if index and not index.claim_upc(book_data.get('upc')):
+            logger.debug("    Doublon ignore (UPC %s): %s", book_data['upc'], book_data['title'])
+            continue
+        book_urls.append(book_data['product_url'])
+        yield book_data
+    
+    if resumed_books is not None:
+        return
+    
+    journal = get_journal()
+    if journal:
+        journal.complete_category(category_name, book_urls)
+
+def iter_category_serial(category_url, category_name, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES):
+    """
+    Parcours serie d'une categorie: la frontiere est depilee dans ce thread
+    (pages liste puis livres), pause de `delay` avant chaque requete
+    """
+    frontier = Frontier(category_url, max_pages)
+    wait = partial(pause, delay)
+    
+    while True:
+        task = frontier.pop()
+        if task is None:
+            break
+        book_data = crawl_task(frontier, task, category_name, wait)
+        if book_data:
+            yield book_data
+
+def resume_category(category_name):
+    """
+    Livres d'une categorie deja terminee dans le journal de reprise, ou None
+    """
+    journal = get_journal()
+    books = journal.category_books(category_name) if journal else None
+    if books is not None:
+        logger.info("Categorie '%s' reprise depuis le journal: %s livres", category_name, len(books))
+    return books
+
+def crawl_task(frontier, task, category_name, wait):
+    """
+    Execute une tache de la frontiere. Une page liste y ajoute ses livres et
+    la page suivante; une page livre rend son enregistrement ou None.
+    `wait` est appele avant chaque requete (pause fixe ou limite de debit).
+    """
+    kind, url = task
+    try:
+        if kind == LIST_PAGE:
+            wait()
+            book_urls, next_page_url = parse_list_page(url, category_name)
+            frontier.push_products(book_urls)
+            if next_page_url:
+                frontier.push_list(next_page_url)
+            return None
+        return fetch_book(url, category_name, wait)
+    finally:
+        frontier.task_done()
+
+def fetch_book(book_url, category_name, wait):
+    """
+    Livre d'une page produit: repris du journal, sinon telecharge, journalise
+    et marque comme visite. Un livre enregistre lors d'un run precedent sous
+    une autre categorie n'est pas redemande (None).
+    """
+    journal = get_journal()
+    book_data = journal.get_book(category_name, book_url) if journal else None
+    if book_data is not None:
+        return book_data
+    
+    visited = get_visited()
+    if visited is not None and book_url in visited:
+        logger.debug("    Deja enregistre lors d'un run precedent: %s", book_url)
+        return None
+    
+    wait()
+    book_data = parse_product_page(book_url, category_name)
+    if book_data:
+        if journal:
+            journal.add_book(book_data)
+        if visited is not None:
+            visited.add(book_url)
+    return book_data
+
+def iter_category_concurrent(category_url, category_name, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, workers=4, rate_limiter=None):
+    """
+    Parcours d'une categorie par un pool de threads borne qui se partage la
+    frontiere: les pages liste passent devant les livres deja decouverts.
+    Le delai devient une limite de debit globale partagee par tous les workers.
+    """
+    limiter = rate_limiter or RateLimiter(delay)
+    frontier = Frontier(category_url, max_pages)
+    pending = deque()
+    list_futures = []
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            task = frontier.pop()
+            if task is None:
+                break
+            future = executor.submit(crawl_task, frontier, task, category_name, limiter.wait)
+            if task[0] == LIST_PAGE:
+                list_futures.append(future)
+                continue
+            pending.append(future)
+            
+            # Resultats rendus dans l'ordre des URLs: meme sortie que le mode serie.
+            # Le nombre de taches en vol reste borne, la memoire aussi.
+            while len(pending) > workers * 2:
+                book_data = pending.popleft().result()
+                if book_data:
+                    yield book_data
         
-        for book_url in book_urls:
-            book_data = parse_product_page(book_url, category_name)
+        while pending:
+            book_data = pending.popleft().result()
             if book_data:
-                all_books.append(book_data)
+                yield book_data
+    
+    for future in list_futures:
+        future.result()
+
+class CategoryOutput:
+    """
+    Sorties d'une categorie alimentees livre par livre: son CSV (`filename`,
+    par defaut le nom de la categorie), sa partition Parquet, le catalogue
+    SQLite et le CSV global si fourni. Avec images, seuls les champs utiles
+    aux couvertures sont conserves pour le telechargement de fin de categorie.
+    """
+    def __init__(self, category_name, filename=None, global_sink=None, images=False):
+        self.category_name = category_name
+        self.filename = filename or f"{clean_filename(category_name)}.csv"
+        self.written = None
+        self.image_books = [] if images else None
+        self._sink = open_csv_sink(self.filename)
+        self._parquet_sink = open_parquet_sink(category_name)
+        self._store = get_store()
+        self._global_sink = global_sink
+
+    @property
+    def count(self):
+        return self._sink.count
+
+    def write(self, book_data):
+        self._sink.write(book_data)
+        if self._parquet_sink:
+            self._parquet_sink.write(book_data)
+        if self._store:
+            self._store.write(book_data)
+        if self._global_sink:
+            self._global_sink.write(book_data)
+        if self.image_books is not None:
+            self.image_books.append({key: book_data.get(key) for key in ('image_url', 'upc', 'product_url')})
+
+    def close(self):
+        """
+        Finalise les fichiers de la categorie. Retourne le nom du CSV ecrit par
+        ce run, ou None s'il n'a produit aucun livre (l'ancien CSV est ignore)
+        """
+        if self._sink.close():
+            self.written = self.filename
+        if self._parquet_sink:
+            self._parquet_sink.close()
+        return self.written
+
+    def abort(self):
+        """
+        Abandonne les fichiers temporaires: les sorties precedentes restent en place
+        """
+        self._sink.abort()
+        if self._parquet_sink:
+            self._parquet_sink.abort()
+
+def scrape_category_to_csv(category, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, workers=1, rate_limiter=None, global_sink=None,
+                           images=False, image_workers=IMAGE_WORKERS, filename=None):
+    """
+    Scrape une categorie en ecrivant chaque livre dans ses sorties (CategoryOutput)
+    des qu'il est parse. Si le crawl echoue ou est interrompu, les CSV precedents
+    restent en place. Avec images, les couvertures sont telechargees a la fin
+    de la categorie. Retourne le nombre de livres et le CSV finalise (ou None).
+    """
+    logger.info("Scraping de la categorie: %s", category['name'])
+    logger.info("URL: %s", category['url'])
+    if max_pages:
+        logger.info("Limite: %s pages maximum", max_pages)
+    
+    output = CategoryOutput(category['name'], filename, global_sink, images)
+    try:
+        for book_data in iter_category_books(category['url'], category['name'], delay, max_pages, workers, rate_limiter):
+            output.write(book_data)
+    except BaseException:
+        output.abort()
+        raise
+    written = output.close()
+    
+    logger.info("Categorie '%s' terminee: %s livres scrapes", category['name'], output.count)
+    
+    if images:
+        download_category_images(output.image_books, category['name'], image_workers)
+    return output.count, written
+
+def scrape_categories_serial(categories, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, workers=1, output_file=None,
+                             images=False, image_workers=IMAGE_WORKERS):
+    """
+    Scrape les categories l'une apres l'autre, en flux vers les CSV
+    par categorie et vers le CSV global. Retourne le nombre de livres.
+    """
+    global_sink = open_csv_sink(output_file) if output_file else None
+    total_books = 0
+    
+    try:
+        for i, category in enumerate(categories, 1):
+            logger.info("=" * 50)
+            logger.info("Categorie %s/%s: %s", i, len(categories), category['name'])
+            logger.info("=" * 50)
             
-            time.sleep(delay)
-        
-        current_page_url = next_page_url
-        page_count += 1
-        
-        if max_pages and page_count > max_pages:
-            print(f"  Limite de {max_pages} pages atteinte")
-            break
+            count, _ = scrape_category_to_csv(category, delay, max_pages, workers, None, global_sink, images, image_workers)
+            total_books += count
             
-        if current_page_url:
-            time.sleep(delay)
+            if i < len(categories):
+                logger.info("Attente avant la categorie suivante...")
+                pause(delay * 2)
+    except BaseException:
+        if global_sink:
+            global_sink.abort()
+        raise
+    if global_sink:
+        logger.info("Sauvegarde globale dans %s", output_file)
+        global_sink.close()
+    
+    return total_books
+
+def scrape_categories_parallel(categories, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, workers=1, category_parallelism=4,
+                               output_file=None, images=False, image_workers=IMAGE_WORKERS):
+    """
+    Scrape plusieurs categories en meme temps avec un budget de requetes commun.
+    Le CSV de chaque categorie est finalise des qu'elle se termine; le CSV
+    global est ensuite assemble dans l'ordre des categories (deterministe),
+    a partir des seuls CSV finalises par ce run. Retourne le nombre de livres.
+    """
+    limiter = RateLimiter(delay)
+    total_books = 0
+    written = {}
+    
+    logger.info("Scraping de %s categories, %s en parallele", len(categories), category_parallelism)
+    
+    with ThreadPoolExecutor(max_workers=category_parallelism) as executor:
+        futures = {
+            executor.submit(scrape_category_to_csv, category, delay, max_pages, workers, limiter, None,
+                            images, image_workers): category
+            for category in categories
+        }
+        
+        for done, future in enumerate(as_completed(futures), 1):
+            count, written[futures[future]['name']] = future.result()
+            total_books += count
+            logger.info("Categorie %s/%s terminee: %s", done, len(categories), futures[future]['name'])
     
-    print(f"Categorie '{category_name}' terminee: {len(all_books)} livres scrapes")
-    return all_books
+    if output_file:
+        logger.info("Sauvegarde globale dans %s", output_file)
+        concat_csv([written[category['name']] for category in categories if written[category['name']]], output_file)
+    
+    return total_books
 
-def scrape_selected_categories(category_names, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, output_file=None):
+def scrape_selected_categories(category_names, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, output_file=None, workers=1,
+                               engine=DEFAULT_ENGINE, connections=ASYNC_LIMIT_PER_HOST, category_parallelism=1,
+                               images=False, image_workers=IMAGE_WORKERS):
     """
     Scrape seulement les categories specifiees
     """
+    if engine == 'async':
+        return scrape_categories_async(category_names, delay, max_pages, output_file, connections, images, image_workers)
+    
     categories = get_category_links()
     selected_categories = []
     
@@ -69,42 +363,33 @@ def scrape_selected_categories(category_names, delay=DEFAULT_DELAY, max_pages=DE
                 found = True
                 break
         if not found:
-            print(f"Attention: Categorie '{category_name}' non trouvee")
+            logger.warning("Attention: Categorie '%s' non trouvee", category_name)
     
     if not selected_categories:
-        print("Aucune categorie valide specifiee")
+        logger.warning("Aucune categorie valide specifiee")
         available_categories = [cat['name'] for cat in categories]
-        print(f"Categories disponibles: {', '.join(available_categories)}")
+        logger.info("Categories disponibles: %s", ', '.join(available_categories))
         return
     
-    print(f"Scraping de {len(selected_categories)} categories selectionnees")
-    all_books = []
-    
-    for i, category in enumerate(selected_categories, 1):
-        print("=" * 50)
-        print(f"Categorie {i}/{len(selected_categories)}: {category['name']}")
-        print("=" * 50)
-        
-        books_data = scrape_category(category['url'], category['name'], delay, max_pages)
-        all_books.extend(books_data)
-        
-        filename = f"{clean_filename(category['name'])}.csv"
-        write_csv(books_data, filename)
-        
-        if i < len(selected_categories):
-            print("Attente avant la categorie suivante...")
-            time.sleep(delay * 2)
+    logger.info("Scraping de %s categories selectionnees", len(selected_categories))
     
-    if output_file and all_books:
-        print(f"Sauvegarde globale dans {output_file}")
-        write_csv(all_books, output_file)
+    if category_parallelism > 1:
+        total_books = scrape_categories_parallel(selected_categories, delay, max_pages, workers, category_parallelism, output_file,
+                                                 images, image_workers)
+    else:
+        total_books = scrape_categories_serial(selected_categories, delay, max_pages, workers, output_file, images, image_workers)
     
-    print(f"Scraping termine! {len(all_books)} livres au total")
+    logger.info("Scraping termine! %s livres au total", total_books)
 
-def scrape_single_category(category_name, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, output_file=None):
+def scrape_single_category(category_name, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, output_file=None, workers=1,
+                           engine=DEFAULT_ENGINE, connections=ASYNC_LIMIT_PER_HOST, images=False, image_workers=IMAGE_WORKERS):
     """
     Scrape une categorie specifique
     """
+    if engine == 'async':
+        return scrape_categories_async([category_name], delay, max_pages, None, connections, images, image_workers,
+                                       filename=output_file)
+    
     categories = get_category_links()
     target_category = None
     
@@ -114,69 +399,92 @@ def scrape_single_category(category_name, delay=DEFAULT_DELAY, max_pages=DEFAULT
             break
     
     if not target_category:
-        print(f"Categorie '{category_name}' non trouvee")
+        logger.warning("Categorie '%s' non trouvee", category_name)
         available_categories = [cat['name'] for cat in categories]
-        print(f"Categories disponibles: {', '.join(available_categories)}")
+        logger.info("Categories disponibles: %s", ', '.join(available_categories))
         return
     
-    books_data = scrape_category(target_category['url'], target_category['name'], delay, max_pages)
-    
-    if books_data:
-        filename = output_file or f"{clean_filename(category_name)}.csv"
-        write_csv(books_data, filename)
-        
-        download_images = input("Telecharger les images? (o/n): ").lower().startswith('o')
-        if download_images:
-            download_category_images(books_data, category_name)
-    else:
-        print("Aucune donnee a sauvegarder")
+    scrape_category_to_csv(target_category, delay, max_pages, workers, images=images, image_workers=image_workers,
+                           filename=output_file)
 
-def scrape_all_categories(delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES):
+def scrape_all_categories(delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, workers=1,
+                          engine=DEFAULT_ENGINE, connections=ASYNC_LIMIT_PER_HOST, category_parallelism=1,
+                          images=False, image_workers=IMAGE_WORKERS):
     """
     Scrape toutes les categories
     """
-    print("Demarrage du scraping de toutes les categories")
+    logger.info("Demarrage du scraping de toutes les categories")
+    
+    if engine == 'async':
+        return scrape_categories_async(None, delay, max_pages, "all_books.csv", connections, images, image_workers)
     
     categories = get_category_links()
-    print(f"{len(categories)} categories a scraper")
+    logger.info("%s categories a scraper", len(categories))
     
-    all_books = []
+    if category_parallelism > 1:
+        total_books = scrape_categories_parallel(categories, delay, max_pages, workers, category_parallelism, "all_books.csv",
+                                                 images, image_workers)
+    else:
+        total_books = scrape_categories_serial(categories, delay, max_pages, workers, "all_books.csv", images, image_workers)
     
-    for i, category in enumerate(categories, 1):
-        print("=" * 50)
-        print(f"Categorie {i}/{len(categories)}: {category['name']}")
-        print("=" * 50)
-        
-        books_data = scrape_category(category['url'], category['name'], delay, max_pages)
-        all_books.extend(books_data)
-        
-        filename = f"{clean_filename(category['name'])}.csv"
-        write_csv(books_data, filename)
-        
-        if i < len(categories):
-            print("Attente avant la categorie suivante...")
-            time.sleep(delay * 2)
+    logger.info("Scraping termine! %s livres au total", total_books)
+
+def scrape_categories_async(category_names=None, delay=DEFAULT_DELAY, max_pages=DEFAULT_MAX_PAGES, output_file=None,
+                            connections=ASYNC_LIMIT_PER_HOST, images=False, image_workers=IMAGE_WORKERS, filename=None):
+    """
+    Scrape des categories avec le moteur asyncio (None = toutes les categories).
+    Une seule boucle d'evenements; chaque categorie ecrit ses livres dans ses
+    sorties (CategoryOutput) au fil des lots. Les categories avancant en meme
+    temps, le CSV global est assemble ensuite dans l'ordre des categories a
+    partir des CSV finalises, comme avec --category-parallelism. `filename`
+    remplace le nom du CSV d'une categorie unique.
+    """
+    outputs = {}
+    
+    def open_output(category):
+        outputs[category['name']] = CategoryOutput(category['name'], filename, None, images)
+        return outputs[category['name']]
+    
+    categories, counts = run_async_crawl(category_names, delay, max_pages, connections, open_output=open_output)
+    
+    if not categories:
+        logger.warning("Aucune categorie valide specifiee")
+        return
     
-    print("Sauvegarde de tous les livres...")
-    write_csv(all_books, "all_books.csv")
-    print(f"Scraping termine! {len(all_books)} livres au total")
+    if images:
+        for category in categories:
+            output = outputs[category['name']]
+            if output.image_books:
+                download_category_images(output.image_books, category['name'], image_workers)
+    
+    if output_file:
+        logger.info("Sauvegarde globale dans %s", output_file)
+        concat_csv([outputs[category['name']].written for category in categories if outputs[category['name']].written], output_file)
+    
+    logger.info("Scraping termine! %s livres au total", sum(counts))
 
-def download_category_images(books_data, category_name):
+def download_category_images(books_data, category_name, workers=IMAGE_WORKERS):
     """
     Telecharge les images pour une categorie
     """
-    from utils import download_image, clean_filename
-    
-    print(f"Telechargement des images pour {category_name}...")
-    downloaded = 0
+    logger.info("Telechargement des images pour %s...", category_name)
+    downloaded = download_images([book.get('image_url') for book in books_data], workers)
     
-    for book in books_data:
-        if book.get('image_url') and book.get('title'):
-            image_name = f"{clean_filename(book['title'])}.jpg"
-            if download_image(book['image_url'], image_name):
-                downloaded += 1
+    logger.info("%s/%s images telechargees", downloaded, len(books_data))
     
-    print(f"{downloaded}/{len(books_data)} images telechargees")
+    if thumbnails_enabled():
+        generate_derivatives(books_data)
+
+def open_checkpoint(outdir, resume=False, engine=DEFAULT_ENGINE):
+    """
+    Ouvre le journal de reprise et l'ensemble des livres visites du dossier de sortie.
+    Rien avec le moteur async, qui ne les alimente pas: le point de reprise
+    d'un crawl sync precedent reste intact.
+    """
+    if engine == 'async':
+        return
+    open_journal(os.path.join(outdir, CHECKPOINT_FILE), resume)
+    open_visited(os.path.join(outdir, VISITED_FILE), resume)
 
 def main():
     """
@@ -190,8 +498,24 @@ Exemples d'utilisation:
   python scrape.py --categories Travel Poetry --max-pages 1
   python scrape.py --categories Travel --delay 2 --outdir my_data
   python scrape.py --all --max-pages 2 --delay 1.5
+  python scrape.py --categories Travel --workers 8 --delay 0.2
+  python scrape.py --all --workers 8 --adaptive --min-rate 1 --max-rate 30
+  python scrape.py --all --category-parallelism 4 --workers 4 --delay 0.1
+  python scrape.py --all --cache --workers 4
+  python scrape.py --all --resume
+  python scrape.py --categories Travel --parser lxml --verify-parser
+  python scrape.py --all --workers 16 --parse-processes 4 --delay 0
+  python scrape.py --all --engine async --connections 20 --delay 0
   python scrape.py --list-categories
   python scrape.py --category travel --output livres_voyage.csv
+  python scrape.py --category travel --images --image-workers 8
+  python scrape.py --all --thumbnails --thumbnail-processes 4
+  python scrape.py --all --format parquet
+  python scrape.py --all --sqlite --workers 8
+  python scrape.py --all --base-url http://127.0.0.1:8000/ --delay 0
+  python scrape.py --all --workers 8 --metrics --prometheus /var/lib/node_exporter/scraper.prom
+  python scrape.py --all --workers 8 --quiet --log-file crawl.jsonl
+  python scrape.py --category travel --verbose
         """
     )
     
@@ -222,6 +546,128 @@ Exemples d'utilisation:
                        default=DEFAULT_DELAY,
                        help=f'Delai entre les requetes en secondes (defaut: {DEFAULT_DELAY})')
     
+    parser.add_argument('--adaptive',
+                       action='store_true',
+                       help='Debit adaptatif: remplace les pauses fixes par un debit regle sur la latence et les 429/503 (Retry-After respecte); --delay fixe le debit de depart')
+    
+    parser.add_argument('--min-rate',
+                       type=float,
+                       default=THROTTLE_MIN_RATE,
+                       help=f'Debit plancher du mode --adaptive en requetes par seconde (defaut: {THROTTLE_MIN_RATE})')
+    
+    parser.add_argument('--max-rate',
+                       type=float,
+                       default=THROTTLE_MAX_RATE,
+                       help=f'Debit plafond du mode --adaptive en requetes par seconde (defaut: {THROTTLE_MAX_RATE})')
+    
+    parser.add_argument('--workers',
+                       type=int,
+                       default=1,
+                       help='Nombre de threads pour les pages livres; --delay devient une limite globale (defaut: 1)')
+    
+    parser.add_argument('--category-parallelism',
+                       type=int,
+                       default=1,
+                       help='Nombre de categories scrapees en meme temps, avec une limite de debit commune (defaut: 1)')
+    
+    parser.add_argument('--engine',
+                       choices=['sync', 'async'],
+                       default=DEFAULT_ENGINE,
+                       help=f'Moteur de crawl: requests (sync) ou asyncio/aiohttp (async) (defaut: {DEFAULT_ENGINE})')
+    
+    parser.add_argument('--connections',
+                       type=int,
+                       default=ASYNC_LIMIT_PER_HOST,
+                       help=f'Connexions simultanees par hote pour le moteur async (defaut: {ASYNC_LIMIT_PER_HOST})')
+    
+    parser.add_argument('--parser',
+                       choices=PARSER_BACKENDS,
+                       default=DEFAULT_PARSER,
+                       help=f'Backend de parsing HTML: BeautifulSoup (bs4) ou XPath compiles lxml (defaut: {DEFAULT_PARSER})')
+    
+    parser.add_argument('--verify-parser',
+                       action='store_true',
+                       help='Parse aussi chaque page livre avec les deux backends et signale les ecarts')
+    
+    parser.add_argument('--parse-processes',
+                       type=int,
+                       default=0,
+                       help='Parse les pages livres dans N processus (a combiner avec --workers) (defaut: 0, pas de processus)')
+    
+    parser.add_argument('--pool-size',
+                       type=int,
+                       default=HTTP_POOL_SIZE,
+                       help=f'Taille du pool de connexions keep-alive par hote (defaut: {HTTP_POOL_SIZE})')
+    
+    parser.add_argument('--cache',
+                       action='store_true',
+                       help='Active le cache HTTP persistant (requetes conditionnelles ETag/Last-Modified, moteur sync)')
+    
+    parser.add_argument('--cache-size',
+                       type=int,
+                       default=HTTP_CACHE_MAX_MB,
+                       help=f'Taille maximale du cache HTTP en Mo (defaut: {HTTP_CACHE_MAX_MB})')
+    
+    parser.add_argument('--resume',
+                       action='store_true',
+                       help='Reprend un crawl interrompu a partir du journal de reprise du dossier de sortie (moteur sync)')
+    
+    parser.add_argument('--format',
+                       choices=OUTPUT_FORMATS,
+                       default=DEFAULT_FORMAT,
+                       help=f'Format de sortie: CSV seul, ou parquet pour ecrire aussi un dataset Parquet type partitionne par categorie (defaut: {DEFAULT_FORMAT})')
+    
+    parser.add_argument('--sqlite',
+                       action='store_true',
+                       help=f'Ecrit aussi les livres dans le catalogue SQLite {SQLITE_FILE} du dossier de sortie (historique des prix)')
+    
+    parser.add_argument('--metrics',
+                       action='store_true',
+                       help=f'Mesure fetch, parsing, ecriture et images: ligne JSON periodique dans {METRICS_FILE} du dossier de sortie et bilan en fin de run')
+    
+    parser.add_argument('--metrics-interval',
+                       type=float,
+                       default=METRICS_INTERVAL,
+                       help=f'Intervalle de publication des metriques en secondes (defaut: {METRICS_INTERVAL})')
+    
+    parser.add_argument('--prometheus',
+                       help='Ecrit aussi les metriques dans ce fichier texte au format Prometheus (implique --metrics)')
+    
+    parser.add_argument('--images',
+                       action='store_true',
+                       help='Telecharge les couvertures des livres scrapes (sans confirmation interactive)')
+    
+    parser.add_argument('--image-workers',
+                       type=int,
+                       default=IMAGE_WORKERS,
+                       help=f'Nombre de telechargements d\'images simultanes (defaut: {IMAGE_WORKERS})')
+    
+    parser.add_argument('--thumbnails',
+                       action='store_true',
+                       help='Genere vignettes et derives WebP des couvertures (implique --images)')
+    
+    parser.add_argument('--thumbnail-processes',
+                       type=int,
+                       default=None,
+                       help='Nombre de processus pour les derives d\'images (defaut: un par coeur)')
+    
+    parser.add_argument('--base-url',
+                       default=BASE_URL,
+                       help=f'Site a scraper, par exemple le serveur local de benchmarks/local_site.py (defaut: {BASE_URL})')
+    
+    verbosity = parser.add_mutually_exclusive_group()
+    
+    verbosity.add_argument('-v', '--verbose',
+                       action='store_true',
+                       help='Detail par page et par livre (niveau DEBUG)')
+    
+    verbosity.add_argument('-q', '--quiet',
+                       action='store_true',
+                       help='Avertissements et erreurs seulement, sans resume de progression')
+    
+    parser.add_argument('--log-file',
+                       help='Ecrit aussi le journal dans ce fichier, un objet JSON par ligne')
+    
     parser.add_argument('--outdir', 
                        default=DEFAULT_OUTDIR,
                        help=f'Dossier de sortie personnalise (defaut: {DEFAULT_OUTDIR})')
@@ -230,14 +676,46 @@ Exemples d'utilisation:
                        help='Fichier de sortie personnalise (pour categories individuelles)')
     
     args = parser.parse_args()
+    if args.engine == 'async':
+        # Le moteur async n'ecrit pas le journal de reprise et n'utilise pas le cache HTTP de la session requests
+        unsupported = [option for option, enabled in (('--resume', args.resume), ('--cache', args.cache)) if enabled]
+        if unsupported:
+            parser.error(f"{' et '.join(unsupported)} non supporte(s) avec --engine async")
     
-    print("=" * 60)
-    print("SCRAPER DE LIVRES - BOOKS TO SCRAPE - CLI AVANCEE")
-    print("=" * 60)
+    configure_logging(logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO, args.log_file)
+    logger.info("=" * 60)
+    logger.info("SCRAPER DE LIVRES - BOOKS TO SCRAPE - CLI AVANCEE")
+    logger.info("=" * 60)
     
     try:
         # Configuration du dossier de sortie
         set_output_directory(args.outdir)
+        if args.base_url != BASE_URL:
+            set_base_url(args.base_url)
+        if args.format != DEFAULT_FORMAT:
+            set_output_format(args.format)
+        # Au moins une connexion par worker, sinon le pool en jette et en rouvre
+        configure_session(max(args.pool_size, args.workers * args.category_parallelism))
+        if args.parser != DEFAULT_PARSER or args.verify_parser:
+            set_parser_backend(args.parser, args.verify_parser)
+        if args.thumbnails:
+            args.images = True
+            enable_thumbnails(args.thumbnail_processes)
+        if args.parse_processes > 0:
+            start_parse_pool(args.parse_processes)
+        if args.cache:
+            enable_cache(os.path.join(args.outdir, HTTP_CACHE_DIR), args.cache_size * 1024 * 1024)
+        
+        if args.metrics or args.prometheus:
+            enable_metrics(os.path.join(args.outdir, METRICS_FILE), args.prometheus, args.metrics_interval)
+        if args.adaptive:
+            enable_throttle(1 / args.delay if args.delay > 0 else args.max_rate, args.min_rate, args.max_rate)
+            # Le controleur espace deja chaque requete: plus de pause fixe
+            args.delay = 0
+        
+        reset_book_index()
+        if args.sqlite and not args.list_categories:
+            open_store(os.path.join(args.outdir, SQLITE_FILE))
         
         if args.list_categories:
             categories = get_category_links()
@@ -247,28 +725,53 @@ Exemples d'utilisation:
             print(f"Total: {len(categories)} categories")
             
         elif args.category:
-            scrape_single_category(args.category, args.delay, args.max_pages, args.output)
+            open_checkpoint(args.outdir, args.resume, args.engine)
+            scrape_single_category(args.category, args.delay, args.max_pages, args.output, args.workers,
+                                   args.engine, args.connections, args.images, args.image_workers)
             
         elif args.categories:
-            scrape_selected_categories(args.categories, args.delay, args.max_pages, args.output)
+            open_checkpoint(args.outdir, args.resume, args.engine)
+            scrape_selected_categories(args.categories, args.delay, args.max_pages, args.output, args.workers,
+                                       args.engine, args.connections, args.category_parallelism,
+                                       args.images, args.image_workers)
             
         elif args.all:
             confirm = input("Scraper toutes les categories? Cela peut prendre du temps. (o/n): ")
             if confirm.lower().startswith('o'):
-                scrape_all_categories(args.delay, args.max_pages)
+                open_checkpoint(args.outdir, args.resume, args.engine)
+                scrape_all_categories(args.delay, args.max_pages, args.workers, args.engine, args.connections,
+                                      args.category_parallelism, args.images, args.image_workers)
             else:
-                print("Operation annulee")
+                logger.info("Operation annulee")
                 
         else:
             parser.print_help()
             print("Utilisez --list-categories pour voir les categories disponibles")
+        
+        print_connection_stats()
+        if get_book_index().duplicates:
+            logger.info("Doublons evites: %s", get_book_index().duplicates)
+        if args.verify_parser:
+            logger.info("Verification des backends de parsing: %s page(s) avec ecart", backend_mismatches())
     
     except KeyboardInterrupt:
-        print("Scraping interrompu par l'utilisateur")
+        logger.warning("Scraping interrompu par l'utilisateur")
+        if get_journal():
+            logger.info("Relancez la meme commande avec --resume pour reprendre le crawl")
     except Exception as e:
-        print(f"Erreur lors du scraping: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur lors du scraping: %s", e)
+    finally:
+        try:
+            close_store()
+        except RuntimeError as e:
+            logger.error("%s", e)
+        close_journal()
+        close_visited()
+        close_parse_pool()
+        close_thumbnails()
+        close_throttle()
+        close_metrics()
+        close_logging()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
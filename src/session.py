@@ -0,0 +1,202 @@
+"""
+Session HTTP partagee: pool de connexions keep-alive, gzip et reessais
+
+Toutes les requetes de get_soup et download_image passent par fetch(), qui
+reutilise les connexions TCP ouvertes au lieu d'en ouvrir une par requete.
+Avec le debit adaptatif actif, fetch() rapporte statut et latence de chaque
+requete au controleur (les appelants prennent leur jeton avant de chronometrer).
+"""
+import os
+import time
+import atexit
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from settings import HEADERS, TIMEOUT, MAX_RETRIES, HTTP_POOL_SIZE, RETRY_BACKOFF_FACTOR, RETRY_BACKOFF_JITTER, RETRY_STATUSES
+    from cache import HttpCache
+    from metrics import increment
+    from throttle import get_throttle
+    from log import get_logger
+except ImportError:
+    from .settings import HEADERS, TIMEOUT, MAX_RETRIES, HTTP_POOL_SIZE, RETRY_BACKOFF_FACTOR, RETRY_BACKOFF_JITTER, RETRY_STATUSES
+    from .cache import HttpCache
+    from .metrics import increment
+    from .throttle import get_throttle
+    from .log import get_logger
+
+_session = None
+_cache = None
+_session_lock = threading.Lock()
+
+logger = get_logger('session')
+
+class ThrottledRetry(Retry):
+    """
+    Reessai qui, quand le debit adaptatif est actif, signale chaque 429/503 au
+    controleur (Retry-After compris) et attend son prochain creneau au lieu
+    du backoff propre au thread
+    """
+    def sleep(self, response=None):
+        throttle = get_throttle()
+        if throttle is None or response is None:
+            return super().sleep(response)
+        throttle.record(response.status, retry_after=response.headers.get('Retry-After'))
+        throttle.acquire()
+
+def build_retry(max_retries=MAX_RETRIES):
+    """
+    Politique de reessai: backoff exponentiel avec jitter sur 5xx, 429 et erreurs de connexion
+    """
+    options = dict(
+        total=max_retries,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=['GET', 'HEAD'],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    try:
+        return ThrottledRetry(backoff_jitter=RETRY_BACKOFF_JITTER, **options)
+    except TypeError:
+        # urllib3 < 2.0 ne connait pas backoff_jitter
+        return ThrottledRetry(**options)
+
+def build_session(pool_size=HTTP_POOL_SIZE, max_retries=MAX_RETRIES):
+    """
+    Construit une session avec un pool de `pool_size` connexions par hote
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=build_retry(max_retries))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def configure_session(pool_size=HTTP_POOL_SIZE, max_retries=MAX_RETRIES):
+    """
+    Remplace la session partagee par une nouvelle session configuree
+    """
+    global _session
+    session = build_session(pool_size, max_retries)
+    with _session_lock:
+        old_session, _session = _session, session
+    if old_session is not None:
+        old_session.close()
+    return session
+
+def get_session():
+    """
+    Retourne la session partagee, creee a la premiere utilisation
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+def fetch(url, **kwargs):
+    """
+    Effectue un GET via la session partagee et leve une exception si le statut final est une erreur
+    """
+    kwargs.setdefault('timeout', TIMEOUT)
+    throttle = get_throttle()
+    started = time.perf_counter()
+    try:
+        response = get_session().get(url, **kwargs)
+    except (requests.ConnectionError, requests.Timeout):
+        # Timeouts et connexions refusees: signe de surcharge
+        if throttle is not None:
+            throttle.record(None)
+        raise
+    retries = getattr(response.raw, 'retries', None)
+    retried = retries is not None and bool(retries.history)
+    if retried:
+        increment('retries', len(retries.history))
+    if throttle is not None:
+        # Apres des reessais la duree inclut les attentes: pas un echantillon de latence
+        throttle.record(response.status_code, None if retried else time.perf_counter() - started,
+                        response.headers.get('Retry-After'))
+    response.raise_for_status()
+    return response
+
+def enable_cache(directory, max_bytes):
+    """
+    Active le cache HTTP persistant pour toutes les pages HTML
+    """
+    global _cache
+    _cache = HttpCache(directory, max_bytes)
+    atexit.register(_cache.save)
+    logger.info("Cache HTTP: %s (%d pages)", os.path.abspath(directory), _cache.stats()['entries'])
+    return _cache
+
+def fetch_page(url):
+    """
+    Recupere le contenu d'une page HTML, en requete conditionnelle si elle est en cache.
+    Retourne (contenu, inchange) ou inchange vaut True quand le serveur a repondu 304.
+    """
+    cache = _cache
+    if cache is None:
+        content = fetch(url).content
+        increment('http_bytes', len(content))
+        return content, False
+    
+    response = fetch(url, headers=cache.conditional_headers(url))
+    if response.status_code == 304:
+        content = cache.get_body(url)
+        if content is not None:
+            return content, True
+        response = fetch(url)
+    
+    increment('http_bytes', len(response.content))
+    cache.store(url, response)
+    return response.content, False
+
+def cached_record(url):
+    """
+    Resultat de parsing memorise pour une page inchangee
+    """
+    return _cache.get_record(url) if _cache is not None else None
+
+def remember_record(url, record):
+    """
+    Memorise le resultat de parsing d'une page pour le prochain passage
+    """
+    if _cache is not None and record is not None:
+        _cache.store_record(url, record)
+
+def connection_stats():
+    """
+    Compte les connexions ouvertes et reutilisees par tous les pools de la session
+    """
+    opened = 0
+    requests_sent = 0
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    requests_sent += pool.num_requests
+    return {
+        'opened': opened,
+        'requests': requests_sent,
+        'reused': max(requests_sent - opened, 0),
+    }
+
+def print_connection_stats():
+    """
+    Affiche le bilan des connexions HTTP
+    """
+    stats = connection_stats()
+    if stats['requests']:
+        logger.info("Connexions HTTP: %d ouvertes, %d reutilisees sur %d requetes",
+                    stats['opened'], stats['reused'], stats['requests'])
+    if _cache is not None:
+        cache_stats = _cache.stats()
+        logger.info("Cache HTTP: %d pages inchangees (304), %d telechargees, %d entrees (%d Ko)",
+                    cache_stats['hits'], cache_stats['misses'], cache_stats['entries'], cache_stats['bytes'] // 1024)
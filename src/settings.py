@@ -11,24 +11,104 @@ CATALOGUE_URL = "http://books.toscrape.com/catalogue/"
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate'
 }
 
 # Configuration du scraping
 DEFAULT_DELAY = 1
 TIMEOUT = 10
 MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_BACKOFF_JITTER = 0.3
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+HTTP_POOL_SIZE = 10
+# Pages livres decouvertes en attente au plus par categorie (frontiere), et par lot du moteur async
+PIPELINE_QUEUE_SIZE = 100
 DEFAULT_MAX_PAGES = None
+DEFAULT_ENGINE = "sync"
+DEFAULT_PARSER = "bs4"
+PARSER_BACKENDS = ['bs4', 'lxml']
+ASYNC_LIMIT_PER_HOST = 10
 
 # Chemins des dossiers
 DATA_DIR = "data"
 IMAGES_DIR = "images"
 OUTPUTS_DIR = "outputs"
 DEFAULT_OUTDIR = "outputs"
+HTTP_CACHE_DIR = "http_cache"
+HTTP_CACHE_MAX_MB = 200
+CHECKPOINT_FILE = "checkpoint.jsonl"
+# Empreintes des livres deja enregistres (8 octets par URL), rechargees par --resume
+VISITED_FILE = "visited.bin"
+
+# Catalogue SQLite (--sqlite): ecritures groupees par un thread unique
+SQLITE_FILE = "catalogue.db"
+SQLITE_BATCH_SIZE = 200
+SQLITE_QUEUE_SIZE = 1000
+SQLITE_FLUSH_INTERVAL = 1.0
+
+# Metriques (--metrics): publication periodique, seaux des histogrammes de latence en secondes
+METRICS_INTERVAL = 10
+METRICS_FILE = "metrics.jsonl"
+METRICS_STAGES = ['fetch', 'parse', 'write', 'image']
+METRICS_COUNTERS = ['http_bytes', 'retries', 'fetch_errors', 'sleep_seconds']
+METRICS_GAUGES = ['request_rate']
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Journalisation: intervalle du resume de progression en secondes
+PROGRESS_INTERVAL = 5
+
+# Debit adaptatif (--adaptive): seau a jetons regle en AIMD, debits en requetes par seconde
+THROTTLE_START_RATE = 2.0
+THROTTLE_MIN_RATE = 0.5
+THROTTLE_MAX_RATE = 20.0
+THROTTLE_BURST = 4
+THROTTLE_INCREASE = 1.0        # req/s gagnees par seconde de trafic sans incident
+THROTTLE_DECREASE = 0.5        # facteur applique au debit a chaque ralentissement
+THROTTLE_COOLDOWN = 1.0        # au plus un ralentissement par intervalle (s)
+THROTTLE_STATUSES = [429, 502, 503, 504]
+THROTTLE_LATENCY_ALPHA = 0.1   # lissage de la latence de reference
+THROTTLE_SPIKE_FACTOR = 3.0    # pic: latence > facteur x reference...
+THROTTLE_SPIKE_FLOOR = 0.5     # ...et > plancher (s)
+THROTTLE_WARMUP = 10           # reponses avant de juger les pics de latence
+THROTTLE_MAX_RETRY_AFTER = 300
+THROTTLE_REPORT_INTERVAL = 10
+
+# Telechargement des images
+IMAGE_WORKERS = 8
+IMAGE_CHUNK_SIZE = 64 * 1024
+IMAGE_SIGNATURES = [b'\xff\xd8\xff', b'\x89PNG', b'GIF8']
+
+# Vignettes et derives des couvertures
+DERIVATIVES_DIR = "derivatives"
+DERIVATIVES_MANIFEST = "manifest.json"
+THUMBNAIL_SIZE = (150, 150)
+DERIVATIVE_MAX_SIZE = (400, 600)
+DERIVATIVE_FORMAT = "WEBP"
+DERIVATIVE_QUALITY = 80
 
 # Configuration CSV
 CSV_ENCODING = "utf-8"
-CSV_FIELDNAMES = ['title', 'price', 'availability', 'rating', 'description', 'image_url', 'category']
+CSV_FIELDNAMES = ['title', 'price', 'availability', 'rating', 'description', 'image_url', 'category', 'product_url',
+                  'upc', 'product_type', 'price_excl_tax', 'price_incl_tax', 'tax', 'number_of_reviews']
+CSV_FLUSH_EVERY = 50
+
+# Sortie colonnaire (--format parquet): un dataset partitionne par categorie
+OUTPUT_FORMATS = ['csv', 'parquet']
+DEFAULT_FORMAT = "csv"
+PARQUET_DIR = "parquet"
+PARQUET_ROW_GROUP_SIZE = 1000
+
+# Tableau "Product Information" des pages livres: libelle -> champ
+PRODUCT_INFO_FIELDS = {
+    'UPC': 'upc',
+    'Product Type': 'product_type',
+    'Price (excl. tax)': 'price_excl_tax',
+    'Price (incl. tax)': 'price_incl_tax',
+    'Tax': 'tax',
+    'Number of reviews': 'number_of_reviews'
+}
 
 # Sélecteurs CSS
 SELECTORS = {
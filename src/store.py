@@ -0,0 +1,245 @@
+"""
+Catalogue SQLite des livres avec historique des prix et disponibilites
+
+Les livres sont indexes par UPC (URL a defaut). A chaque crawl, une ligne
+d'historique est ajoutee pour les livres nouveaux ou dont le prix ou la
+disponibilite a change: la table price_history repond a "qu'est-ce qui a
+change depuis le dernier crawl". Les threads du crawl ne touchent jamais la
+base: ils deposent les livres dans une file, un thread ecrivain unique les
+ecrit par lots, un lot par transaction.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+try:
+    from settings import SQLITE_BATCH_SIZE, SQLITE_FLUSH_INTERVAL, SQLITE_QUEUE_SIZE
+    from utils import typed_record
+    from log import get_logger
+except ImportError:
+    from .settings import SQLITE_BATCH_SIZE, SQLITE_FLUSH_INTERVAL, SQLITE_QUEUE_SIZE
+    from .utils import typed_record
+    from .log import get_logger
+
+_store = None
+_TIMEOUT = object()
+# Intervalle de verification du thread ecrivain quand la file est pleine
+_WRITER_CHECK_INTERVAL = 0.5
+
+logger = get_logger('store')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    books INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS books (
+    upc TEXT PRIMARY KEY,
+    title TEXT,
+    category TEXT,
+    price REAL,
+    price_excl_tax REAL,
+    price_incl_tax REAL,
+    tax REAL,
+    availability TEXT,
+    stock INTEGER,
+    rating INTEGER,
+    number_of_reviews INTEGER,
+    product_type TEXT,
+    description TEXT,
+    image_url TEXT,
+    product_url TEXT,
+    first_crawl INTEGER REFERENCES crawls(id),
+    last_crawl INTEGER REFERENCES crawls(id)
+);
+CREATE TABLE IF NOT EXISTS price_history (
+    upc TEXT NOT NULL,
+    crawl_id INTEGER NOT NULL REFERENCES crawls(id),
+    price REAL,
+    availability TEXT,
+    stock INTEGER,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (upc, crawl_id)
+);
+CREATE INDEX IF NOT EXISTS idx_books_category ON books(category);
+CREATE INDEX IF NOT EXISTS idx_books_rating ON books(rating);
+CREATE INDEX IF NOT EXISTS idx_books_price ON books(price);
+CREATE INDEX IF NOT EXISTS idx_history_crawl ON price_history(crawl_id);
+"""
+
+BOOK_COLUMNS = ['upc', 'title', 'category', 'price', 'price_excl_tax', 'price_incl_tax', 'tax', 'availability', 'stock',
+                'rating', 'number_of_reviews', 'product_type', 'description', 'image_url', 'product_url']
+
+# Historique ecrit avant l'upsert: seulement si le livre est nouveau ou a change
+INSERT_HISTORY = """
+INSERT OR IGNORE INTO price_history (upc, crawl_id, price, availability, stock, recorded_at)
+SELECT :upc, :crawl_id, :price, :availability, :stock, :recorded_at
+WHERE NOT EXISTS (
+    SELECT 1 FROM books WHERE upc = :upc AND price IS :price AND availability IS :availability
+)
+"""
+
+UPSERT_BOOK = f"""
+INSERT INTO books ({', '.join(BOOK_COLUMNS)}, first_crawl, last_crawl)
+VALUES ({', '.join(':' + column for column in BOOK_COLUMNS)}, :crawl_id, :crawl_id)
+ON CONFLICT(upc) DO UPDATE SET
+{', '.join(f'{column} = excluded.{column}' for column in BOOK_COLUMNS[1:])}, last_crawl = excluded.last_crawl
+"""
+
+class CatalogStore:
+    """
+    Sortie SQLite alimentee par un thread ecrivain unique
+    """
+    def __init__(self, path, batch_size=SQLITE_BATCH_SIZE, flush_interval=SQLITE_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.changes = 0
+        self.crawl_id = None
+        self._error = None
+        self._queue = queue.Queue(maxsize=SQLITE_QUEUE_SIZE)
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+
+    def write(self, record):
+        """
+        Depose un livre dans la file du thread ecrivain. Leve RuntimeError si
+        le thread est arrete, au lieu de bloquer sur une file qui ne se vide plus.
+        """
+        self._put(record)
+
+    def _put(self, item):
+        while True:
+            self._check_writer()
+            try:
+                self._queue.put(item, timeout=_WRITER_CHECK_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def _check_writer(self):
+        if self._error is not None:
+            raise RuntimeError(f"Thread ecrivain SQLite arrete: {self._error}") from self._error
+        if not self._thread.is_alive():
+            raise RuntimeError("Thread ecrivain SQLite arrete")
+
+    def _run(self):
+        try:
+            connection = sqlite3.connect(self.path)
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                with connection:
+                    connection.executescript(SCHEMA)
+                    cursor = connection.execute("INSERT INTO crawls (started_at) VALUES (?)", (_now(),))
+                    self.crawl_id = cursor.lastrowid
+            except BaseException:
+                connection.close()
+                raise
+        except Exception as e:
+            self._error = e
+            return
+        finally:
+            self._ready.set()
+
+        try:
+            self._write_loop(connection)
+        except Exception as e:
+            self._error = e
+            logger.error("Thread ecrivain SQLite arrete: %s", e)
+        finally:
+            connection.close()
+
+    def _write_loop(self, connection):
+        batch = []
+        deadline = None
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = _TIMEOUT
+            if record is None:
+                break
+            if record is not _TIMEOUT:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(record)
+                if len(batch) < self.batch_size:
+                    continue
+            self._write_batch(connection, batch)
+            batch = []
+
+        self._write_batch(connection, batch)
+        with connection:
+            connection.execute("UPDATE crawls SET finished_at = ?, books = ? WHERE id = ?", (_now(), self.count, self.crawl_id))
+
+    def _write_batch(self, connection, batch):
+        if not batch:
+            return
+        recorded_at = _now()
+        rows = []
+        for record in batch:
+            row = typed_record(record)
+            row['upc'] = row['upc'] or record.get('product_url')
+            row['category'] = record.get('category')
+            row['crawl_id'] = self.crawl_id
+            row['recorded_at'] = recorded_at
+            rows.append(row)
+        try:
+            with connection:
+                before = connection.total_changes
+                connection.executemany(INSERT_HISTORY, rows)
+                self.changes += connection.total_changes - before
+                connection.executemany(UPSERT_BOOK, rows)
+            self.count += len(rows)
+        except sqlite3.Error as e:
+            logger.error("Erreur SQLite, lot de %d livres ignore: %s", len(rows), e)
+
+    def close(self):
+        """
+        Vide la file, attend le thread ecrivain et termine le crawl en base.
+        Leve RuntimeError si le thread ecrivain s'est arrete sur une erreur.
+        """
+        if self._thread.is_alive():
+            self._put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Thread ecrivain SQLite arrete, catalogue incomplet: {self._error}") from self._error
+        logger.info("Catalogue SQLite %s: %d livres ecrits, %d nouveaux ou modifies", self.path, self.count, self.changes)
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+def open_store(path):
+    """
+    Ouvre le catalogue SQLite actif et demarre son thread ecrivain
+    """
+    global _store
+    _store = CatalogStore(path)
+    return _store
+
+def get_store():
+    """
+    Catalogue actif, ou None si la sortie SQLite n'est pas active
+    """
+    return _store
+
+def close_store():
+    """
+    Ferme le catalogue actif
+    """
+    global _store
+    store, _store = _store, None
+    if store is not None:
+        store.close()
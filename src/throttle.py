@@ -0,0 +1,197 @@
+"""
+Debit adaptatif: seau a jetons dont le debit est regle en AIMD
+
+Toutes les requetes (pages HTML des deux moteurs, couvertures) prennent un
+jeton avant de partir. Chaque reponse sans incident augmente le debit de
+THROTTLE_INCREASE req/s par seconde de trafic; une reponse 429/503, une
+erreur reseau ou un pic de latence le divise par deux (au plus une fois par
+THROTTLE_COOLDOWN), entre un plancher et un plafond. Un en-tete Retry-After
+suspend toutes les requetes jusqu'a l'echeance, pas seulement celle qui l'a recu.
+"""
+import time
+import asyncio
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+try:
+    from settings import (THROTTLE_START_RATE, THROTTLE_MIN_RATE, THROTTLE_MAX_RATE, THROTTLE_BURST, THROTTLE_INCREASE,
+                          THROTTLE_DECREASE, THROTTLE_COOLDOWN, THROTTLE_STATUSES, THROTTLE_LATENCY_ALPHA,
+                          THROTTLE_SPIKE_FACTOR, THROTTLE_SPIKE_FLOOR, THROTTLE_WARMUP, THROTTLE_MAX_RETRY_AFTER,
+                          THROTTLE_REPORT_INTERVAL)
+    from metrics import pause, increment, set_gauge
+    from log import get_logger
+except ImportError:
+    from .settings import (THROTTLE_START_RATE, THROTTLE_MIN_RATE, THROTTLE_MAX_RATE, THROTTLE_BURST, THROTTLE_INCREASE,
+                           THROTTLE_DECREASE, THROTTLE_COOLDOWN, THROTTLE_STATUSES, THROTTLE_LATENCY_ALPHA,
+                           THROTTLE_SPIKE_FACTOR, THROTTLE_SPIKE_FLOOR, THROTTLE_WARMUP, THROTTLE_MAX_RETRY_AFTER,
+                           THROTTLE_REPORT_INTERVAL)
+    from .metrics import pause, increment, set_gauge
+    from .log import get_logger
+
+_throttle = None
+
+logger = get_logger('throttle')
+
+def parse_retry_after(value):
+    """
+    Delai en secondes d'un en-tete Retry-After (secondes ou date HTTP), borne, ou None
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        seconds = (date - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), THROTTLE_MAX_RETRY_AFTER)
+
+class AdaptiveThrottle:
+    """
+    Seau a jetons partage par tous les threads et la boucle asyncio.
+    Le solde de jetons vaut a l'instant `_updated`, qui peut etre dans le futur
+    pendant une suspension Retry-After; un solde negatif represente les
+    requetes deja en attente d'un creneau.
+    """
+    def __init__(self, rate=THROTTLE_START_RATE, min_rate=THROTTLE_MIN_RATE, max_rate=THROTTLE_MAX_RATE, burst=THROTTLE_BURST):
+        if not 0 < min_rate <= max_rate:
+            raise ValueError(f"Debits invalides: plancher {min_rate}, plafond {max_rate} (0 < plancher <= plafond)")
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.rate = min(max(rate, min_rate), max_rate)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._latency = None
+        self._samples = 0
+        self._cooldown_until = 0.0
+        self._next_report = self._updated + THROTTLE_REPORT_INTERVAL
+        self.stats = {'slowdowns': 0, 'retry_after_seconds': 0.0, 'lowest_rate': self.rate, 'highest_rate': self.rate}
+        set_gauge('request_rate', self.rate)
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self):
+        """
+        Prend un jeton et retourne le temps a attendre avant d'envoyer la requete
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            return max(self._updated - now, 0.0) + max(-self._tokens, 0.0) / self.rate
+
+    def acquire(self):
+        """
+        Attend un creneau (threads du moteur sync et telechargements d'images)
+        """
+        pause(self.reserve())
+
+    async def acquire_async(self):
+        """
+        Attend un creneau sans bloquer la boucle d'evenements
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            increment('sleep_seconds', delay)
+
+    def record(self, status, latency=None, retry_after=None):
+        """
+        Retour d'une requete: statut HTTP (None pour une erreur reseau), latence
+        jusqu'aux en-tetes (None si inconnue, par exemple apres des reessais)
+        et valeur brute de l'en-tete Retry-After
+        """
+        with self._lock:
+            now = time.monotonic()
+            if status is None or status in THROTTLE_STATUSES:
+                message = self._slow_down(now, f"HTTP {status}" if status else "erreur reseau", parse_retry_after(retry_after))
+            elif latency is not None:
+                message = self._observe_latency(now, latency)
+            else:
+                message = None
+            if message is None and now >= self._next_report:
+                self._next_report = now + THROTTLE_REPORT_INTERVAL
+                message = f"Debit adaptatif: {self.rate:.2f} req/s" + (
+                    f" (latence moyenne {self._latency * 1000:.0f} ms)" if self._latency is not None else "")
+        if message:
+            logger.info(message)
+
+    def _observe_latency(self, now, latency):
+        baseline = self._latency
+        self._latency = latency if baseline is None else baseline + THROTTLE_LATENCY_ALPHA * (latency - baseline)
+        self._samples += 1
+        if (baseline is not None and self._samples > THROTTLE_WARMUP
+                and latency > max(baseline * THROTTLE_SPIKE_FACTOR, THROTTLE_SPIKE_FLOOR)):
+            return self._slow_down(now, f"pic de latence {latency * 1000:.0f} ms", None)
+        self._set_rate(now, self.rate + THROTTLE_INCREASE / self.rate)
+        return None
+
+    def _slow_down(self, now, reason, retry_after):
+        if retry_after:
+            # Suspension globale: plus aucun jeton avant l'echeance, les requetes en attente restent etalees apres
+            self._refill(now)
+            until = now + retry_after
+            if until > self._updated:
+                self.stats['retry_after_seconds'] += until - self._updated
+                self._updated = until
+                self._tokens = min(self._tokens, 0.0)
+        if now < self._cooldown_until:
+            return None
+        # Une rafale de 503 issue d'un meme incident ne compte qu'une fois
+        self._cooldown_until = now + THROTTLE_COOLDOWN
+        self.stats['slowdowns'] += 1
+        previous = self.rate
+        self._set_rate(now, self.rate * THROTTLE_DECREASE)
+        return (f"Debit adaptatif: {previous:.2f} -> {self.rate:.2f} req/s ({reason}"
+                + (f", Retry-After {retry_after:.0f} s)" if retry_after else ")"))
+
+    def _set_rate(self, now, rate):
+        self._refill(now)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.stats['lowest_rate'] = min(self.stats['lowest_rate'], self.rate)
+        self.stats['highest_rate'] = max(self.stats['highest_rate'], self.rate)
+        set_gauge('request_rate', self.rate)
+
+def enable_throttle(rate=THROTTLE_START_RATE, min_rate=THROTTLE_MIN_RATE, max_rate=THROTTLE_MAX_RATE):
+    """
+    Active le debit adaptatif pour toutes les requetes
+    """
+    global _throttle
+    _throttle = AdaptiveThrottle(rate, min_rate, max_rate)
+    logger.info("Debit adaptatif: depart a %.2f req/s, entre %s et %s req/s", _throttle.rate, min_rate, max_rate)
+    return _throttle
+
+def get_throttle():
+    """
+    Controleur de debit actif, ou None
+    """
+    return _throttle
+
+def acquire():
+    """
+    Attend un creneau du debit adaptatif s'il est actif
+    """
+    if _throttle is not None:
+        _throttle.acquire()
+
+def close_throttle():
+    """
+    Affiche le bilan du debit adaptatif et le desactive
+    """
+    global _throttle
+    if _throttle is None:
+        return
+    stats = _throttle.stats
+    logger.info("Debit adaptatif: final %.2f req/s (entre %.2f et %.2f), %d ralentissements, %.1f s suspendues par Retry-After",
+                _throttle.rate, stats['lowest_rate'], stats['highest_rate'], stats['slowdowns'], stats['retry_after_seconds'])
+    _throttle = None
@@ -0,0 +1,171 @@
+"""
+Generation des vignettes et derives d'images des couvertures
+
+Apres le telechargement, chaque couverture produit une vignette de taille fixe
+et un derive compresse (WebP ou JPEG). Les derives sont nommes d'apres le hash
+du fichier source: une couverture deja traitee n'est jamais recalculee. Le
+travail d'image tourne dans un pool de processus unique (un par coeur par
+defaut), partage par toutes les categories, y compris en parallele.
+Un manifeste JSON associe l'UPC de chaque livre aux chemins de ses derives.
+"""
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    from settings import THUMBNAIL_SIZE, DERIVATIVE_MAX_SIZE, DERIVATIVE_FORMAT, DERIVATIVE_QUALITY, DERIVATIVES_DIR, DERIVATIVES_MANIFEST
+    import utils
+    from log import get_logger
+except ImportError:
+    from .settings import THUMBNAIL_SIZE, DERIVATIVE_MAX_SIZE, DERIVATIVE_FORMAT, DERIVATIVE_QUALITY, DERIVATIVES_DIR, DERIVATIVES_MANIFEST
+    from . import utils
+    from .log import get_logger
+
+_manifest_lock = threading.Lock()
+_enabled = False
+_pool = None
+
+logger = get_logger('thumbnails')
+
+def enable_thumbnails(processes=None):
+    """
+    Active la generation des derives apres chaque telechargement d'images
+    et demarre le pool de processus (processes=None: un processus par coeur)
+    """
+    global _enabled, _pool
+    close_thumbnails()
+    _enabled = True
+    if Image is not None:
+        _pool = ProcessPoolExecutor(max_workers=processes)
+
+def close_thumbnails():
+    """
+    Arrete le pool de processus des derives s'il existe
+    """
+    global _enabled, _pool
+    _enabled = False
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+def thumbnails_enabled():
+    """
+    Indique si la generation des derives est active
+    """
+    return _enabled
+
+def file_digest(filepath):
+    """
+    Hash SHA-1 du contenu d'un fichier, lu par blocs
+    """
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(64 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def derivative_paths(digest):
+    """
+    Chemins de la vignette et du derive compresse d'une source de hash donne
+    """
+    directory = os.path.join(utils.OUTPUTS_DIR, DERIVATIVES_DIR, digest[:2])
+    extension = '.webp' if DERIVATIVE_FORMAT == 'WEBP' else '.jpg'
+    return {
+        'thumbnail': os.path.join(directory, f"{digest}_thumb.jpg"),
+        'derivative': os.path.join(directory, f"{digest}{extension}"),
+    }
+
+def make_derivatives(source_path, paths):
+    """
+    Cree la vignette et le derive compresse d'une image source.
+    Fonction de module: executee dans les processus du pool.
+    """
+    os.makedirs(os.path.dirname(paths['thumbnail']), exist_ok=True)
+    with Image.open(source_path) as image:
+        image = image.convert('RGB')
+
+        thumbnail = image.copy()
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        canvas = Image.new('RGB', THUMBNAIL_SIZE, (255, 255, 255))
+        canvas.paste(thumbnail, ((THUMBNAIL_SIZE[0] - thumbnail.width) // 2, (THUMBNAIL_SIZE[1] - thumbnail.height) // 2))
+        canvas.save(paths['thumbnail'] + '.tmp', 'JPEG', quality=DERIVATIVE_QUALITY)
+
+        image.thumbnail(DERIVATIVE_MAX_SIZE)
+        image.save(paths['derivative'] + '.tmp', DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY)
+
+    os.replace(paths['thumbnail'] + '.tmp', paths['thumbnail'])
+    os.replace(paths['derivative'] + '.tmp', paths['derivative'])
+    return paths
+
+def generate_derivatives(books_data):
+    """
+    Produit les derives des couvertures deja telechargees d'une liste de livres
+    et met a jour le manifeste. Retourne le nombre de derives crees.
+    """
+    if Image is None:
+        logger.warning("Pillow non installe. Pas de vignettes creees.")
+        logger.warning("Installez-le avec: pip install Pillow")
+        return 0
+
+    entries = {}
+    pending = {}
+    todo = {}
+    for book in books_data:
+        source_path = utils.image_path_for(book['image_url']) if book.get('image_url') else None
+        if not source_path or not utils.is_valid_image(source_path):
+            continue
+        digest = file_digest(source_path)
+        paths = derivative_paths(digest)
+        key = book.get('upc') or book.get('product_url')
+        entry = {'source': source_path, 'sha1': digest, **paths}
+        if all(os.path.exists(path) for path in paths.values()):
+            entries[key] = entry
+        else:
+            # Entree ajoutee au manifeste seulement si ses derives ont ete crees
+            pending.setdefault(digest, []).append((key, entry))
+            todo[digest] = (source_path, paths)
+
+    created = 0
+    if todo:
+        pool = _pool or ProcessPoolExecutor()
+        try:
+            futures = {digest: pool.submit(make_derivatives, source_path, paths) for digest, (source_path, paths) in todo.items()}
+            for digest, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error("Erreur creation des derives de %s: %s", todo[digest][0], e)
+                    continue
+                created += 1
+                entries.update(pending[digest])
+        finally:
+            if pool is not _pool:
+                pool.shutdown()
+
+    update_manifest(entries)
+    logger.info("Derives d'images: %d crees, %d couvertures dans le manifeste", created, len(entries))
+    return created
+
+def update_manifest(entries):
+    """
+    Fusionne des entrees UPC -> chemins des derives dans le manifeste JSON
+    """
+    manifest_path = os.path.join(utils.OUTPUTS_DIR, DERIVATIVES_DIR, DERIVATIVES_MANIFEST)
+    with _manifest_lock:
+        try:
+            with open(manifest_path, encoding='utf-8') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            manifest = {}
+        manifest.update(entries)
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(manifest_path + '.tmp', manifest_path)
@@ -3,14 +3,37 @@
 Fonctions utilitaires pour le scraper
 """
 import os
+import re
 import csv
-import requests
+import time
+import hashlib
+import threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 
 try:
-    from settings import DATA_DIR, IMAGES_DIR, OUTPUTS_DIR, HEADERS, CSV_ENCODING, CSV_FIELDNAMES, DEFAULT_OUTDIR
+    import pyarrow as pa
+    import pyarrow.parquet as pq
 except ImportError:
-    from .settings import DATA_DIR, IMAGES_DIR, OUTPUTS_DIR, HEADERS, CSV_ENCODING, CSV_FIELDNAMES, DEFAULT_OUTDIR
+    pa = None
+
+try:
+    from settings import (DATA_DIR, IMAGES_DIR, OUTPUTS_DIR, HEADERS, CSV_ENCODING, CSV_FIELDNAMES, CSV_FLUSH_EVERY, DEFAULT_OUTDIR,
+                          IMAGE_WORKERS, IMAGE_CHUNK_SIZE, IMAGE_SIGNATURES, DEFAULT_FORMAT, PARQUET_DIR, PARQUET_ROW_GROUP_SIZE)
+    from session import fetch
+    from metrics import observe, increment, pause
+    from throttle import acquire
+    from log import get_logger, progress
+except ImportError:
+    from .settings import (DATA_DIR, IMAGES_DIR, OUTPUTS_DIR, HEADERS, CSV_ENCODING, CSV_FIELDNAMES, CSV_FLUSH_EVERY, DEFAULT_OUTDIR,
+                           IMAGE_WORKERS, IMAGE_CHUNK_SIZE, IMAGE_SIGNATURES, DEFAULT_FORMAT, PARQUET_DIR, PARQUET_ROW_GROUP_SIZE)
+    from .session import fetch
+    from .metrics import observe, increment, pause
+    from .throttle import acquire
+    from .log import get_logger, progress
+
+logger = get_logger('utils')
 
 def ensure_dir(directory):
     """
@@ -18,7 +41,7 @@ def ensure_dir(directory):
     """
     if not os.path.exists(directory):
         os.makedirs(directory)
-        print(f"Dossier cree: {directory}")
+        logger.debug("Dossier cree: %s", directory)
 
 def set_output_directory(outdir):
     """
@@ -31,50 +54,364 @@ def set_output_directory(outdir):
     ensure_dir(DATA_DIR)
     ensure_dir(IMAGES_DIR)
     ensure_dir(OUTPUTS_DIR)
-    print(f"Dossier de sortie defini: {outdir}")
+    logger.info("Dossier de sortie defini: %s", outdir)
 
 def write_csv(data, filename):
     """
-    Ecrit des donnees dans un fichier CSV
+    Ecrit des donnees dans un fichier CSV (via CsvSink: fichier temporaire puis renommage)
     """
-    ensure_dir(DATA_DIR)
-    filepath = os.path.join(DATA_DIR, filename)
+    if not data:
+        logger.warning("Aucune donnee a sauvegarder")
+        return False
     
     try:
-        if data and len(data) > 0:
-            with open(filepath, 'w', newline='', encoding=CSV_ENCODING) as file:
-                fieldnames = data[0].keys()
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(data)
-            print(f"Donnees sauvegardees dans {filepath} ({len(data)} enregistrements)")
-            return True
-        else:
-            print("Aucune donnee a sauvegarder")
-            return False
+        return write_records(open_csv_sink(filename), data)
     except Exception as e:
-        print(f"Erreur lors de l'ecriture du CSV: {e}")
+        logger.error("Erreur lors de l'ecriture du CSV: %s", e)
         return False
 
-def download_image(image_url, image_name):
+def write_records(sink, records):
     """
-    Telecharge une image depuis une URL
+    Ecrit des enregistrements dans un sink puis le finalise. Sur erreur ou
+    interruption, le fichier temporaire est abandonne et l'exception propagee.
     """
-    ensure_dir(IMAGES_DIR)
-    filepath = os.path.join(IMAGES_DIR, image_name)
+    try:
+        for record in records:
+            sink.write(record)
+    except BaseException:
+        sink.abort()
+        raise
+    return sink.close()
+
+class CsvSink:
+    """
+    Ecriture d'un CSV au fil de l'eau: chaque livre est ajoute des qu'il est parse.
+    Le fichier est ecrit sous un nom temporaire puis renomme a la fermeture,
+    un CSV incomplet ne remplace donc jamais le precedent.
+    """
+    def __init__(self, filepath, fieldnames=CSV_FIELDNAMES, flush_every=CSV_FLUSH_EVERY):
+        self.filepath = filepath
+        self.count = 0
+        self._tmp_path = filepath + '.tmp'
+        self._flush_every = flush_every
+        self._lock = threading.Lock()
+        self._file = open(self._tmp_path, 'w', newline='', encoding=CSV_ENCODING)
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, restval='', extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, record):
+        """
+        Ajoute un enregistrement, avec un flush periodique sur disque
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._writer.writerow(record)
+            self.count += 1
+            if self.count % self._flush_every == 0:
+                self._file.flush()
+        observe('write', started)
+
+    def close(self):
+        """
+        Finalise le fichier par renommage atomique (supprime s'il est vide)
+        """
+        with self._lock:
+            self._file.close()
+            if self.count:
+                os.replace(self._tmp_path, self.filepath)
+                logger.info("Donnees sauvegardees dans %s (%d enregistrements)", self.filepath, self.count)
+            else:
+                os.remove(self._tmp_path)
+                logger.warning("Aucune donnee a sauvegarder")
+        return self.count > 0
+
+    def abort(self):
+        """
+        Abandonne l'ecriture (erreur ou interruption): le fichier temporaire est
+        supprime et le CSV precedent reste en place
+        """
+        with self._lock:
+            self._file.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+        logger.warning("Ecriture de %s abandonnee (%d enregistrements non sauvegardes)", self.filepath, self.count)
+
+def open_csv_sink(filename):
+    """
+    Ouvre un CsvSink dans le dossier de donnees courant
+    """
+    ensure_dir(DATA_DIR)
+    return CsvSink(os.path.join(DATA_DIR, filename))
+
+def concat_csv(filenames, output_filename):
+    """
+    Concatene des CSV du dossier de donnees en un seul, ligne a ligne
+    sans charger les fichiers en memoire (les fichiers absents sont ignores)
+    """
+    def records():
+        for filename in filenames:
+            filepath = os.path.join(DATA_DIR, filename)
+            if not os.path.exists(filepath):
+                continue
+            with open(filepath, newline='', encoding=CSV_ENCODING) as file:
+                yield from csv.DictReader(file)
+    
+    return write_records(open_csv_sink(output_filename), records())
+
+OUTPUT_FORMAT = DEFAULT_FORMAT
+
+if pa is not None:
+    # Colonnes typees du dataset Parquet; la categorie est la cle de partition
+    PARQUET_SCHEMA = pa.schema([
+        ('title', pa.string()),
+        ('price', pa.float64()),
+        ('availability', pa.string()),
+        ('stock', pa.int32()),
+        ('rating', pa.int8()),
+        ('description', pa.string()),
+        ('image_url', pa.string()),
+        ('product_url', pa.string()),
+        ('upc', pa.string()),
+        ('product_type', pa.string()),
+        ('price_excl_tax', pa.float64()),
+        ('price_incl_tax', pa.float64()),
+        ('tax', pa.float64()),
+        ('number_of_reviews', pa.int32()),
+    ])
+
+def set_output_format(output_format):
+    """
+    Definit le format de sortie: 'csv' seul, ou 'parquet' pour ecrire
+    aussi le dataset colonnaire partitionne par categorie
+    """
+    global OUTPUT_FORMAT
+    if output_format == 'parquet' and pa is None:
+        logger.warning("pyarrow non installe. Sortie CSV uniquement.")
+        logger.warning("Installez-le avec: pip install pyarrow")
+        output_format = 'csv'
+    OUTPUT_FORMAT = output_format
+    logger.info("Format de sortie: %s", OUTPUT_FORMAT)
+
+def stock_count(availability):
+    """
+    Nombre d'exemplaires en stock extrait du texte de disponibilite
+    """
+    match = re.search(r'(\d+)', str(availability or ''))
+    return int(match.group(1)) if match else 0
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def typed_record(record):
+    """
+    Ligne du dataset Parquet: valeurs numeriques typees et stock extrait
+    """
+    return {
+        'title': record.get('title'),
+        'price': _to_float(record.get('price')),
+        'availability': record.get('availability'),
+        'stock': stock_count(record.get('availability')),
+        'rating': _to_int(record.get('rating')),
+        'description': record.get('description'),
+        'image_url': record.get('image_url'),
+        'product_url': record.get('product_url'),
+        'upc': record.get('upc') or None,
+        'product_type': record.get('product_type') or None,
+        'price_excl_tax': _to_float(record.get('price_excl_tax')),
+        'price_incl_tax': _to_float(record.get('price_incl_tax')),
+        'tax': _to_float(record.get('tax')),
+        'number_of_reviews': _to_int(record.get('number_of_reviews')),
+    }
+
+class ParquetSink:
+    """
+    Ecriture au fil de l'eau d'une partition Parquet, par groupes de lignes.
+    Meme protocole que CsvSink: fichier temporaire cache, renomme a la fermeture.
+    """
+    def __init__(self, filepath, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        self.filepath = filepath
+        self.count = 0
+        directory, name = os.path.split(filepath)
+        # Le point initial cache le fichier temporaire aux lecteurs du dataset
+        self._tmp_path = os.path.join(directory, '.' + name + '.tmp')
+        self._row_group_size = row_group_size
+        self._rows = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._writer = pq.ParquetWriter(self._tmp_path, PARQUET_SCHEMA)
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=PARQUET_SCHEMA))
+            self._rows = []
+
+    def write(self, record):
+        """
+        Ajoute un enregistrement, ecrit un groupe de lignes quand le tampon est plein
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._rows.append(typed_record(record))
+            self.count += 1
+            if len(self._rows) >= self._row_group_size:
+                self._flush()
+        observe('write', started)
+
+    def close(self):
+        """
+        Finalise la partition par renommage atomique (supprimee si elle est vide)
+        """
+        with self._lock:
+            self._flush()
+            self._writer.close()
+            if self.count:
+                os.replace(self._tmp_path, self.filepath)
+                logger.info("Donnees sauvegardees dans %s (%d enregistrements)", self.filepath, self.count)
+            else:
+                os.remove(self._tmp_path)
+        return self.count > 0
+
+    def abort(self):
+        """
+        Abandonne la partition: fichier temporaire supprime, partition precedente conservee
+        """
+        with self._lock:
+            self._rows = []
+            try:
+                self._writer.close()
+            finally:
+                if os.path.exists(self._tmp_path):
+                    os.remove(self._tmp_path)
+        logger.warning("Ecriture de %s abandonnee (%d enregistrements non sauvegardes)", self.filepath, self.count)
+
+def parquet_partition_path(category_name):
+    """
+    Fichier de la partition d'une categorie: parquet/category=<nom>/part-0.parquet
+    """
+    partition = f"category={quote(category_name, safe='')}"
+    return os.path.join(OUTPUTS_DIR, PARQUET_DIR, partition, "part-0.parquet")
+
+def open_parquet_sink(category_name):
+    """
+    Ouvre la partition Parquet d'une categorie, ou None si le format est csv
+    """
+    if OUTPUT_FORMAT != 'parquet':
+        return None
+    return ParquetSink(parquet_partition_path(category_name))
+
+def write_parquet(data, category_name):
+    """
+    Ecrit les livres d'une categorie dans sa partition Parquet (si le format est parquet)
+    """
+    sink = open_parquet_sink(category_name)
+    if sink is None:
+        return False
+    return write_records(sink, data)
+
+def image_path_for(image_url):
+    """
+    Chemin local adresse par contenu d'une couverture: le chemin de hash
+    media/cache/xx/yy/<hash>.jpg du site est reutilise tel quel, une meme
+    image n'est donc stockee qu'une fois, quel que soit le titre ou la categorie
+    """
+    marker = '/media/cache/'
+    if marker in image_url:
+        relative_path = image_url.split(marker, 1)[1].split('?')[0]
+    else:
+        digest = hashlib.sha1(image_url.encode('utf-8')).hexdigest()
+        extension = os.path.splitext(image_url.split('?')[0])[1] or '.jpg'
+        relative_path = f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+    return os.path.join(IMAGES_DIR, *relative_path.split('/'))
+
+def is_valid_image(filepath):
+    """
+    Verifie qu'un fichier image existe, n'est pas vide et commence par une signature connue
+    """
+    try:
+        with open(filepath, 'rb') as file:
+            header = file.read(12)
+    except OSError:
+        return False
+    return any(header.startswith(signature) for signature in IMAGE_SIGNATURES) or header[8:12] == b'WEBP'
+
+def download_image(image_url, image_name=None):
+    """
+    Telecharge une image depuis une URL, en flux par blocs vers le disque.
+    Sans image_name, l'image est stockee a son adresse de contenu et
+    n'est pas retelechargee si un fichier valide existe deja.
+    """
+    filepath = os.path.join(IMAGES_DIR, image_name) if image_name else image_path_for(image_url)
+    label = image_name or os.path.basename(filepath)
+    
+    if is_valid_image(filepath):
+        return True
+    
+    ensure_dir(os.path.dirname(filepath))
+    tmp_path = f"{filepath}.{threading.get_ident()}.part"
+    acquire()
+    started = time.perf_counter()
     
     try:
-        response = requests.get(image_url, headers=HEADERS)
-        response.raise_for_status()
-        
-        with open(filepath, 'wb') as file:
-            file.write(response.content)
-        print(f"Image telechargee: {image_name}")
+        with fetch(image_url, stream=True) as response:
+            with open(tmp_path, 'wb') as file:
+                for chunk in response.iter_content(chunk_size=IMAGE_CHUNK_SIZE):
+                    file.write(chunk)
+                    increment('http_bytes', len(chunk))
+        os.replace(tmp_path, filepath)
+        observe('image', started)
+        progress('images')
+        logger.debug("Image telechargee: %s", label)
         return True
     except Exception as e:
-        print(f"Erreur telechargement image {image_name}: {e}")
+        increment('fetch_errors')
+        progress('errors')
+        logger.error("Erreur telechargement image %s: %s", label, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return False
 
+def download_images(image_urls, workers=IMAGE_WORKERS):
+    """
+    Telecharge des images en parallele, chaque URL une seule fois.
+    Retourne le nombre d'images disponibles sur disque.
+    """
+    unique_urls = list(dict.fromkeys(url for url in image_urls if url))
+    if not unique_urls:
+        return 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(download_image, unique_urls))
+
+class RateLimiter:
+    """
+    Limite global du debit de requetes, partage entre tous les threads
+    """
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        """
+        Attend le prochain creneau libre: une requete toutes les `delay` secondes
+        """
+        if not self.delay or self.delay <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.delay
+        if slot > now:
+            pause(slot - now)
+
 def clean_filename(filename):
     """
     Nettoie un nom de fichier des caracteres invalides
@@ -94,6 +431,20 @@ def format_price(price_text):
     except (ValueError, AttributeError):
         return 0.0
 
+def product_info_value(field, text):
+    """
+    Convertit une valeur du tableau d'informations produit selon son champ
+    """
+    text = text.strip()
+    if field in ('price_excl_tax', 'price_incl_tax', 'tax'):
+        return format_price(text)
+    if field == 'number_of_reviews':
+        try:
+            return int(text)
+        except ValueError:
+            return 0
+    return text
+
 def rating_to_stars(rating_class):
     """
     Convertit une classe de rating en nombre d'etoiles
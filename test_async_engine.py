@@ -0,0 +1,55 @@
+# test_async_engine.py
+"""
+Tests du moteur asyncio: reessais sur erreurs de connexion
+"""
+import os
+import sys
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import async_engine
+from async_engine import AsyncRateLimiter, get_page_async
+from settings import MAX_RETRIES
+
+aiohttp = pytest.importorskip('aiohttp')
+
+BODY = b'<html><body>ok</body></html>'
+
+async def fetch_with_failures(failures):
+    """Serveur local qui coupe les `failures` premieres connexions sans repondre"""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        await reader.readuntil(b'\r\n\r\n')
+        if len(connections) <= failures:
+            writer.transport.abort()
+            return
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: close\r\n'
+                     + f'Content-Length: {len(BODY)}\r\n\r\n'.encode() + BODY)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server, aiohttp.ClientSession() as session:
+        content = await get_page_async(session, f"http://127.0.0.1:{port}/page.html", AsyncRateLimiter(0))
+    return content, len(connections)
+
+@pytest.fixture(autouse=True)
+def short_backoff(monkeypatch):
+    monkeypatch.setattr(async_engine, 'RETRY_BACKOFF_FACTOR', 0.01)
+    monkeypatch.setattr(async_engine.logger, 'disabled', True)
+
+def test_connexion_coupee_reessayee():
+    """Une connexion coupee est reessayee comme sur le moteur sync"""
+    assert asyncio.run(fetch_with_failures(2)) == (BODY, 3)
+
+def test_abandon_apres_max_retries():
+    """Au-dela de MAX_RETRIES reessais, la page est abandonnee (None)"""
+    content, connections = asyncio.run(fetch_with_failures(100))
+    assert content is None
+    assert connections >= MAX_RETRIES + 1
@@ -0,0 +1,128 @@
+# test_frontier.py
+"""
+Tests de la frontiere du crawl: normalisation des URLs, livres visites, ordonnancement
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from frontier import normalize_url, VisitedSet, Frontier, LIST_PAGE, PRODUCT_PAGE, DIGEST_SIZE
+import dedup
+
+LIST_URL = "http://books.toscrape.com/catalogue/category/books/travel_2/index.html"
+BOOK_URL = "http://books.toscrape.com/catalogue/a-light_1000/index.html"
+
+def test_normalize_url_resout_les_liens_relatifs():
+    """Les differentes ecritures d'un meme livre donnent une seule URL"""
+    assert normalize_url("../../../a-light_1000/index.html", LIST_URL) == BOOK_URL
+    assert normalize_url("../../../../catalogue/a-light_1000/index.html", LIST_URL) == BOOK_URL
+    assert normalize_url(" ../../../a-light_1000/index.html#top", LIST_URL) == BOOK_URL
+    assert normalize_url("page-2.html", LIST_URL) == LIST_URL.replace("index.html", "page-2.html")
+    assert normalize_url("../../media/cache/x.jpg", BOOK_URL) == "http://books.toscrape.com/media/cache/x.jpg"
+
+def test_normalize_url_forme_canonique():
+    """Schema et hote en minuscules, port par defaut retire, port explicite et requete conserves"""
+    assert normalize_url("HTTP://Books.ToScrape.COM:80/catalogue/a-light_1000/index.html", LIST_URL) == BOOK_URL
+    assert normalize_url("https://example.com:443", LIST_URL) == "https://example.com/"
+    assert normalize_url("http://127.0.0.1:8000/a?b=1", LIST_URL) == "http://127.0.0.1:8000/a?b=1"
+    assert normalize_url("http://[::1]:8000/a", LIST_URL) == "http://[::1]:8000/a"
+
+def test_visited_set_persiste_entre_deux_runs(tmp_path):
+    """Les empreintes sont rechargees avec resume, remises a zero sinon"""
+    path = str(tmp_path / "visited.bin")
+    visited = VisitedSet(path)
+    assert visited.add(BOOK_URL)
+    assert not visited.add(BOOK_URL)
+    visited.add(LIST_URL)
+    visited.close()
+    assert os.path.getsize(path) == 2 * DIGEST_SIZE
+
+    # Empreinte tronquee par une interruption: ignoree
+    with open(path, 'ab') as file:
+        file.write(b'\x01\x02\x03')
+    visited = VisitedSet(path, resume=True)
+    assert len(visited) == 2
+    assert BOOK_URL in visited
+    assert "http://books.toscrape.com/autre" not in visited
+    visited.close()
+
+    visited = VisitedSet(path)
+    assert len(visited) == 0
+    visited.close()
+    assert os.path.getsize(path) == 0
+
+def _crawl(frontier, pages, books_per_page):
+    """Parcours serie simule: chaque page liste n ajoute ses livres et la page n+1"""
+    order = []
+    peak = 0
+    while True:
+        task = frontier.pop()
+        if task is None:
+            break
+        kind, url = task
+        order.append(task)
+        if kind == LIST_PAGE:
+            page = int(url.rsplit('-', 1)[1])
+            frontier.push_products([f"book-{page}-{i}" for i in range(books_per_page)])
+            if page + 1 < pages:
+                frontier.push_list(f"list-{page + 1}")
+        peak = max(peak, len(frontier._product_queue))
+        frontier.task_done()
+    return order, peak
+
+def test_frontier_ordre_et_file_bornee():
+    """Pages liste d'abord, livres dans l'ordre du site, file de livres bornee"""
+    dedup.reset_book_index()
+    order, peak = _crawl(Frontier("list-0", max_pending=30), pages=10, books_per_page=20)
+    books = [url for kind, url in order if kind == PRODUCT_PAGE]
+    assert books == [f"book-{page}-{i}" for page in range(10) for i in range(20)]
+    assert [url for kind, url in order if kind == LIST_PAGE] == [f"list-{page}" for page in range(10)]
+    assert peak < 30 + 20
+
+def test_frontier_limite_de_pages_et_doublons():
+    """max_pages arrete la pagination, un livre deja reserve n'entre pas deux fois"""
+    dedup.reset_book_index()
+    frontier = Frontier("list-0", max_pages=2)
+    order, _ = _crawl(frontier, pages=10, books_per_page=3)
+    assert [url for kind, url in order if kind == LIST_PAGE] == ["list-0", "list-1"]
+
+    # Meme livre decouvert depuis deux pages: une seule tache
+    index = dedup.reset_book_index()
+    frontier = Frontier("list-0")
+    assert frontier.pop() == (LIST_PAGE, "list-0")
+    frontier.push_products(["book-a", "book-b"])
+    frontier.push_products(["book-b", "book-c"])
+    frontier.task_done()
+    assert frontier.pop_batch() == [(PRODUCT_PAGE, "book-a"), (PRODUCT_PAGE, "book-b"), (PRODUCT_PAGE, "book-c")]
+    assert index.duplicates == 1
+    dedup.reset_book_index()
+
+def test_frontier_pop_batch():
+    """Le moteur asyncio vide la frontiere par lots, pages liste en tete"""
+    dedup.reset_book_index()
+    frontier = Frontier("list-0")
+    assert frontier.pop_batch() == [(LIST_PAGE, "list-0")]
+    frontier.push_products(["b1", "b2"])
+    frontier.push_list("list-1")
+    frontier.task_done()
+    assert frontier.pop_batch() == [(LIST_PAGE, "list-1"), (PRODUCT_PAGE, "b1"), (PRODUCT_PAGE, "b2")]
+    for _ in range(3):
+        frontier.task_done()
+    assert frontier.pop_batch() == []
+    assert frontier.pop() is None
+    dedup.reset_book_index()
+
+def test_frontier_pop_batch_borne():
+    """Les lots du moteur asyncio respectent max_pending comme pop()"""
+    dedup.reset_book_index()
+    frontier = Frontier("list-0", max_pending=3)
+    frontier.pop_batch()
+    frontier.push_products([f"b{i}" for i in range(5)])
+    frontier.push_list("list-1")
+    frontier.task_done()
+    # 5 livres en attente: la page liste patiente, seuls 3 livres partent
+    assert frontier.pop_batch() == [(PRODUCT_PAGE, "b0"), (PRODUCT_PAGE, "b1"), (PRODUCT_PAGE, "b2")]
+    # Moins de 3 livres en attente: la page liste repart en tete
+    assert frontier.pop_batch() == [(LIST_PAGE, "list-1"), (PRODUCT_PAGE, "b3"), (PRODUCT_PAGE, "b4")]
+    dedup.reset_book_index()
@@ -0,0 +1,62 @@
+# test_journal.py
+"""
+Tests du journal de reprise: relecture des livres et des categories terminees
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from journal import CrawlJournal
+
+def book(category, number, price):
+    return {'title': f"Livre {number}", 'price': price, 'category': category,
+            'product_url': f"http://books.toscrape.com/catalogue/livre_{number}/index.html"}
+
+def test_reprise_relit_livres_et_categories(tmp_path):
+    """Apres une interruption, les livres journalises et l'ordre des categories terminees sont relus"""
+    path = str(tmp_path / "checkpoint.jsonl")
+    journal = CrawlJournal(path)
+    travel = [book('Travel', 2, '45.17'), book('Travel', 1, '49.43')]
+    for record in travel:
+        journal.add_book(record)
+    journal.complete_category('Travel', [record['product_url'] for record in travel])
+    # Categorie interrompue: un livre journalise, categorie non terminee
+    journal.add_book(book('Poetry', 3, '51.77'))
+    journal.close()
+    # Derniere ligne tronquee par l'interruption
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('{"type": "book", "record": {"title": "Livre')
+
+    journal = CrawlJournal(path, resume=True)
+    assert journal.category_books('Travel') == travel
+    assert journal.category_books('Poetry') is None
+    assert journal.get_book('Poetry', book('Poetry', 3, '')['product_url'])['price'] == '51.77'
+    assert journal.get_book('Poetry', book('Poetry', 4, '')['product_url']) is None
+    # Un meme livre dans une autre categorie n'est pas confondu
+    assert journal.get_book('Poetry', travel[0]['product_url']) is None
+    journal.close()
+
+def test_categorie_incomplete(tmp_path):
+    """Une categorie terminee dont un livre manque au journal est rescrapee"""
+    path = str(tmp_path / "checkpoint.jsonl")
+    journal = CrawlJournal(path)
+    journal.add_book(book('Travel', 1, '49.43'))
+    journal.complete_category('Travel', [book('Travel', 1, '')['product_url'], book('Travel', 2, '')['product_url']])
+    journal.close()
+
+    journal = CrawlJournal(path, resume=True)
+    assert journal.category_books('Travel') is None
+    journal.close()
+
+def test_sans_reprise_le_journal_repart_de_zero(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    journal = CrawlJournal(path)
+    journal.add_book(book('Travel', 1, '49.43'))
+    journal.complete_category('Travel', [book('Travel', 1, '')['product_url']])
+    journal.close()
+
+    CrawlJournal(path).close()
+    journal = CrawlJournal(path, resume=True)
+    assert journal.category_books('Travel') is None
+    journal.close()
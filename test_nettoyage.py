@@ -0,0 +1,77 @@
+# test_nettoyage.py
+"""
+Tests du nettoyage vectorise: memes resultats que les anciens nettoyages ligne a ligne
+"""
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+
+from nettoyage import nettoyer_prix, nettoyer_stock, nettoyer_note, reparer_encodage, nettoyer_livres
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+
+def ancien_nettoyer_prix(prix_str):
+    """Nettoyage du prix des anciens scripts d'analyse, ligne a ligne"""
+    if pd.isna(prix_str):
+        return 0.0
+    prix_str = str(prix_str)
+    prix_nettoye = re.sub(r'[^\d.]', '', prix_str)
+    if not prix_nettoye:
+        match = re.search(r'(\d+\.\d+)', prix_str)
+        if match:
+            prix_nettoye = match.group(1)
+        else:
+            return 0.0
+    try:
+        return float(prix_nettoye)
+    except ValueError:
+        return 0.0
+
+def ancien_nettoyer_stock(serie):
+    """Nettoyage de la disponibilite des anciens scripts d'analyse"""
+    return pd.to_numeric(serie.str.extract(r'(\d+)')[0], errors='coerce').fillna(0)
+
+def test_prix_identiques_a_l_ancien_nettoyage():
+    """Prix mal encodes, symbole correct, valeurs manquantes et illisibles"""
+    prix = pd.Series(['Â£45.17', '£45.17', np.nan, 'abc', '£0.99', 'Â£51.77', '£45.17', '12', None])
+    attendu = [ancien_nettoyer_prix(valeur) for valeur in prix]
+    assert nettoyer_prix(prix).tolist() == attendu
+    assert nettoyer_prix(pd.Series([45.17, np.nan])).tolist() == [45.17, 0.0]
+
+def test_stock_identique_a_l_ancien_nettoyage():
+    """Nombre d'exemplaires extrait de la disponibilite, 0 si absent"""
+    stock = pd.Series(['In stock (22 available)', 'In stock (1 available)', 'Out of stock', np.nan, 'In stock (22 available)'])
+    assert nettoyer_stock(stock).tolist() == ancien_nettoyer_stock(stock).astype('int64').tolist()
+    assert nettoyer_stock(stock).tolist() == [22, 1, 0, 0, 22]
+
+def test_notes_en_chiffres_et_en_lettres():
+    notes = pd.Series(['Three', '4', 'star-rating Five', np.nan, 'aucune', 2])
+    assert nettoyer_note(notes).tolist() == [3, 4, 5, 0, 0, 2]
+
+def test_reparer_encodage():
+    """Le texte UTF-8 lu en latin-1 est repare, le reste est inchange"""
+    textes = pd.Series(['Â£45.17', 'Noahâ\x80\x99s Ark', 'Sharp Objects', np.nan])
+    repare = reparer_encodage(textes)
+    assert repare.tolist()[:3] == ['£45.17', 'Noah’s Ark', 'Sharp Objects']
+    assert pd.isna(repare.iloc[3])
+
+def test_nettoyer_livres_sur_les_exports():
+    """Les exports du depot donnent les memes colonnes nettoyees qu'avant"""
+    df = pd.read_csv(os.path.join(DOSSIER, 'donnees', 'mystery.csv'))
+    prix = [ancien_nettoyer_prix(valeur) for valeur in df['prix']]
+    stock = ancien_nettoyer_stock(df['disponibilite']).astype('int64').tolist()
+    notes = pd.to_numeric(df['note'], errors='coerce').fillna(0).astype('int64').tolist()
+
+    df = nettoyer_livres(df)
+    assert df['prix_numerique'].tolist() == prix
+    assert df['disponibilite_clean'].tolist() == stock
+    assert df['note'].tolist() == notes
+
+    df = nettoyer_livres(pd.read_csv(os.path.join(DOSSIER, 'data', 'travel.csv')))
+    assert df['price'].dtype == 'float64'
+    assert (df['stock'] > 0).all()
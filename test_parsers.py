@@ -0,0 +1,37 @@
+# test_parsers.py
+"""
+Tests des backends de parsing: comptage des ecarts bs4/lxml et encodage des pages
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import parsers
+import fast_parsers
+from local_site import LocalCatalogue
+
+def test_ecarts_comptes_depuis_plusieurs_threads(monkeypatch):
+    """Aucun ecart perdu quand les workers --workers le signalent en meme temps"""
+    monkeypatch.setattr(parsers, '_backend_mismatches', 0)
+    monkeypatch.setattr(parsers.logger, 'disabled', True)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: parsers.record_mismatch(f"livre-{i}", ['price']), range(4000)))
+    parsers.record_mismatch("livre-identique", [])
+    assert parsers.backend_mismatches() == 4000
+
+def test_lxml_detecte_l_encodage_comme_bs4():
+    """Une page declaree en windows-1252 (ou en utf-8, ou avec BOM) donne le meme livre avec les deux backends"""
+    html = LocalCatalogue().product_page(0, 1, 0).replace('<head>', '<head><meta charset="windows-1252">')
+    html = html.replace('The Book', 'Le Livre « déjà » lu')
+    url = "http://127.0.0.1/catalogue/book-0-1-0_1/index.html"
+    for content, encoding in ((html.encode('cp1252'), 'windows-1252'), (html.replace('windows-1252', 'utf-8').encode('utf-8'), 'utf-8'),
+                              (b'\xef\xbb\xbf' + html.replace('<meta charset="windows-1252">', '').encode('utf-8'), 'utf-8')):
+        assert fast_parsers.page_encoding(content) == encoding
+        reference = parsers.extract_product(parsers.make_soup(content), url, 'Travel')
+        candidate = fast_parsers.extract_product_lxml(content, url, 'Travel')
+        assert reference['title'].startswith('Le Livre « déjà » lu')
+        assert parsers.mismatched_fields(reference, candidate) == []
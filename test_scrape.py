@@ -0,0 +1,112 @@
+# test_scrape.py
+"""
+Tests du mode --workers: meme sortie que le parcours serie, sur le serveur local de benchmark
+"""
+import os
+import sys
+import time
+import random
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import scrape
+import utils
+import parsers
+import async_engine
+from settings import CSV_ENCODING
+from dedup import reset_book_index
+from local_site import LocalCatalogue, start_server, server_url
+
+@pytest.fixture(scope='module')
+def site():
+    server = start_server(LocalCatalogue(categories=2, pages=3, books_per_page=8))
+    yield server_url(server)
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def category(site, monkeypatch):
+    monkeypatch.setattr(parsers, 'BASE_URL', site + '/')
+    return parsers.get_category_links()[1]
+
+@pytest.fixture
+def out_of_order(monkeypatch):
+    """Pages livres terminees dans le desordre: delai aleatoire avant chaque parsing"""
+    jitter = random.Random(0)
+    parse_product_page = scrape.parse_product_page
+
+    def slow_parse(*args):
+        time.sleep(jitter.random() * 0.02)
+        return parse_product_page(*args)
+
+    monkeypatch.setattr(scrape, 'parse_product_page', slow_parse)
+
+def crawl(iterator, category, *args):
+    reset_book_index()
+    try:
+        return list(iterator(category['url'], category['name'], 0, *args))
+    finally:
+        reset_book_index()
+
+@pytest.mark.parametrize('workers', [2, 8])
+def test_concurrent_identique_au_serie(category, out_of_order, workers):
+    """Memes enregistrements, dans le meme ordre, quel que soit le nombre de workers"""
+    serial = crawl(scrape.iter_category_serial, category, None)
+    concurrent = crawl(scrape.iter_category_concurrent, category, None, workers)
+    assert len(serial) == 3 * 8
+    assert concurrent == serial
+
+def test_concurrent_limite_de_pages(category):
+    """max_pages s'applique de la meme facon aux deux parcours"""
+    serial = crawl(scrape.iter_category_serial, category, 2)
+    concurrent = crawl(scrape.iter_category_concurrent, category, 2, 4)
+    assert len(serial) == 2 * 8
+    assert concurrent == serial
+
+@pytest.fixture
+def outdir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'DATA_DIR', str(tmp_path))
+    return tmp_path
+
+@pytest.fixture
+def empty_first_category(monkeypatch):
+    """La premiere categorie ne produit aucun livre pendant ce run"""
+    parse_product_page = scrape.parse_product_page
+    parse_product_content = async_engine.parse_product_content
+    monkeypatch.setattr(scrape, 'parse_product_page',
+                        lambda url, *args: None if '/book-0-' in url else parse_product_page(url, *args))
+    monkeypatch.setattr(async_engine, 'parse_product_content',
+                        lambda content, url, *args: None if '/book-0-' in url else parse_product_content(content, url, *args))
+
+def read(path):
+    with open(path, encoding=CSV_ENCODING) as file:
+        return file.read()
+
+@pytest.mark.parametrize('mode', ['serial', 'parallel', 'async'])
+def test_csv_global_sans_csv_perime(site, category, outdir, empty_first_category, mode):
+    """Le CSV global ne reprend que les CSV finalises par ce run, dans l'ordre des categories"""
+    stale = outdir / "Category 0.csv"
+    stale.write_text("title,price\nAncien livre,1.00\n", encoding=CSV_ENCODING)
+
+    reset_book_index()
+    try:
+        if mode == 'async':
+            scrape.scrape_categories_async(None, 0, None, "all_books.csv")
+        else:
+            categories = parsers.get_category_links()
+            if mode == 'parallel':
+                scrape.scrape_categories_parallel(categories, 0, None, 1, 2, "all_books.csv")
+            else:
+                scrape.scrape_categories_serial(categories, 0, None, 1, "all_books.csv")
+    finally:
+        reset_book_index()
+
+    assert read(stale) == "title,price\nAncien livre,1.00\n"
+    assert read(outdir / "all_books.csv") == read(outdir / "Category 1.csv")
+    assert "Ancien livre" not in read(outdir / "all_books.csv")
+    assert len(read(outdir / "Category 1.csv").splitlines()) == 1 + 3 * 8
+    assert not list(outdir.glob("*.tmp"))
@@ -0,0 +1,66 @@
+# test_sinks.py
+"""
+Tests des sorties CSV au fil de l'eau: finalisation atomique et abandon
+"""
+import os
+import sys
+import csv
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from settings import CSV_ENCODING
+from utils import CsvSink, write_records
+
+BOOKS = [
+    {'title': 'A Light in the Attic', 'price': 51.77, 'rating': 3, 'category': 'Poetry', 'product_url': 'http://x/a'},
+    {'title': 'Tipping the Velvet', 'price': 53.74, 'rating': 1, 'category': 'Historical Fiction', 'product_url': 'http://x/b'},
+]
+
+def read_csv(path):
+    with open(path, newline='', encoding=CSV_ENCODING) as file:
+        return list(csv.DictReader(file))
+
+def test_close_remplace_le_csv(tmp_path):
+    """close() renomme le fichier temporaire sur le CSV final"""
+    path = str(tmp_path / "livres.csv")
+    sink = CsvSink(path)
+    for book in BOOKS:
+        sink.write(book)
+    assert not os.path.exists(path)
+    assert sink.close()
+    assert [row['title'] for row in read_csv(path)] == [book['title'] for book in BOOKS]
+    assert not os.path.exists(path + '.tmp')
+
+def test_abort_conserve_le_csv_precedent(tmp_path):
+    """Un crawl interrompu ne remplace pas le CSV complet du run precedent"""
+    path = str(tmp_path / "livres.csv")
+    write_records(CsvSink(path), BOOKS)
+
+    sink = CsvSink(path)
+    sink.write(BOOKS[0])
+    sink.abort()
+    assert len(read_csv(path)) == len(BOOKS)
+    assert not os.path.exists(path + '.tmp')
+
+def test_write_records_abandonne_sur_erreur(tmp_path):
+    """Une exception (ou KeyboardInterrupt) pendant l'ecriture abandonne le fichier temporaire"""
+    path = str(tmp_path / "livres.csv")
+    write_records(CsvSink(path), BOOKS)
+
+    def records():
+        yield BOOKS[0]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        write_records(CsvSink(path), records())
+    assert len(read_csv(path)) == len(BOOKS)
+    assert not os.path.exists(path + '.tmp')
+
+def test_close_sans_enregistrement(tmp_path):
+    """Un CSV vide n'est pas cree"""
+    path = str(tmp_path / "vide.csv")
+    assert not CsvSink(path).close()
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + '.tmp')
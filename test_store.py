@@ -0,0 +1,65 @@
+# test_store.py
+"""
+Tests du catalogue SQLite: upsert des livres et historique des prix entre deux crawls
+"""
+import os
+import sys
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from store import CatalogStore
+
+def book(upc, price, availability="In stock (5 available)"):
+    return {'upc': upc, 'title': f"Livre {upc}", 'price': price, 'availability': availability, 'rating': '3',
+            'category': 'Travel', 'product_url': f"http://books.toscrape.com/catalogue/{upc}/index.html"}
+
+def crawl(path, records):
+    store = CatalogStore(path, batch_size=2)
+    for record in records:
+        store.write(record)
+    store.close()
+    return store
+
+def test_upsert_et_historique(tmp_path):
+    """Un livre inchange n'ajoute pas d'historique, un prix ou un stock modifie si"""
+    path = str(tmp_path / "catalogue.db")
+    first = crawl(path, [book('a', '10.00'), book('b', '20.00'), book('c', '30.00')])
+    assert (first.count, first.changes) == (3, 3)
+
+    second = crawl(path, [book('a', '10.00'), book('b', '18.50'), book('c', '30.00', "In stock (4 available)"),
+                          book('d', '5.00')])
+    assert (second.count, second.changes) == (4, 3)
+
+    connection = sqlite3.connect(path)
+    try:
+        books = {row[0]: row[1:] for row in connection.execute(
+            "SELECT upc, price, stock, rating, first_crawl, last_crawl FROM books")}
+        assert books == {
+            'a': (10.0, 5, 3, first.crawl_id, second.crawl_id),
+            'b': (18.5, 5, 3, first.crawl_id, second.crawl_id),
+            'c': (30.0, 4, 3, first.crawl_id, second.crawl_id),
+            'd': (5.0, 5, 3, second.crawl_id, second.crawl_id),
+        }
+        history = connection.execute("SELECT upc, crawl_id, price FROM price_history ORDER BY upc, crawl_id").fetchall()
+        assert history == [
+            ('a', first.crawl_id, 10.0),
+            ('b', first.crawl_id, 20.0), ('b', second.crawl_id, 18.5),
+            ('c', first.crawl_id, 30.0), ('c', second.crawl_id, 30.0),
+            ('d', second.crawl_id, 5.0),
+        ]
+        crawls = connection.execute("SELECT id, books FROM crawls WHERE finished_at IS NOT NULL ORDER BY id").fetchall()
+        assert crawls == [(first.crawl_id, 3), (second.crawl_id, 4)]
+    finally:
+        connection.close()
+
+def test_livre_sans_upc(tmp_path):
+    """Sans UPC, l'URL du livre sert de cle"""
+    path = str(tmp_path / "catalogue.db")
+    record = book('', '12.00')
+    crawl(path, [record, record])
+    connection = sqlite3.connect(path)
+    try:
+        assert connection.execute("SELECT upc FROM books").fetchall() == [(record['product_url'],)]
+    finally:
+        connection.close()
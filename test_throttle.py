@@ -0,0 +1,103 @@
+# test_throttle.py
+"""
+Tests du debit adaptatif (seau a jetons AIMD) sur une horloge simulee
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import throttle
+from throttle import AdaptiveThrottle, parse_retry_after
+from settings import THROTTLE_INCREASE, THROTTLE_DECREASE, THROTTLE_COOLDOWN, THROTTLE_WARMUP, THROTTLE_MAX_RETRY_AFTER
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(throttle.time, 'monotonic', fake)
+    return fake
+
+def test_parse_retry_after():
+    """Secondes ou date HTTP, bornees a THROTTLE_MAX_RETRY_AFTER"""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after("100000") == THROTTLE_MAX_RETRY_AFTER
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("pas une date") is None
+    assert parse_retry_after(None) is None
+
+def test_seau_a_jetons(clock):
+    """La rafale passe sans attente, puis une requete tous les 1/debit"""
+    limiter = AdaptiveThrottle(rate=2.0, min_rate=0.5, max_rate=20.0, burst=2)
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == pytest.approx(0.5)
+    assert limiter.reserve() == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter.reserve() == pytest.approx(0.5)
+
+def test_augmentation_additive(clock):
+    """Chaque reponse rapide ajoute THROTTLE_INCREASE / debit, sans depasser le plafond"""
+    limiter = AdaptiveThrottle(rate=2.0, min_rate=0.5, max_rate=3.0, burst=4)
+    limiter.record(200, latency=0.05)
+    assert limiter.rate == pytest.approx(2.0 + THROTTLE_INCREASE / 2.0)
+    for _ in range(20):
+        limiter.record(200, latency=0.05)
+    assert limiter.rate == 3.0
+
+def test_diminution_multiplicative_et_cooldown(clock):
+    """Un 503 divise le debit, une rafale de 503 dans le cooldown ne compte qu'une fois"""
+    limiter = AdaptiveThrottle(rate=8.0, min_rate=0.5, max_rate=20.0, burst=4)
+    limiter.record(503)
+    assert limiter.rate == pytest.approx(8.0 * THROTTLE_DECREASE)
+    limiter.record(429)
+    limiter.record(None)
+    assert limiter.rate == pytest.approx(8.0 * THROTTLE_DECREASE)
+    assert limiter.stats['slowdowns'] == 1
+
+    clock.now += THROTTLE_COOLDOWN + 0.1
+    limiter.record(None)
+    assert limiter.rate == pytest.approx(8.0 * THROTTLE_DECREASE ** 2)
+    for _ in range(10):
+        clock.now += THROTTLE_COOLDOWN + 0.1
+        limiter.record(503)
+    assert limiter.rate == 0.5
+    assert limiter.stats['lowest_rate'] == 0.5
+
+def test_retry_after_suspend_toutes_les_requetes(clock):
+    """Retry-After repousse le prochain creneau de tout le monde"""
+    limiter = AdaptiveThrottle(rate=4.0, min_rate=0.5, max_rate=20.0, burst=4)
+    limiter.record(429, retry_after="5")
+    rate = 4.0 * THROTTLE_DECREASE
+    assert limiter.rate == pytest.approx(rate)
+    # La rafale est perdue: la premiere requete attend l'echeance puis un jeton
+    assert limiter.reserve() == pytest.approx(5.0 + 1 / rate)
+    assert limiter.stats['retry_after_seconds'] == pytest.approx(5.0)
+
+    # Un second Retry-After plus court ne compte pas et ne raccourcit pas la suspension
+    clock.now += 0.5
+    limiter.record(429, retry_after="2")
+    assert limiter.stats['retry_after_seconds'] == pytest.approx(5.0)
+    assert limiter.reserve() == pytest.approx(4.5 + 2 / rate)
+
+def test_pic_de_latence(clock):
+    """Apres l'echauffement, une latence tres superieure a la reference ralentit"""
+    limiter = AdaptiveThrottle(rate=10.0, min_rate=0.5, max_rate=10.0, burst=4)
+    for _ in range(THROTTLE_WARMUP + 1):
+        limiter.record(200, latency=0.1)
+    assert limiter.rate == 10.0
+    limiter.record(200, latency=2.0)
+    assert limiter.rate == pytest.approx(10.0 * THROTTLE_DECREASE)
+
+def test_debits_invalides():
+    with pytest.raises(ValueError):
+        AdaptiveThrottle(rate=1.0, min_rate=5.0, max_rate=1.0)